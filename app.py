@@ -1,4 +1,7 @@
 import copy
+import functools
+import hashlib
+import hmac
 import json
 import os
 import logging
@@ -11,26 +14,37 @@ from quart import (
     jsonify,
     make_response,
     request,
-    send_from_directory,
     render_template,
     current_app,
 )
+from quart.wrappers.response import IterableBody
 
 from openai import AsyncAzureOpenAI
-from azure.identity.aio import (
-    DefaultAzureCredential,
-    get_bearer_token_provider
-)
+from backend import timing
+from backend.admission import AdmissionController, AdmissionRejected, release_after
 from backend.auth.auth_utils import get_authenticated_user_details
+from backend.deployment_pool import Deployment, DeploymentPool
+from backend.diagnostics import ProfilerBusy, WorkerProfiler, dump_tasks, install_task_clock
+from backend.history.answer_recorder import AnswerRecorder
+from backend.history.history_cache import HistoryCache
+from backend.hedging import Hedger
+from backend.json_provider import FastJSONProvider, dumps_bytes
+from backend.loop_monitor import LoopMonitor
+from backend.messages import ContextCache, to_frontend_message, to_openai_messages
+from backend.metrics import init_metrics, record_cache_lookup
+from backend.rate_limit import RateLimiter, estimate_request_tokens, load_tokenizer
 from backend.security.ms_defender_utils import get_msdefender_user_json
-from backend.history.cosmosdbservice import CosmosConversationClient
-from backend.study_service import StudyService
-from backend.study_manager import StudyManager
+from backend.startup import StartupPipeline
+from backend.static_assets import StaticAssets
+from backend.streaming import StreamTracker, in_app_context
+from backend.tracing import init_tracing, inject_trace_context, shutdown_tracing, start_request_trace
+from backend.titles import TITLE_PROMPT, TitleCache, fallback_title
 from backend.settings import (
     app_settings,
     MINIMUM_SUPPORTED_AZURE_OPENAI_PREVIEW_API_VERSION
 )
 from backend.utils import (
+    close_stream,
     format_as_ndjson,
     format_stream_response,
     format_non_streaming_response,
@@ -40,32 +54,209 @@ from backend.utils import (
 
 bp = Blueprint("routes", __name__, static_folder="static", template_folder="static")
 
-cosmos_db_ready = asyncio.Event()
-
-
 def create_app():
     app = Quart(__name__)
+    app.json = FastJSONProvider(app)
     app.register_blueprint(bp)
-    app.config["TEMPLATES_AUTO_RELOAD"] = True
-    
+    # templates are only edited in development; elsewhere index.html is compiled once
+    app.config["TEMPLATES_AUTO_RELOAD"] = DEBUG.lower() == "true"
+    app.static_assets = StaticAssets(os.path.join(app.root_path, "static", "assets"))
+    # the settings do not change while the app runs, so they are serialized once
+    app.frontend_settings_body = dumps_bytes(frontend_settings)
+    app.frontend_settings_etag = strong_etag(app.frontend_settings_body)
+    app.history_cache = HistoryCache(
+        int(app_settings.chat_history.cache_mb * 1024 * 1024) if app_settings.chat_history else 0,
+        app_settings.chat_history.version_ttl if app_settings.chat_history else 0,
+    )
+    app.conversation_store = None
+    app.study_service = None
+    app.study_manager = None
+    app.openai_pool = None
+    app.title_pool = None
+    app.title_cache = TitleCache(app_settings.azure_openai.title_cache_size)
+    app.context_cache = ContextCache(int(app_settings.azure_openai.context_cache_mb * 1024 * 1024))
+    app.streams = StreamTracker()
+    app.hedger = None
+    if app_settings.azure_openai.hedge_enabled:
+        app.hedger = Hedger(
+            percentile=app_settings.azure_openai.hedge_percentile,
+            min_delay=app_settings.azure_openai.hedge_min_delay,
+            max_delay=app_settings.azure_openai.hedge_max_delay,
+        )
+    app.azure_credential = None
+    app.startup_pipeline = StartupPipeline()
+    app.profiler = None
+    if app_settings.admin.diagnostics_enabled:
+        app.profiler = WorkerProfiler(max_seconds=app_settings.admin.profile_max_seconds)
+    app.loop_monitor = None
+    if app_settings.loop_monitor.enabled:
+        app.loop_monitor = LoopMonitor(
+            interval=app_settings.loop_monitor.interval,
+            warn_ms=app_settings.loop_monitor.warn_ms,
+            blocking_threshold_ms=(
+                app_settings.loop_monitor.blocking_threshold_ms if app_settings.loop_monitor.blocking_detection else None
+            ),
+        )
+    app.metrics = None
+    if app_settings.metrics.enabled:
+        app.metrics = init_metrics(app_settings.base_settings.datasource_type)
+    app.admission = None
+    if app_settings.admission.enabled:
+        app.admission = AdmissionController(
+            max_concurrent=app_settings.admission.max_concurrent,
+            max_per_user=app_settings.admission.max_per_user,
+            max_queue=app_settings.admission.max_queue,
+            queue_timeout=app_settings.admission.queue_timeout,
+            retry_after=app_settings.admission.retry_after,
+        )
+    app.rate_limiter = RateLimiter(
+        tokens_per_minute=app_settings.azure_openai.tokens_per_minute,
+        max_retries=app_settings.azure_openai.rate_limit_max_retries,
+    )
+
+    async def warm_chat_history():
+        store = app_settings.chat_history.store if app_settings.chat_history else None
+        if store == "sqlite":
+            app.conversation_store = init_sqlite_store()
+            # the study services are built on the Cosmos DB container and stay off
+            await app.conversation_store.warm_up(app.startup_pipeline.measure)
+            return
+
+        if store == "memory":
+            app.conversation_store = init_memory_store()
+        else:
+            credential = None
+            if app_settings.chat_history and not app_settings.chat_history.account_key:
+                credential = get_azure_credential(app)
+
+            app.conversation_store = await init_cosmosdb_client(credential)
+        if app.conversation_store:
+            from backend.study_service import StudyService
+            from backend.study_manager import StudyManager
+
+            app.study_service = StudyService(app.conversation_store.container_client)
+            app.study_manager = StudyManager(app.conversation_store.container_client)
+            await app.conversation_store.warm_up(app.startup_pipeline.measure)
+
+    async def warm_openai():
+        credential = None
+        if any(not deployment.key for deployment in app_settings.azure_openai.get_deployments()):
+            credential = get_azure_credential(app)
+            # Fetch the Entra ID token up front; the credential caches it for the token provider.
+            async with app.startup_pipeline.measure("openai.token"):
+                await credential.get_token(AZURE_OPENAI_TOKEN_SCOPE)
+
+        async with app.startup_pipeline.measure("openai.client"):
+            app.openai_pool = await init_openai_pool(app.rate_limiter, credential)
+            app.title_pool = get_title_pool(app.openai_pool)
+
     @app.before_serving
     async def init():
-        try:
-            app.cosmos_conversation_client = await init_cosmosdb_client()
-            app.study_service = None
-            app.study_manager = None
-            if app.cosmos_conversation_client:
-                 app.study_service = StudyService(app.cosmos_conversation_client.container_client)
-                 app.study_manager = StudyManager(app.cosmos_conversation_client.container_client)
-            cosmos_db_ready.set()
-        except Exception as e:
-            logging.exception("Failed to initialize CosmosDB client")
-            app.cosmos_conversation_client = None
-            raise e
-    
+        if app.profiler:
+            install_task_clock()
+        if app.loop_monitor:
+            app.loop_monitor.start()
+        if app_settings.tracing.enabled:
+            # per worker: the exporter's batching thread must start after the fork
+            init_tracing(app_settings.tracing)
+        # Precise token estimates are optional, so never hold up readiness for them
+        app.add_background_task(load_tokenizer)
+        app.startup_pipeline.add_step("history", warm_chat_history)
+        app.startup_pipeline.add_step("openai", warm_openai)
+        await app.startup_pipeline.run(timeout=app_settings.base_settings.startup_warmup_timeout)
+
+    @app.after_serving
+    async def shutdown():
+        if app.loop_monitor:
+            await app.loop_monitor.stop()
+        if app.openai_pool:
+            await app.openai_pool.close()
+        if app.conversation_store:
+            await app.conversation_store.close()
+        if app.azure_credential:
+            await app.azure_credential.close()
+        if app_settings.tracing.enabled:
+            shutdown_tracing()
+
+    if app_settings.timing.enabled or app.metrics or app_settings.tracing.enabled:
+        # Without these hooks no request is timed and every span is a no-op
+
+        @app.before_request
+        async def start_timing():
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            listeners = []
+            if app.metrics:
+                listeners.append(app.metrics.request(route))
+            if app_settings.tracing.enabled:
+                listeners.append(start_request_trace(request.method, route, request.headers))
+            timing.start(
+                route,
+                log_threshold_ms=app_settings.timing.log_threshold_ms if app_settings.timing.enabled else None,
+                listeners=listeners,
+            )
+
+        @app.after_request
+        async def finish_timing(response):
+            request_timing = timing.current()
+            if request_timing:
+                if app_settings.timing.enabled:
+                    # streamed responses only carry the stages before the first chunk here
+                    response.headers["Server-Timing"] = request_timing.server_timing()
+                if not request_timing.streaming:
+                    request_timing.finish(response.status_code)
+            return response
+
     return app
 
 
+def get_azure_credential(app):
+    # One credential per worker so its token cache is shared by OpenAI and CosmosDB.
+    # azure.identity is only imported when a key is missing and Entra ID auth is used.
+    if app.azure_credential is None:
+        from azure.identity.aio import DefaultAzureCredential
+
+        app.azure_credential = DefaultAzureCredential()
+    return app.azure_credential
+
+
+def admission_controlled(route):
+    """Admit the request through `current_app.admission` before running `route`.
+
+    The slot is held until the response is complete: for streamed responses that is
+    when the body generator finishes or is closed, otherwise when the route returns.
+    """
+
+    @functools.wraps(route)
+    async def wrapper(*args, **kwargs):
+        admission = current_app.admission
+        if admission is None:
+            return await route(*args, **kwargs)
+
+        try:
+            # Unauthenticated (development) requests all share the sample user, so they
+            # are only subject to the global limits.
+            async with timing.span("admission"):
+                ticket = await admission.acquire(request.headers.get("X-Ms-Client-Principal-Id"))
+        except AdmissionRejected as e:
+            response = await make_response(jsonify({"error": str(e)}), e.status_code)
+            response.headers["Retry-After"] = e.retry_after_header
+            return response
+
+        try:
+            response = await make_response(await route(*args, **kwargs))
+        except BaseException:
+            ticket.release()
+            raise
+
+        if isinstance(response.response, IterableBody):
+            response.response = IterableBody(release_after(response.response.iter, ticket))
+        else:
+            ticket.release()
+        return response
+
+    return wrapper
+
+
 @bp.route("/")
 async def index():
     return await render_template(
@@ -82,7 +273,7 @@ async def favicon():
 
 @bp.route("/assets/<path:path>")
 async def assets(path):
-    return await send_from_directory("static/assets", path)
+    return await current_app.static_assets.send(path)
 
 
 
@@ -113,6 +304,10 @@ frontend_settings = {
     },
     "sanitize_answer": app_settings.base_settings.sanitize_answer,
     "oyd_enabled": app_settings.base_settings.datasource_type,
+    "persist_answers": bool(
+        app_settings.chat_history and
+        app_settings.chat_history.persist_answers
+    ),
 }
 
 
@@ -123,10 +318,10 @@ MS_DEFENDER_ENABLED = os.environ.get("MS_DEFENDER_ENABLED", "true").lower() == "
 azure_openai_tools = []
 azure_openai_available_tools = []
 
-# Initialize Azure OpenAI Client
-async def init_openai_client():
-    azure_openai_client = None
-    
+AZURE_OPENAI_TOKEN_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Initialize the Azure OpenAI deployment pool
+async def init_openai_pool(rate_limiter, credential=None):
     try:
         # API version check
         if (
@@ -146,26 +341,8 @@ async def init_openai_client():
                 "AZURE_OPENAI_ENDPOINT or AZURE_OPENAI_RESOURCE is required"
             )
 
-        endpoint = (
-            app_settings.azure_openai.endpoint
-            if app_settings.azure_openai.endpoint
-            else f"https://{app_settings.azure_openai.resource}.openai.azure.com/"
-        )
-
-        # Authentication
-        aoai_api_key = app_settings.azure_openai.key
-        ad_token_provider = None
-        if not aoai_api_key:
-            logging.debug("No AZURE_OPENAI_KEY found, using Azure Entra ID auth")
-            async with DefaultAzureCredential() as credential:
-                ad_token_provider = get_bearer_token_provider(
-                    credential,
-                    "https://cognitiveservices.azure.com/.default"
-                )
-
         # Deployment
-        deployment = app_settings.azure_openai.model
-        if not deployment:
+        if not app_settings.azure_openai.model:
             raise ValueError("AZURE_OPENAI_MODEL is required")
 
         # Default Headers
@@ -178,33 +355,76 @@ async def init_openai_client():
                 response = await client.get(azure_functions_tools_url)
             response_status_code = response.status_code
             if response_status_code == httpx.codes.OK:
-                azure_openai_tools.extend(json.loads(response.text))
-                for tool in azure_openai_tools:
-                    azure_openai_available_tools.append(tool["function"]["name"])
+                azure_openai_tools[:] = json.loads(response.text)
+                azure_openai_available_tools[:] = [tool["function"]["name"] for tool in azure_openai_tools]
             else:
                 logging.error(f"An error occurred while getting OpenAI Function Call tools metadata: {response.status_code}")
 
-        
-        azure_openai_client = AsyncAzureOpenAI(
-            api_version=app_settings.azure_openai.preview_api_version,
-            api_key=aoai_api_key,
-            azure_ad_token_provider=ad_token_provider,
-            default_headers=default_headers,
-            azure_endpoint=endpoint,
-        )
+        # Authentication and one client per deployment
+        ad_token_provider = None
+        deployments = []
+        for deployment_settings in app_settings.azure_openai.get_deployments():
+            if not deployment_settings.key and not ad_token_provider:
+                logging.debug("No Azure OpenAI key found for a deployment, using Azure Entra ID auth")
+                from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
+
+                ad_token_provider = get_bearer_token_provider(
+                    credential or DefaultAzureCredential(),
+                    AZURE_OPENAI_TOKEN_SCOPE
+                )
 
-        return azure_openai_client
+            client = AsyncAzureOpenAI(
+                api_version=app_settings.azure_openai.preview_api_version,
+                api_key=deployment_settings.key,
+                azure_ad_token_provider=None if deployment_settings.key else ad_token_provider,
+                default_headers=default_headers,
+                azure_endpoint=deployment_settings.endpoint,
+                # Retries go through the rate limiter so they respect the deployment's quota
+                max_retries=0,
+            )
+            deployments.append(Deployment(
+                client,
+                endpoint=deployment_settings.endpoint,
+                model=deployment_settings.model,
+                weight=deployment_settings.weight,
+                tokens_per_minute=deployment_settings.tokens_per_minute,
+            ))
+
+        return DeploymentPool(
+            deployments,
+            rate_limiter,
+            failure_threshold=app_settings.azure_openai.circuit_breaker_failures,
+            cooldown=app_settings.azure_openai.circuit_breaker_cooldown,
+        )
     except Exception as e:
         logging.exception("Exception in Azure OpenAI initialization", e)
-        azure_openai_client = None
         raise e
 
+
+async def get_openai_pool():
+    # The pool is created once per worker during startup; create it lazily if that failed
+    if not current_app.openai_pool:
+        credential = None
+        if any(not deployment.key for deployment in app_settings.azure_openai.get_deployments()):
+            credential = get_azure_credential(current_app)
+        current_app.openai_pool = await init_openai_pool(current_app.rate_limiter, credential)
+    return current_app.openai_pool
+
+
+def get_title_pool(openai_pool):
+    # Titles go to AZURE_OPENAI_TITLE_MODEL on the same resources when it is configured
+    if app_settings.azure_openai.title_model:
+        return openai_pool.with_model(app_settings.azure_openai.title_model)
+    return openai_pool
+
+
+@timing.timed("tool_call")
 async def openai_remote_azure_function_call(function_name, function_args):
     if app_settings.azure_openai.function_call_azure_functions_enabled is not True:
         return
 
     azure_functions_tool_url = f"{app_settings.azure_openai.function_call_azure_functions_tool_base_url}?code={app_settings.azure_openai.function_call_azure_functions_tool_key}"
-    headers = {'content-type': 'application/json'}
+    headers = inject_trace_context({'content-type': 'application/json'})
     body = {
         "tool_name": function_name,
         "tool_arguments": json.loads(function_args)
@@ -215,20 +435,22 @@ async def openai_remote_azure_function_call(function_name, function_args):
 
     return response.text
 
-async def init_cosmosdb_client():
+async def init_cosmosdb_client(credential=None):
     cosmos_conversation_client = None
     if app_settings.chat_history:
+        from backend.history.cosmosdbservice import CosmosConversationClient
+
         try:
             cosmos_endpoint = (
                 f"https://{app_settings.chat_history.account}.documents.azure.com:443/"
             )
 
-            if not app_settings.chat_history.account_key:
-                async with DefaultAzureCredential() as cred:
-                    credential = cred
-                    
-            else:
+            if app_settings.chat_history.account_key:
                 credential = app_settings.chat_history.account_key
+            elif not credential:
+                from azure.identity.aio import DefaultAzureCredential
+
+                credential = DefaultAzureCredential()
 
             cosmos_conversation_client = CosmosConversationClient(
                 cosmosdb_endpoint=cosmos_endpoint,
@@ -247,42 +469,41 @@ async def init_cosmosdb_client():
     return cosmos_conversation_client
 
 
-def prepare_model_args(request_body, request_headers):
-    request_messages = request_body.get("messages", [])
-    messages = []
-    if not app_settings.datasource:
-        messages = [
-            {
-                "role": "system",
-                "content": app_settings.azure_openai.system_message
-            }
-        ]
-
-    for message in request_messages:
-        if message:
-            match message["role"]:
-                case "user":
-                    messages.append(
-                        {
-                            "role": message["role"],
-                            "content": message["content"]
-                        }
-                    )
-                case "assistant" | "function" | "tool":
-                    messages_helper = {}
-                    messages_helper["role"] = message["role"]
-                    if "name" in message:
-                        messages_helper["name"] = message["name"]
-                    if "function_call" in message:
-                        messages_helper["function_call"] = message["function_call"]
-                    messages_helper["content"] = message["content"]
-                    if "context" in message:
-                        context_obj = json.loads(message["context"])
-                        messages_helper["context"] = context_obj
-                    
-                    messages.append(messages_helper)
+def init_memory_store():
+    from backend.history.cosmosdbservice import CosmosConversationClient
+    from backend.history.memory_container import InMemoryCosmosClient
+
+    return CosmosConversationClient(
+        cosmosdb_endpoint="memory",
+        credential=None,
+        database_name=app_settings.chat_history.database or "memory",
+        container_name=app_settings.chat_history.conversations_container or "conversations",
+        enable_message_feedback=app_settings.chat_history.enable_feedback,
+        cosmosdb_client=InMemoryCosmosClient(
+            latency=app_settings.chat_history.memory_latency,
+            throttle_rate=app_settings.chat_history.memory_throttle_rate,
+        ),
+    )
+
+
+def init_sqlite_store():
+    from backend.history.sqlite_store import SqliteConversationStore
+
+    return SqliteConversationStore(
+        path=app_settings.chat_history.sqlite_path,
+        enable_message_feedback=app_settings.chat_history.enable_feedback,
+    )
 
 
+def prepare_model_args(request_body, request_headers):
+    messages = to_openai_messages(
+        request_body.get("messages", []),
+        system_message=None if app_settings.datasource else app_settings.azure_openai.system_message,
+        context_cache=current_app.context_cache,
+        prior_context=app_settings.azure_openai.prior_context,
+        prior_context_turns=app_settings.azure_openai.prior_context_turns,
+    )
+
     user_json = None
     if (MS_DEFENDER_ENABLED):
         authenticated_user_details = get_authenticated_user_details(request_headers)
@@ -315,51 +536,57 @@ def prepare_model_args(request_body, request_headers):
                     ]
                 }
 
-    model_args_clean = copy.deepcopy(model_args)
-    if model_args_clean.get("extra_body"):
-        secret_params = [
-            "key",
-            "connection_string",
-            "embedding_key",
-            "encoded_api_key",
-            "api_key",
-        ]
-        for secret_param in secret_params:
-            if model_args_clean["extra_body"]["data_sources"][0]["parameters"].get(
-                secret_param
-            ):
-                model_args_clean["extra_body"]["data_sources"][0]["parameters"][
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        model_args_clean = dict(model_args)
+        if model_args_clean.get("extra_body"):
+            # only the data source parameters are redacted; the messages, which carry every
+            # earlier answer, are shared rather than copied
+            model_args_clean["extra_body"] = copy.deepcopy(model_args_clean["extra_body"])
+        if model_args_clean.get("extra_body"):
+            secret_params = [
+                "key",
+                "connection_string",
+                "embedding_key",
+                "encoded_api_key",
+                "api_key",
+            ]
+            for secret_param in secret_params:
+                if model_args_clean["extra_body"]["data_sources"][0]["parameters"].get(
                     secret_param
-                ] = "*****"
-        authentication = model_args_clean["extra_body"]["data_sources"][0][
-            "parameters"
-        ].get("authentication", {})
-        for field in authentication:
-            if field in secret_params:
-                model_args_clean["extra_body"]["data_sources"][0]["parameters"][
-                    "authentication"
-                ][field] = "*****"
-        embeddingDependency = model_args_clean["extra_body"]["data_sources"][0][
-            "parameters"
-        ].get("embedding_dependency", {})
-        if "authentication" in embeddingDependency:
-            for field in embeddingDependency["authentication"]:
+                ):
+                    model_args_clean["extra_body"]["data_sources"][0]["parameters"][
+                        secret_param
+                    ] = "*****"
+            authentication = model_args_clean["extra_body"]["data_sources"][0][
+                "parameters"
+            ].get("authentication", {})
+            for field in authentication:
                 if field in secret_params:
                     model_args_clean["extra_body"]["data_sources"][0]["parameters"][
-                        "embedding_dependency"
-                    ]["authentication"][field] = "*****"
-
-    logging.debug(f"REQUEST BODY: {json.dumps(model_args_clean, indent=4)}")
+                        "authentication"
+                    ][field] = "*****"
+            embeddingDependency = model_args_clean["extra_body"]["data_sources"][0][
+                "parameters"
+            ].get("embedding_dependency", {})
+            if "authentication" in embeddingDependency:
+                for field in embeddingDependency["authentication"]:
+                    if field in secret_params:
+                        model_args_clean["extra_body"]["data_sources"][0]["parameters"][
+                            "embedding_dependency"
+                        ]["authentication"][field] = "*****"
+
+        logging.debug(f"REQUEST BODY: {json.dumps(model_args_clean, indent=4)}")
 
     return model_args
 
 
+@timing.timed("promptflow")
 async def promptflow_request(request):
     try:
-        headers = {
+        headers = inject_trace_context({
             "Content-Type": "application/json",
             "Authorization": f"Bearer {app_settings.promptflow.api_key}",
-        }
+        })
         # Adding timeout for scenarios where response takes longer to come back
         logging.debug(f"Setting timeout to {app_settings.promptflow.response_timeout}")
         async with httpx.AsyncClient(
@@ -424,20 +651,22 @@ async def process_function_call(response):
     
     return None
 
-async def send_chat_request(request_body, request_headers):
-    filtered_messages = []
-    messages = request_body.get("messages", [])
-    for message in messages:
-        if message.get("role") != 'tool':
-            filtered_messages.append(message)
-            
-    request_body['messages'] = filtered_messages
+async def send_chat_request(request_body, request_headers, avoid_deployments=None):
     model_args = prepare_model_args(request_body, request_headers)
 
     try:
-        azure_openai_client = await init_openai_client()
-        raw_response = await azure_openai_client.chat.completions.with_raw_response.create(**model_args)
+        openai_pool = await get_openai_pool()
+        async with timing.span("openai"):
+            raw_response, deployment = await openai_pool.call(
+                estimate_request_tokens(model_args["messages"], model_args.get("max_tokens")),
+                lambda deployment: deployment.client.chat.completions.with_raw_response.create(
+                    **{**model_args, "model": deployment.model}
+                ),
+                avoid=avoid_deployments,
+            )
         response = raw_response.parse()
+        if model_args.get("stream"):
+            response = openai_pool.track_stream(response, deployment)
         apim_request_id = raw_response.headers.get("apim-request-id") 
     except Exception as e:
         logging.exception("Exception in send_chat_request")
@@ -538,46 +767,70 @@ async def process_function_call_stream(completionChunk, function_call_stream_sta
 
 
 async def stream_chat_request(request_body, request_headers):
-    response, apim_request_id = await send_chat_request(request_body, request_headers)
+    if current_app.hedger:
+        response, apim_request_id = await current_app.hedger.first_chunk(
+            lambda avoid: send_chat_request(request_body, request_headers, avoid_deployments=avoid)
+        )
+    else:
+        response, apim_request_id = await send_chat_request(request_body, request_headers)
     history_metadata = request_body.get("history_metadata", {})
     
     async def generate(apim_request_id, history_metadata):
-        if app_settings.azure_openai.function_call_azure_functions_enabled:
-            # Maintain state during function call streaming
-            function_call_stream_state = AzureOpenaiFunctionCallStreamState()
-            
-            async for completionChunk in response:
-                stream_state = await process_function_call_stream(completionChunk, function_call_stream_state, request_body, request_headers, history_metadata, apim_request_id)
+        function_response = None
+        try:
+            if app_settings.azure_openai.function_call_azure_functions_enabled:
+                # Maintain state during function call streaming
+                function_call_stream_state = AzureOpenaiFunctionCallStreamState()
                 
-                # No function call, asistant response
-                if stream_state == "INITIAL":
+                async for completionChunk in response:
+                    stream_state = await process_function_call_stream(completionChunk, function_call_stream_state, request_body, request_headers, history_metadata, apim_request_id)
+                    
+                    # No function call, asistant response
+                    if stream_state == "INITIAL":
+                        yield format_stream_response(completionChunk, history_metadata, apim_request_id)
+
+                    # Function call stream completed, functions were executed.
+                    # Append function calls and results to history and send to OpenAI, to stream the final answer.
+                    if stream_state == "COMPLETED":
+                        request_body["messages"].extend(function_call_stream_state.function_messages)
+                        function_response, apim_request_id = await send_chat_request(request_body, request_headers)
+                        async for functionCompletionChunk in function_response:
+                            yield format_stream_response(functionCompletionChunk, history_metadata, apim_request_id)
+                    
+            else:
+                async for completionChunk in response:
                     yield format_stream_response(completionChunk, history_metadata, apim_request_id)
-
-                # Function call stream completed, functions were executed.
-                # Append function calls and results to history and send to OpenAI, to stream the final answer.
-                if stream_state == "COMPLETED":
-                    request_body["messages"].extend(function_call_stream_state.function_messages)
-                    function_response, apim_request_id = await send_chat_request(request_body, request_headers)
-                    async for functionCompletionChunk in function_response:
-                        yield format_stream_response(functionCompletionChunk, history_metadata, apim_request_id)
-                
-        else:
-            async for completionChunk in response:
-                yield format_stream_response(completionChunk, history_metadata, apim_request_id)
+        finally:
+            # Runs when the client disconnects too: stop reading the upstream streams and
+            # release their connections instead of consuming the rest of the answer.
+            await close_stream(response)
+            if function_response is not None:
+                await close_stream(function_response)
 
     return generate(apim_request_id=apim_request_id, history_metadata=history_metadata)
 
 
-async def conversation_internal(request_body, request_headers):
+async def conversation_internal(request_body, request_headers, recorder=None):
     try:
         if app_settings.azure_openai.stream and not app_settings.base_settings.use_promptflow:
             result = await stream_chat_request(request_body, request_headers)
+            if recorder:
+                result = recorder.record(result)
+            request_timing = timing.current()
+            if request_timing:
+                result = request_timing.stream(
+                    result, frame=app_settings.timing.enabled and request_headers.get(timing.TIMING_FRAME_HEADER) == "1"
+                )
+            result = in_app_context(current_app._get_current_object(), current_app.streams.track(result))
             response = await make_response(format_as_ndjson(result))
             response.timeout = None
             response.mimetype = "application/json-lines"
             return response
         else:
             result = await complete_chat_request(request_body, request_headers)
+            if recorder:
+                recorder.observe(result)
+                recorder.complete()
             return jsonify(result)
 
     except Exception as ex:
@@ -589,6 +842,7 @@ async def conversation_internal(request_body, request_headers):
 
 
 @bp.route("/conversation", methods=["POST"])
+@admission_controlled
 async def conversation():
     if not request.is_json:
         return jsonify({"error": "request must be json"}), 415
@@ -597,19 +851,77 @@ async def conversation():
     return await conversation_internal(request_json, request.headers)
 
 
+@bp.route("/metrics", methods=["GET"])
+async def prometheus_metrics():
+    if not current_app.metrics:
+        return jsonify({"error": "Metrics are not enabled"}), 404
+    token = app_settings.metrics.token
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    body, content_type = current_app.metrics.render()
+    return body, 200, {"Content-Type": content_type}
+
+
+@bp.route("/healthz/ready", methods=["GET"])
+async def readiness():
+    status = current_app.startup_pipeline.status()
+    if current_app.admission:
+        status["admission"] = current_app.admission.snapshot()
+    if current_app.openai_pool:
+        status["deployments"] = current_app.openai_pool.snapshot()
+    if current_app.hedger:
+        status["hedging"] = current_app.hedger.snapshot()
+    status["streams"] = current_app.streams.snapshot()
+    if current_app.loop_monitor:
+        status["event_loop"] = current_app.loop_monitor.snapshot()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+def strong_etag(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def json_response(body: bytes):
+    return current_app.response_class(body, mimetype="application/json")
+
+
+async def history_written(app, user_id):
+    """Bump the user's history version once a request's writes are done."""
+    version = await app.conversation_store.bump_history_version(user_id)
+    app.history_cache.written(user_id, version)
+
+
+def not_modified(etag):
+    """A 304 response when the request's If-None-Match holds `etag`, else None."""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
+    return None
+
+
 @bp.route("/frontend_settings", methods=["GET"])
-def get_frontend_settings():
-    try:
-        return jsonify(frontend_settings), 200
-    except Exception as e:
-        logging.exception("Exception in /frontend_settings")
-        return jsonify({"error": str(e)}), 500
+async def get_frontend_settings():
+    etag = current_app.frontend_settings_etag
+    response = not_modified(etag)
+    if response is None:
+        response = json_response(current_app.frontend_settings_body)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+    return response
 
 
 ## Conversation History API ##
 @bp.route("/history/generate", methods=["POST"])
+@admission_controlled
 async def add_conversation():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
@@ -619,53 +931,82 @@ async def add_conversation():
 
     try:
         # make sure cosmos is configured
-        if not current_app.cosmos_conversation_client:
+        if not current_app.conversation_store:
             raise Exception("CosmosDB is not configured or not working")
 
         # check for the conversation_id, if the conversation is not set, we will create a new one
         history_metadata = {}
-        if not conversation_id:
-            title = await generate_title(request_json["messages"])
-            conversation_dict = await current_app.cosmos_conversation_client.create_conversation(
-                user_id=user_id, title=title
-            )
-            conversation_id = conversation_dict["id"]
-            history_metadata["title"] = title
-            history_metadata["date"] = conversation_dict["createdAt"]
-
-        ## Format the incoming message object in the "chat/completions" messages format
-        ## then write it to the conversation history in cosmos
-        messages = request_json["messages"]
-        if len(messages) > 0 and messages[-1]["role"] == "user":
-            createdMessageValue = await current_app.cosmos_conversation_client.create_message(
-                uuid=str(uuid.uuid4()),
-                conversation_id=conversation_id,
-                user_id=user_id,
-                input_message=messages[-1],
-            )
-            if createdMessageValue == "Conversation not found":
-                raise Exception(
-                    "Conversation not found for the given conversation ID: "
-                    + conversation_id
-                    + "."
+        try:
+            if not conversation_id:
+                title = await generate_title(request_json["messages"])
+                conversation_dict = await current_app.conversation_store.create_conversation(
+                    user_id=user_id, title=title
                 )
-        else:
-            raise Exception("No user message found")
+                conversation_id = conversation_dict["id"]
+                history_metadata["title"] = title
+                history_metadata["date"] = conversation_dict["createdAt"]
+
+            ## Format the incoming message object in the "chat/completions" messages format
+            ## then write it to the conversation history in cosmos
+            messages = request_json["messages"]
+            if len(messages) > 0 and messages[-1]["role"] == "user":
+                createdMessageValue = await current_app.conversation_store.create_message(
+                    uuid=str(uuid.uuid4()),
+                    conversation_id=conversation_id,
+                    user_id=user_id,
+                    input_message=messages[-1],
+                )
+                if createdMessageValue == "Conversation not found":
+                    raise Exception(
+                        "Conversation not found for the given conversation ID: "
+                        + conversation_id
+                        + "."
+                    )
+            else:
+                raise Exception("No user message found")
+        finally:
+            await history_written(current_app, user_id)
 
         # Submit request to Chat Completions for response
         request_body = await request.get_json()
         history_metadata["conversation_id"] = conversation_id
         request_body["history_metadata"] = history_metadata
-        return await conversation_internal(request_body, request.headers)
+
+        recorder = None
+        if app_settings.chat_history.persist_answers:
+            # Write the answer once it is complete instead of waiting for /history/update
+            app = current_app._get_current_object()
+            recorder = AnswerRecorder(
+                lambda answer_messages: app.add_background_task(
+                    persist_answer, app, user_id, conversation_id, answer_messages
+                )
+            )
+        return await conversation_internal(request_body, request.headers, recorder)
 
     except Exception as e:
         logging.exception("Exception in /history/generate")
         return jsonify({"error": str(e)}), 500
 
 
+async def persist_answer(app, user_id, conversation_id, messages):
+    try:
+        try:
+            for message in messages:
+                await app.conversation_store.create_message(
+                    uuid=message["id"],
+                    conversation_id=conversation_id,
+                    user_id=user_id,
+                    input_message=message,
+                )
+        finally:
+            await history_written(app, user_id)
+    except Exception:
+        logging.exception("Exception while persisting the answer of conversation %s", conversation_id)
+
+
 @bp.route("/history/update", methods=["POST"])
 async def update_conversation():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
@@ -675,7 +1016,7 @@ async def update_conversation():
 
     try:
         # make sure cosmos is configured
-        if not current_app.cosmos_conversation_client:
+        if not current_app.conversation_store:
             raise Exception("CosmosDB is not configured or not working")
 
         # check for the conversation_id, if the conversation is not set, we will create a new one
@@ -686,21 +1027,24 @@ async def update_conversation():
         ## then write it to the conversation history in cosmos
         messages = request_json["messages"]
         if len(messages) > 0 and messages[-1]["role"] == "assistant":
-            if len(messages) > 1 and messages[-2].get("role", None) == "tool":
-                # write the tool message first
-                await current_app.cosmos_conversation_client.create_message(
-                    uuid=str(uuid.uuid4()),
+            try:
+                if len(messages) > 1 and messages[-2].get("role", None) == "tool":
+                    # write the tool message first
+                    await current_app.conversation_store.create_message(
+                        uuid=str(uuid.uuid4()),
+                        conversation_id=conversation_id,
+                        user_id=user_id,
+                        input_message=messages[-2],
+                    )
+                # write the assistant message
+                await current_app.conversation_store.create_message(
+                    uuid=messages[-1]["id"],
                     conversation_id=conversation_id,
                     user_id=user_id,
-                    input_message=messages[-2],
+                    input_message=messages[-1],
                 )
-            # write the assistant message
-            await current_app.cosmos_conversation_client.create_message(
-                uuid=messages[-1]["id"],
-                conversation_id=conversation_id,
-                user_id=user_id,
-                input_message=messages[-1],
-            )
+            finally:
+                await history_written(current_app, user_id)
         else:
             raise Exception("No bot messages found")
 
@@ -715,7 +1059,7 @@ async def update_conversation():
 
 @bp.route("/history/message_feedback", methods=["POST"])
 async def update_message():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
@@ -731,9 +1075,12 @@ async def update_message():
             return jsonify({"error": "message_feedback is required"}), 400
 
         ## update the message in cosmos
-        updated_message = await current_app.cosmos_conversation_client.update_message_feedback(
-            user_id, message_id, message_feedback
-        )
+        try:
+            updated_message = await current_app.conversation_store.update_message_feedback(
+                user_id, message_id, message_feedback
+            )
+        finally:
+            await history_written(current_app, user_id)
         if updated_message:
             return (
                 jsonify(
@@ -761,7 +1108,7 @@ async def update_message():
 
 @bp.route("/history/delete", methods=["DELETE"])
 async def delete_conversation():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     ## get the user id from the request headers
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
@@ -775,18 +1122,21 @@ async def delete_conversation():
             return jsonify({"error": "conversation_id is required"}), 400
 
         ## make sure cosmos is configured
-        if not current_app.cosmos_conversation_client:
+        if not current_app.conversation_store:
             raise Exception("CosmosDB is not configured or not working")
 
-        ## delete the conversation messages from cosmos first
-        deleted_messages = await current_app.cosmos_conversation_client.delete_messages(
-            conversation_id, user_id
-        )
+        try:
+            ## delete the conversation messages from cosmos first
+            deleted_messages = await current_app.conversation_store.delete_messages(
+                conversation_id, user_id
+            )
 
-        ## Now delete the conversation
-        deleted_conversation = await current_app.cosmos_conversation_client.delete_conversation(
-            user_id, conversation_id
-        )
+            ## Now delete the conversation
+            deleted_conversation = await current_app.conversation_store.delete_conversation(
+                user_id, conversation_id
+            )
+        finally:
+            await history_written(current_app, user_id)
 
         return (
             jsonify(
@@ -804,30 +1154,51 @@ async def delete_conversation():
 
 @bp.route("/history/list", methods=["GET"])
 async def list_conversations():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     offset = request.args.get("offset", 0)
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
     ## make sure cosmos is configured
-    if not current_app.cosmos_conversation_client:
+    if not current_app.conversation_store:
         raise Exception("CosmosDB is not configured or not working")
 
-    ## get the conversations from cosmos
-    conversations = await current_app.cosmos_conversation_client.get_conversations(
-        user_id, offset=offset, limit=25
-    )
-    if not isinstance(conversations, list):
-        return jsonify({"error": f"No conversations for {user_id} were found"}), 404
+    ## answer from the browser's copy when nothing was written since it was fetched;
+    ## the version is read first, so the list below is never older than its ETag
+    version = await current_app.history_cache.version(current_app.conversation_store, user_id)
+    etag = strong_etag(user_id, version, offset) if version is not None else None
+    if etag:
+        response = not_modified(etag)
+        if response is not None:
+            response.cache_control.private = True
+            return response
+
+    ## then from this worker's copy, and only then from cosmos
+    cache_key = (user_id, "list", str(offset))
+    body = current_app.history_cache.get(cache_key, version)
+    if body is None:
+        conversations = await current_app.conversation_store.get_conversations(
+            user_id, offset=offset, limit=25
+        )
+        if not isinstance(conversations, list):
+            return jsonify({"error": f"No conversations for {user_id} were found"}), 404
+
+        body = dumps_bytes(conversations)
+        current_app.history_cache.put(cache_key, version, body)
 
     ## return the conversation ids
 
-    return jsonify(conversations), 200
+    response = json_response(body)
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response, 200
 
 
 @bp.route("/history/read", methods=["POST"])
 async def get_conversation():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
@@ -839,11 +1210,18 @@ async def get_conversation():
         return jsonify({"error": "conversation_id is required"}), 400
 
     ## make sure cosmos is configured
-    if not current_app.cosmos_conversation_client:
+    if not current_app.conversation_store:
         raise Exception("CosmosDB is not configured or not working")
 
+    ## answer from this worker's copy when nothing was written since it was read
+    version = await current_app.history_cache.version(current_app.conversation_store, user_id)
+    cache_key = (user_id, "read", conversation_id)
+    body = current_app.history_cache.get(cache_key, version)
+    if body is not None:
+        return json_response(body), 200
+
     ## get the conversation object and the related messages from cosmos
-    conversation = await current_app.cosmos_conversation_client.get_conversation(
+    conversation = await current_app.conversation_store.get_conversation(
         user_id, conversation_id
     )
     ## return the conversation id and the messages in the bot frontend format
@@ -858,28 +1236,21 @@ async def get_conversation():
         )
 
     # get the messages for the conversation from cosmos
-    conversation_messages = await current_app.cosmos_conversation_client.get_messages(
+    conversation_messages = await current_app.conversation_store.get_messages(
         user_id, conversation_id
     )
 
     ## format the messages in the bot frontend format
-    messages = [
-        {
-            "id": msg["id"],
-            "role": msg["role"],
-            "content": msg["content"],
-            "createdAt": msg["createdAt"],
-            "feedback": msg.get("feedback"),
-        }
-        for msg in conversation_messages
-    ]
+    messages = [to_frontend_message(msg) for msg in conversation_messages]
 
-    return jsonify({"conversation_id": conversation_id, "messages": messages}), 200
+    body = dumps_bytes({"conversation_id": conversation_id, "messages": messages})
+    current_app.history_cache.put(cache_key, version, body)
+    return json_response(body), 200
 
 
 @bp.route("/history/rename", methods=["POST"])
 async def rename_conversation():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
 
@@ -891,11 +1262,11 @@ async def rename_conversation():
         return jsonify({"error": "conversation_id is required"}), 400
 
     ## make sure cosmos is configured
-    if not current_app.cosmos_conversation_client:
+    if not current_app.conversation_store:
         raise Exception("CosmosDB is not configured or not working")
 
     ## get the conversation from cosmos
-    conversation = await current_app.cosmos_conversation_client.get_conversation(
+    conversation = await current_app.conversation_store.get_conversation(
         user_id, conversation_id
     )
     if not conversation:
@@ -913,16 +1284,19 @@ async def rename_conversation():
     if not title:
         return jsonify({"error": "title is required"}), 400
     conversation["title"] = title
-    updated_conversation = await current_app.cosmos_conversation_client.upsert_conversation(
-        conversation
-    )
+    try:
+        updated_conversation = await current_app.conversation_store.upsert_conversation(
+            conversation
+        )
+    finally:
+        await history_written(current_app, user_id)
 
     return jsonify(updated_conversation), 200
 
 
 @bp.route("/history/delete_all", methods=["DELETE"])
 async def delete_all_conversations():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     ## get the user id from the request headers
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
@@ -930,26 +1304,29 @@ async def delete_all_conversations():
     # get conversations for user
     try:
         ## make sure cosmos is configured
-        if not current_app.cosmos_conversation_client:
+        if not current_app.conversation_store:
             raise Exception("CosmosDB is not configured or not working")
 
-        conversations = await current_app.cosmos_conversation_client.get_conversations(
+        conversations = await current_app.conversation_store.get_conversations(
             user_id, offset=0, limit=None
         )
         if not conversations:
             return jsonify({"error": f"No conversations for {user_id} were found"}), 404
 
         # delete each conversation
-        for conversation in conversations:
-            ## delete the conversation messages from cosmos first
-            deleted_messages = await current_app.cosmos_conversation_client.delete_messages(
-                conversation["id"], user_id
-            )
+        try:
+            for conversation in conversations:
+                ## delete the conversation messages from cosmos first
+                deleted_messages = await current_app.conversation_store.delete_messages(
+                    conversation["id"], user_id
+                )
 
-            ## Now delete the conversation
-            deleted_conversation = await current_app.cosmos_conversation_client.delete_conversation(
-                user_id, conversation["id"]
-            )
+                ## Now delete the conversation
+                deleted_conversation = await current_app.conversation_store.delete_conversation(
+                    user_id, conversation["id"]
+                )
+        finally:
+            await history_written(current_app, user_id)
         return (
             jsonify(
                 {
@@ -966,7 +1343,7 @@ async def delete_all_conversations():
 
 @bp.route("/history/clear", methods=["POST"])
 async def clear_messages():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     ## get the user id from the request headers
     authenticated_user = get_authenticated_user_details(request_headers=request.headers)
     user_id = authenticated_user["user_principal_id"]
@@ -980,13 +1357,16 @@ async def clear_messages():
             return jsonify({"error": "conversation_id is required"}), 400
 
         ## make sure cosmos is configured
-        if not current_app.cosmos_conversation_client:
+        if not current_app.conversation_store:
             raise Exception("CosmosDB is not configured or not working")
 
         ## delete the conversation messages from cosmos
-        deleted_messages = await current_app.cosmos_conversation_client.delete_messages(
-            conversation_id, user_id
-        )
+        try:
+            deleted_messages = await current_app.conversation_store.delete_messages(
+                conversation_id, user_id
+            )
+        finally:
+            await history_written(current_app, user_id)
 
         return (
             jsonify(
@@ -1004,13 +1384,13 @@ async def clear_messages():
 
 @bp.route("/history/ensure", methods=["GET"])
 async def ensure_cosmos():
-    await cosmos_db_ready.wait()
+    await current_app.startup_pipeline.wait()
     if not app_settings.chat_history:
         return jsonify({"error": "CosmosDB is not configured"}), 404
 
     try:
-        success, err = await current_app.cosmos_conversation_client.ensure()
-        if not current_app.cosmos_conversation_client or not success:
+        success, err = await current_app.conversation_store.ensure()
+        if not current_app.conversation_store or not success:
             if err:
                 return jsonify({"error": err}), 422
             return jsonify({"error": "CosmosDB is not configured or not working"}), 500
@@ -1216,27 +1596,142 @@ async def study_debug_set():
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route("/api/study/admin/bulk", methods=["POST"])
+async def study_admin_bulk():
+    if not hasattr(current_app, "study_manager") or not current_app.study_manager:
+        return jsonify({"error": "Study manager not initialized"}), 503
+
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    if not app_settings.admin.is_admin(authenticated_user.get("user_principal_id")):
+        return jsonify({"error": "Admin access required"}), 403
+
+    from backend.study_admin import StudyAdminOperation, StudyCohortAdmin
+
+    data = await request.get_json() or {}
+    user_ids = data.get("user_ids") or []
+    if not isinstance(user_ids, list) or not user_ids:
+        return jsonify({"error": "user_ids is required"}), 400
+    if not all(isinstance(user_id, str) and user_id for user_id in user_ids):
+        return jsonify({"error": "user_ids must be non-empty strings"}), 400
+
+    operations = data.get("operations") or []
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations is required"}), 400
+    try:
+        operations = [StudyAdminOperation.from_dict(op) for op in operations]
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # callers may ask for less concurrency than the configured maximum, never more
+    max_concurrency = app_settings.admin.study_bulk_concurrency
+    concurrency = data.get("concurrency")
+    if concurrency is None:
+        concurrency = max_concurrency
+    elif isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return jsonify({"error": "concurrency must be a positive integer"}), 400
+
+    def log_progress(done, total):
+        if done == total or done % 50 == 0:
+            logging.info("Bulk study update progress: %d/%d users", done, total)
+
+    try:
+        cohort_admin = StudyCohortAdmin(
+            current_app.study_manager,
+            max_concurrency=min(concurrency, max_concurrency),
+        )
+        report = await cohort_admin.apply(user_ids, operations, on_progress=log_progress)
+        return jsonify(report.to_dict()), 200
+    except Exception as e:
+        logging.exception("Error in /api/study/admin/bulk")
+        return jsonify({"error": str(e)}), 500
+
+
+def admin_diagnostics_error():
+    if not current_app.profiler:
+        return jsonify({"error": "Diagnostics are not enabled"}), 404
+
+    authenticated_user = get_authenticated_user_details(request_headers=request.headers)
+    if not app_settings.admin.is_admin(authenticated_user.get("user_principal_id")):
+        return jsonify({"error": "Admin access required"}), 403
+
+    return None
+
+
+@bp.route("/admin/profile", methods=["POST"])
+async def admin_profile():
+    error = admin_diagnostics_error()
+    if error:
+        return error
+
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        interval = float(request.args.get("interval", 0.001))
+        if seconds <= 0 or interval <= 0:
+            raise ValueError("seconds and interval must be positive")
+        profile, content_type = await current_app.profiler.profile(
+            seconds, interval=interval, fmt=request.args.get("format", "speedscope")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+
+    return profile, 200, {"Content-Type": content_type, "X-Worker-Pid": str(os.getpid())}
+
+
+@bp.route("/admin/tasks", methods=["GET"])
+async def admin_tasks():
+    error = admin_diagnostics_error()
+    if error:
+        return error
+
+    try:
+        min_age = float(request.args.get("min_age", 0))
+    except ValueError:
+        return jsonify({"error": "min_age must be a number"}), 400
+
+    tasks = dump_tasks(min_age=min_age)
+    return jsonify({"pid": os.getpid(), "count": len(tasks), "tasks": tasks}), 200
+
+
+@timing.timed("title")
 async def generate_title(conversation_messages) -> str:
     ## make sure the messages are sorted by _ts descending
-    title_prompt = "Summarize the conversation so far into a 4-word or less title. Do not use any quotation marks or punctuation. Do not include any other commentary or description."
-
     messages = [
         {"role": msg["role"], "content": msg["content"]}
         for msg in conversation_messages
     ]
-    messages.append({"role": "user", "content": title_prompt})
+    cache_key = current_app.title_cache.key(messages)
+    title = current_app.title_cache.get(cache_key)
+    record_cache_lookup("title", title is not None)
+    if title:
+        return title
+
+    messages.append(TITLE_PROMPT)
 
     try:
-        azure_openai_client = await init_openai_client()
-        response = await azure_openai_client.chat.completions.create(
-            model=app_settings.azure_openai.model, messages=messages, temperature=1, max_tokens=64
+        if not current_app.title_pool:
+            current_app.title_pool = get_title_pool(await get_openai_pool())
+        raw_response, _ = await asyncio.wait_for(
+            current_app.title_pool.call(
+                estimate_request_tokens(messages, 64),
+                lambda deployment: deployment.client.chat.completions.with_raw_response.create(
+                    model=deployment.model, messages=messages, temperature=1, max_tokens=64
+                ),
+            ),
+            timeout=app_settings.azure_openai.title_timeout,
         )
+        response = raw_response.parse()
 
         title = response.choices[0].message.content
+        current_app.title_cache.put(cache_key, title)
         return title
+    except asyncio.TimeoutError:
+        logging.warning("Title generation exceeded %ss, using a local title", app_settings.azure_openai.title_timeout)
+        return fallback_title(conversation_messages)
     except Exception as e:
         logging.exception("Exception while generating title", e)
-        return messages[-2]["content"]
+        return fallback_title(conversation_messages)
 
 
 app = create_app()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import math
+import weakref
+from collections import defaultdict
+from typing import AsyncGenerator, Dict, Optional
+
+from backend.metrics import record_admission, record_admission_rejected
+from backend.utils import close_stream
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, status_code: int, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionTicket:
+    """A granted slot; `release` is idempotent so it is safe to call from several paths."""
+
+    def __init__(self, controller: "AdmissionController", user_id: Optional[str]):
+        self._controller = controller
+        self._user_id = user_id
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self._user_id)
+
+
+class AdmissionController:
+    """Per-worker admission control for requests that call the LLM upstream.
+
+    Notes:
+    - At most `max_concurrent` requests hold an upstream slot; others wait in a bounded
+      queue for up to `queue_timeout` seconds.
+    - A full queue or an expired wait is rejected with 503 straight away, so overload
+      turns into fast retries instead of slow upstream 429s for everyone.
+    - `max_per_user` caps in-flight plus queued requests per user (429 when exceeded).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: float,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._per_user: Dict[str, int] = defaultdict(int)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+    async def acquire(self, user_id: Optional[str] = None) -> AdmissionTicket:
+        if user_id and self.max_per_user and self._per_user[user_id] >= self.max_per_user:
+            self._reject("per_user")
+            raise AdmissionRejected("Too many concurrent requests for this user", 429, self.retry_after)
+
+        if user_id:
+            self._per_user[user_id] += 1
+
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so concurrent arrivals cannot
+            # all see the semaphore as unlocked.
+            await self._semaphore.acquire()
+            return self._admit(user_id)
+
+        if self.queued >= self.max_queue:
+            self._decrement_user(user_id)
+            self._reject("queue_full")
+            raise AdmissionRejected("Server is busy, please retry shortly", 503, self.retry_after)
+
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        record_admission(self.in_flight, self.queued)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._decrement_user(user_id)
+            self._reject("timeout")
+            raise AdmissionRejected("Server is busy, please retry shortly", 503, self.retry_after)
+        except BaseException:
+            self._decrement_user(user_id)
+            raise
+        finally:
+            self.queued -= 1
+            record_admission(self.in_flight, self.queued)
+        return self._admit(user_id)
+
+    def _admit(self, user_id: Optional[str]) -> AdmissionTicket:
+        self.in_flight += 1
+        self.admitted_total += 1
+        record_admission(self.in_flight, self.queued)
+        return AdmissionTicket(self, user_id)
+
+    def _reject(self, reason: str):
+        self.rejected_total += 1
+        record_admission_rejected(reason)
+        logging.warning(
+            "Admission rejected (in flight %d/%d, queued %d/%d)",
+            self.in_flight, self.max_concurrent, self.queued, self.max_queue,
+        )
+
+    def _decrement_user(self, user_id: Optional[str]):
+        if not user_id:
+            return
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] <= 0:
+            del self._per_user[user_id]
+
+    def _release(self, user_id: Optional[str]):
+        self.in_flight -= 1
+        self._decrement_user(user_id)
+        self._semaphore.release()
+        record_admission(self.in_flight, self.queued)
+
+    def snapshot(self) -> Dict:
+        """This worker's numbers for /healthz/ready; /metrics has the sum over all workers."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+def release_after(generator: AsyncGenerator, ticket: AdmissionTicket) -> AsyncGenerator:
+    """Hold `ticket` until `generator` is exhausted, fails or is closed.
+
+    Closing the returned generator also closes `generator`.
+    """
+
+    async def wrapper():
+        try:
+            async for item in generator:
+                yield item
+        finally:
+            ticket.release()
+            await close_stream(generator)
+
+    wrapped = wrapper()
+    # If the client disconnects before the body is iterated the generator never runs
+    # its finally block, so also release when it is garbage collected.
+    weakref.finalize(wrapped, ticket.release)
+    return wrapped
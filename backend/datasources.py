@@ -0,0 +1,525 @@
+import logging
+from pydantic import (
+    Field,
+    field_validator,
+    model_validator,
+    PrivateAttr,
+)
+from pydantic.alias_generators import to_snake
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import TYPE_CHECKING, List, Literal, Optional
+from typing_extensions import Self
+from backend.settings import DOTENV_PATH, DatasourcePayloadConstructor
+from backend.timing import span
+from backend.utils import parse_multi_columns, generateFilterString
+
+if TYPE_CHECKING:
+    from quart import Request
+
+
+class _AzureSearchSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="AZURE_SEARCH_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["azure_search"] = PrivateAttr(default="azure_search")
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    service: str = Field(exclude=True)
+    endpoint_suffix: str = Field(default="search.windows.net", exclude=True)
+    index: str = Field(serialization_alias="index_name")
+    key: Optional[str] = Field(default=None, exclude=True)
+    use_semantic_search: bool = Field(default=False, exclude=True)
+    semantic_search_config: str = Field(default="", serialization_alias="semantic_configuration")
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    query_type: Literal[
+        'simple',
+        'vector',
+        'semantic',
+        'vector_simple_hybrid',
+        'vectorSimpleHybrid',
+        'vector_semantic_hybrid',
+        'vectorSemanticHybrid'
+    ] = "simple"
+    permitted_groups_column: Optional[str] = Field(default=None, exclude=True)
+    
+    # Constructed fields
+    endpoint: Optional[str] = None
+    authentication: Optional[dict] = None
+    embedding_dependency: Optional[dict] = None
+    fields_mapping: Optional[dict] = None
+    filter: Optional[str] = Field(default=None, exclude=True)
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def set_endpoint(self) -> Self:
+        self.endpoint = f"https://{self.service}.{self.endpoint_suffix}"
+        return self
+    
+    @model_validator(mode="after")
+    def set_authentication(self) -> Self:
+        if self.key:
+            self.authentication = {"type": "api_key", "key": self.key}
+        else:
+            self.authentication = {"type": "system_assigned_managed_identity"}
+            
+        return self
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    @model_validator(mode="after")
+    def set_query_type(self) -> Self:
+        self.query_type = to_snake(self.query_type)
+
+    def _set_filter_string(self, request: "Request") -> str:
+        if self.permitted_groups_column:
+            user_token = request.headers.get("X-MS-TOKEN-AAD-ACCESS-TOKEN", "")
+            logging.debug(f"USER TOKEN is {'present' if user_token else 'not present'}")
+            if not user_token:
+                raise ValueError(
+                    "Document-level access control is enabled, but user access token could not be fetched."
+                )
+
+            with span("graph.groups"):
+                filter_string = generateFilterString(user_token)
+            logging.debug(f"FILTER: {filter_string}")
+            return filter_string
+        
+        return None
+            
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        request = kwargs.pop('request', None)
+        if request and self.permitted_groups_column:
+            self.filter = self._set_filter_string(request)
+            
+        self.embedding_dependency = \
+            self._settings.azure_openai.extract_embedding_dependency()
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+
+
+class _AzureCosmosDbMongoVcoreSettings(
+    BaseSettings,
+    DatasourcePayloadConstructor
+):
+    model_config = SettingsConfigDict(
+        env_prefix="AZURE_COSMOSDB_MONGO_VCORE_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["azure_cosmosdb"] = PrivateAttr(default="azure_cosmosdb")
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    query_type: Literal['vector'] = "vector"
+    connection_string: str = Field(exclude=True)
+    index: str = Field(serialization_alias="index_name")
+    database: str = Field(serialization_alias="database_name")
+    container: str = Field(serialization_alias="container_name")
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    
+    # Constructed fields
+    authentication: Optional[dict] = None
+    embedding_dependency: Optional[dict] = None
+    fields_mapping: Optional[dict] = None
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def construct_authentication(self) -> Self:
+        self.authentication = {
+            "type": "connection_string",
+            "connection_string": self.connection_string
+        }
+        return self
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        self.embedding_dependency = \
+            self._settings.azure_openai.extract_embedding_dependency()
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+
+
+class _ElasticsearchSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="ELASTICSEARCH_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["elasticsearch"] = PrivateAttr(default="elasticsearch")
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    endpoint: str
+    encoded_api_key: str = Field(exclude=True)
+    index: str = Field(serialization_alias="index_name")
+    query_type: Literal['simple', 'vector'] = "simple"
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    embedding_model_id: Optional[str] = Field(default=None, exclude=True)
+    
+    # Constructed fields
+    authentication: Optional[dict] = None
+    embedding_dependency: Optional[dict] = None
+    fields_mapping: Optional[dict] = None
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def set_authentication(self) -> Self:
+        self.authentication = {
+            "type": "encoded_api_key",
+            "encoded_api_key": self.encoded_api_key
+        }
+        
+        return self
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        self.embedding_dependency = \
+            {"type": "model_id", "model_id": self.embedding_model_id} if self.embedding_model_id else \
+            self._settings.azure_openai.extract_embedding_dependency() 
+            
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+                
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+
+
+class _PineconeSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="PINECONE_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["pinecone"] = PrivateAttr(default="pinecone")
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    environment: str
+    api_key: str = Field(exclude=True)
+    index_name: str
+    query_type: Literal["vector"] = "vector"
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    
+    # Constructed fields
+    authentication: Optional[dict] = None
+    embedding_dependency: Optional[dict] = None
+    fields_mapping: Optional[dict] = None
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def set_authentication(self) -> Self:
+        self.authentication = {
+            "type": "api_key",
+            "api_key": self.api_key
+        }
+        
+        return self
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        self.embedding_dependency = \
+            self._settings.azure_openai.extract_embedding_dependency()
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+
+
+class _AzureMLIndexSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="AZURE_MLINDEX_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["azure_ml_index"] = PrivateAttr(default="azure_ml_index")
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    name: str
+    version: str
+    project_resource_id: str = Field(validation_alias="AZURE_ML_PROJECT_RESOURCE_ID")
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    
+    # Constructed fields
+    fields_mapping: Optional[dict] = None
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+
+
+class _AzureSqlServerSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="AZURE_SQL_SERVER_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["azure_sql_server"] = PrivateAttr(default="azure_sql_server")
+    
+    connection_string: Optional[str] = Field(default=None, exclude=True)
+    table_schema: Optional[str] = None
+    schema_max_row: Optional[int] = None
+    top_n_results: Optional[int] = None
+    database_server: Optional[str] = None
+    database_name: Optional[str] = None
+    port: Optional[int] = None
+    
+    # Constructed fields
+    authentication: Optional[dict] = None
+    
+    @model_validator(mode="after")
+    def construct_authentication(self) -> Self:
+        if self.connection_string:
+            self.authentication = {
+                "type": "connection_string",
+                "connection_string": self.connection_string
+            }
+        elif self.database_server and self.database_name and self.port:
+            self.authentication = {
+                "type": "system_assigned_managed_identity"
+            }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        #parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
+    
+
+class _MongoDbSettings(BaseSettings, DatasourcePayloadConstructor):
+    model_config = SettingsConfigDict(
+        env_prefix="MONGODB_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+    _type: Literal["mongo_db"] = PrivateAttr(default="mongo_db")
+    
+    endpoint: str
+    username: str = Field(exclude=True)
+    password: str = Field(exclude=True)
+    database_name: str
+    collection_name: str
+    app_name: str
+    index_name: str
+    query_type: Literal["vector"] = "vector"
+    top_k: int = Field(default=5, serialization_alias="top_n_documents")
+    strictness: int = 3
+    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
+    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
+    title_column: Optional[str] = Field(default=None, exclude=True)
+    url_column: Optional[str] = Field(default=None, exclude=True)
+    filename_column: Optional[str] = Field(default=None, exclude=True)
+    
+    
+    # Constructed fields
+    authentication: Optional[dict] = None
+    embedding_dependency: Optional[dict] = None
+    fields_mapping: Optional[dict] = None
+    
+    @field_validator('content_columns', 'vector_columns', mode="before")
+    @classmethod
+    def split_columns(cls, comma_separated_string: str) -> List[str]:
+        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
+            return parse_multi_columns(comma_separated_string)
+        
+        return None
+    
+    @model_validator(mode="after")
+    def set_fields_mapping(self) -> Self:
+        self.fields_mapping = {
+            "content_fields": self.content_columns,
+            "title_field": self.title_column,
+            "url_field": self.url_column,
+            "filepath_field": self.filename_column,
+            "vector_fields": self.vector_columns
+        }
+        return self
+    
+    @model_validator(mode="after")
+    def construct_authentication(self) -> Self:
+        self.authentication = {
+            "type": "username_and_password",
+            "username": self.username,
+            "password": self.password
+        }
+        return self
+    
+    def construct_payload_configuration(
+        self,
+        *args,
+        **kwargs
+    ):
+        self.embedding_dependency = \
+            self._settings.azure_openai.extract_embedding_dependency()
+            
+        parameters = self.model_dump(exclude_none=True, by_alias=True)
+        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
+        
+        return {
+            "type": self._type,
+            "parameters": parameters
+        }
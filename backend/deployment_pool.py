@@ -0,0 +1,255 @@
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import openai
+
+from backend.admission import release_after
+from backend.rate_limit import RateLimiter
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors that say something about the deployment rather than the request
+FAILOVER_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class Deployment:
+    """One Azure OpenAI deployment in the pool, with its client and health state."""
+
+    def __init__(
+        self,
+        client: Any,
+        endpoint: str,
+        model: str,
+        weight: int = 1,
+        tokens_per_minute: Optional[int] = None,
+        window_size: int = 100,
+        window_seconds: float = 60.0,
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.model = model
+        self.id = f"{endpoint.rstrip('/')}/{model}"
+        self.weight = weight
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self.outstanding = 0
+        self.current_weight = 0.0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        # (timestamp, succeeded, latency in seconds)
+        self._window: deque = deque(maxlen=window_size)
+
+    def _samples(self, now: float) -> List[Tuple[float, bool, float]]:
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+        return list(self._window)
+
+    def error_rate(self, now: float) -> float:
+        samples = self._samples(now)
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok, _ in samples if not ok) / len(samples)
+
+    def latency_p50(self, now: float) -> Optional[float]:
+        latencies = [latency for _, ok, latency in self._samples(now) if ok]
+        return statistics.median(latencies) if latencies else None
+
+    def available(self, now: float, cooldown: float) -> bool:
+        if self.state == OPEN and now - self.opened_at >= cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            return not self.probe_in_flight
+        return self.state == CLOSED
+
+    def record_success(self, latency: float):
+        self._window.append((time.monotonic(), True, latency))
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        if self.state != CLOSED:
+            logging.info("Azure OpenAI deployment %s recovered", self.id)
+        self.state = CLOSED
+
+    def record_failure(self, failure_threshold: int, min_samples: int, max_error_rate: float):
+        now = time.monotonic()
+        self._window.append((now, False, 0.0))
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        samples = len(self._samples(now))
+        if (
+            self.state == HALF_OPEN
+            or self.consecutive_failures >= failure_threshold
+            or (samples >= min_samples and self.error_rate(now) >= max_error_rate)
+        ):
+            if self.state != OPEN:
+                logging.warning("Azure OpenAI deployment %s is unhealthy, opening its circuit", self.id)
+            self.state = OPEN
+            self.opened_at = now
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        p50 = self.latency_p50(now)
+        return {
+            "deployment": self.id,
+            "state": self.state,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "error_rate": round(self.error_rate(now), 3),
+            "latency_p50_ms": round(p50 * 1000) if p50 is not None else None,
+        }
+
+
+class _StreamLease:
+    def __init__(self, deployment: Deployment):
+        self._deployment = deployment
+        self._released = False
+        deployment.outstanding += 1
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._deployment.outstanding -= 1
+
+
+class DeploymentPool:
+    """Routes Azure OpenAI calls over several deployments.
+
+    Notes:
+    - Requests go to the available deployment with the fewest outstanding requests per
+      unit of weight; ties (e.g. an idle pool) are broken by smooth weighted round-robin.
+    - Deployments whose rolling median latency is above the pool's best get
+      proportionally less weight.
+    - A deployment's circuit opens after `failure_threshold` consecutive failures or a
+      high error rate over its rolling window. It is skipped for `cooldown` seconds, then
+      a single probe request decides whether it closes again.
+    - Throttling, connection errors and 5xx fail over to the next deployment; only the
+      last candidate waits out its rate limiter's retries.
+    """
+
+    def __init__(
+        self,
+        deployments: Iterable[Deployment],
+        rate_limiter: RateLimiter,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        min_samples: int = 10,
+        max_error_rate: float = 0.5,
+    ):
+        self.deployments = list(deployments)
+        self.rate_limiter = rate_limiter
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+
+    def _effective_weights(self, candidates: List[Deployment], now: float) -> Dict[str, float]:
+        latencies = {d.id: d.latency_p50(now) for d in candidates}
+        known = [latency for latency in latencies.values() if latency]
+        best = min(known) if known else None
+        return {
+            d.id: d.weight * (best / latencies[d.id] if best and latencies[d.id] else 1.0)
+            for d in candidates
+        }
+
+    def select(self, exclude: Iterable[str] = ()) -> Deployment:
+        now = time.monotonic()
+        excluded = set(exclude)
+        remaining = [d for d in self.deployments if d.id not in excluded]
+        if not remaining:
+            raise ValueError("No Azure OpenAI deployment left to try")
+        # When every circuit is open, fail open rather than refuse all traffic
+        candidates = [d for d in remaining if d.available(now, self.cooldown)] or remaining
+
+        weights = self._effective_weights(candidates, now)
+        lowest = min(d.outstanding / weights[d.id] for d in candidates)
+        tied = [d for d in candidates if d.outstanding / weights[d.id] == lowest]
+
+        total = sum(weights[d.id] for d in tied)
+        for d in tied:
+            d.current_weight += weights[d.id]
+        chosen = max(tied, key=lambda d: d.current_weight)
+        chosen.current_weight -= total
+
+        if chosen.state == HALF_OPEN:
+            chosen.probe_in_flight = True
+        return chosen
+
+    async def call(
+        self,
+        cost: int,
+        request: Callable[[Deployment], Awaitable[T]],
+        avoid: Optional[List[str]] = None,
+    ) -> Tuple[T, Deployment]:
+        """Run `request` against the best deployment, failing over to the others.
+
+        Deployments in `avoid` are only used when no other one is left. The deployments
+        this call tries are appended to it, so concurrent calls sharing the list (e.g. a
+        hedged request) go to different deployments where possible.
+        """
+        tried: List[str] = []
+        avoid = avoid if avoid is not None else []
+        while True:
+            if any(d.id not in tried and d.id not in avoid for d in self.deployments):
+                deployment = self.select(exclude=tried + avoid)
+            else:
+                deployment = self.select(exclude=tried)
+            avoid.append(deployment.id)
+            last_candidate = len(tried) + 1 >= len(self.deployments)
+            deployment.outstanding += 1
+            started = time.monotonic()
+            try:
+                result = await self.rate_limiter.call(
+                    deployment.id,
+                    cost,
+                    lambda: request(deployment),
+                    tokens_per_minute=deployment.tokens_per_minute,
+                    max_retries=None if last_candidate else 0,
+                )
+            except FAILOVER_ERRORS:
+                deployment.record_failure(self.failure_threshold, self.min_samples, self.max_error_rate)
+                if last_candidate:
+                    raise
+                logging.warning("Azure OpenAI deployment %s failed, failing over", deployment.id)
+                tried.append(deployment.id)
+                continue
+            except BaseException:
+                deployment.probe_in_flight = False
+                raise
+            finally:
+                deployment.outstanding -= 1
+
+            deployment.record_success(time.monotonic() - started)
+            return result, deployment
+
+    def track_stream(self, stream, deployment: Deployment):
+        """Count `stream` as outstanding on `deployment` until it is consumed or closed."""
+        return release_after(stream, _StreamLease(deployment))
+
+    def with_model(self, model: str) -> "DeploymentPool":
+        """A pool serving `model` from the same resources, sharing their clients."""
+        deployments = {}
+        for d in self.deployments:
+            deployments.setdefault(d.endpoint, Deployment(d.client, d.endpoint, model, d.weight))
+        return DeploymentPool(
+            deployments.values(),
+            self.rate_limiter,
+            failure_threshold=self.failure_threshold,
+            cooldown=self.cooldown,
+            min_samples=self.min_samples,
+            max_error_rate=self.max_error_rate,
+        )
+
+    def snapshot(self) -> List[Dict]:
+        return [d.snapshot() for d in self.deployments]
+
+    async def close(self):
+        for deployment in self.deployments:
+            await deployment.client.close()
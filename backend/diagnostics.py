@@ -0,0 +1,109 @@
+import asyncio
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+# pyinstrument is only imported when a profile is taken
+
+PROFILE_FORMATS = {
+    "speedscope": "application/json",
+    "html": "text/html",
+    "text": "text/plain",
+}
+
+_task_started: "weakref.WeakKeyDictionary[asyncio.Task, float]" = weakref.WeakKeyDictionary()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class WorkerProfiler:
+    """Samples everything this worker's event loop runs for a while, one profile at a time."""
+
+    def __init__(self, max_seconds: float = 60.0):
+        self.max_seconds = max_seconds
+        self._lock = asyncio.Lock()
+
+    async def profile(self, seconds: float, interval: float = 0.001, fmt: str = "speedscope") -> Tuple[str, str]:
+        """Profile for `seconds` (at most `max_seconds`) and render it as `fmt`.
+
+        Returns the rendered profile and its content type.
+        """
+        from pyinstrument import Profiler
+
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Expected one of {', '.join(PROFILE_FORMATS)}")
+        if self._lock.locked():
+            raise ProfilerBusy("A profile is already being taken on this worker")
+
+        async with self._lock:
+            # with async mode off the sampler records whatever the loop thread runs,
+            # i.e. every request on this worker rather than just this one
+            profiler = Profiler(interval=interval, async_mode="disabled")
+            profiler.start()
+            try:
+                await asyncio.sleep(min(seconds, self.max_seconds))
+            finally:
+                session = profiler.stop()
+
+        if fmt == "speedscope":
+            from pyinstrument.renderers import SpeedscopeRenderer
+
+            return SpeedscopeRenderer().render(session), PROFILE_FORMATS[fmt]
+        if fmt == "html":
+            return profiler.output_html(), PROFILE_FORMATS[fmt]
+        return profiler.output_text(unicode=True, show_all=False), PROFILE_FORMATS[fmt]
+
+
+def install_task_clock(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """Record when each task of `loop` is created, so `dump_tasks` can report its age."""
+    loop = loop or asyncio.get_running_loop()
+    previous = loop.get_task_factory()
+
+    def factory(loop, coro, **kwargs):
+        if previous:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        _task_started[task] = time.monotonic()
+        return task
+
+    loop.set_task_factory(factory)
+
+
+def _await_stack(coro, max_frames: int) -> List[str]:
+    # Task.get_stack() only has the outermost frame of a coroutine; follow what each
+    # coroutine awaits to find where the task is suspended
+    stack = []
+    while coro is not None and len(stack) < max_frames:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+
+def dump_tasks(min_age: float = 0.0, max_frames: int = 10) -> List[Dict]:
+    """The pending tasks of the running loop, oldest first, with where each is waiting.
+
+    Tasks created before `install_task_clock` have no known age and are listed last.
+    """
+    now = time.monotonic()
+    tasks = []
+    for task in asyncio.all_tasks():
+        started = _task_started.get(task)
+        age = now - started if started is not None else None
+        if min_age and (age is None or age < min_age):
+            continue
+        coro = task.get_coro()
+        tasks.append({
+            "name": task.get_name(),
+            "coroutine": getattr(coro, "__qualname__", repr(coro)),
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stack": _await_stack(coro, max_frames),
+        })
+
+    tasks.sort(key=lambda task: -1 if task["age_seconds"] is None else task["age_seconds"], reverse=True)
+    return tasks
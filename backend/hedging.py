@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from backend.utils import close_stream
+
+_EMPTY = object()
+
+OpenStream = Callable[[List[str]], Awaitable[Tuple[AsyncIterator, Any]]]
+
+
+async def _prepend(first, stream: AsyncIterator):
+    try:
+        if first is not _EMPTY:
+            yield first
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await close_stream(stream)
+
+
+class Hedger:
+    """Hedges streaming completions against a slow time to first token.
+
+    Notes:
+    - The deadline is the `percentile` of recently observed times to first chunk,
+      clamped to [min_delay, max_delay]; `max_delay` applies until enough samples exist.
+    - When the first request has produced no chunk by the deadline a second one is
+      started; whichever yields a chunk first is streamed and the other is cancelled
+      and its stream closed.
+    - `open_stream` receives a list of deployment ids shared by both attempts, so the
+      hedge can be routed to a different deployment when one is available.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 1.0,
+        max_delay: float = 5.0,
+        window_size: int = 200,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._ttfts: deque = deque(maxlen=window_size)
+        self.requests_total = 0
+        self.hedged_total = 0
+        self.hedge_wins_total = 0
+        self._discarding = set()
+
+    def deadline(self) -> float:
+        if len(self._ttfts) < self.min_samples:
+            return self.max_delay
+        ordered = sorted(self._ttfts)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return min(self.max_delay, max(self.min_delay, ordered[index]))
+
+    async def _attempt(self, open_stream: OpenStream, avoid: List[str]):
+        started = time.monotonic()
+        stream, meta = await open_stream(avoid)
+        try:
+            first = await stream.__aiter__().__anext__()
+        except StopAsyncIteration:
+            first = _EMPTY
+        except BaseException:
+            await close_stream(stream)
+            raise
+        return first, stream, meta, time.monotonic() - started
+
+    async def first_chunk(self, open_stream: OpenStream) -> Tuple[AsyncIterator, Any]:
+        """Open a stream via `open_stream`, hedging it; returns the winning (stream, meta)."""
+        self.requests_total += 1
+        avoid: List[str] = []
+        primary = asyncio.ensure_future(self._attempt(open_stream, avoid))
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.deadline())
+            if not done:
+                self.hedged_total += 1
+                attempts.append(asyncio.ensure_future(self._attempt(open_stream, avoid)))
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in attempts if task in done and task.exception() is None]
+                if winners:
+                    winner = winners[0]
+                    break
+                if not pending:
+                    # Every attempt failed; surface the primary's error
+                    return primary.result()
+        except BaseException:
+            for task in attempts:
+                self._discard(task)
+            raise
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+        for task in attempts:
+            if task is not winner:
+                self._discard(task)
+
+        first, stream, meta, ttft = winner.result()
+        self._ttfts.append(ttft)
+        if winner is not primary:
+            self.hedge_wins_total += 1
+        return _prepend(first, stream), meta
+
+    def _discard(self, task: asyncio.Future):
+        async def close_when_done():
+            try:
+                _, stream, _, _ = await task
+            except BaseException:
+                return
+            await close_stream(stream)
+
+        closing = asyncio.ensure_future(close_when_done())
+        self._discarding.add(closing)
+        closing.add_done_callback(self._discarding.discard)
+
+    def snapshot(self) -> Dict:
+        return {
+            "deadline_ms": round(self.deadline() * 1000),
+            "requests_total": self.requests_total,
+            "hedged_total": self.hedged_total,
+            "hedge_wins_total": self.hedge_wins_total,
+        }
@@ -0,0 +1,68 @@
+import uuid
+from typing import AsyncIterator, Callable, List, Optional
+
+from backend.utils import close_stream
+
+
+class AnswerRecorder:
+    """Collects the assistant answer (and its citations) from formatted chat responses.
+
+    Builds the same tool and assistant messages the frontend would otherwise send back to
+    /history/update: the assistant message keeps the completion id the frontend shows
+    (and sends feedback for), its content is the concatenated deltas and the tool message
+    holds the last citations context.
+    """
+
+    def __init__(self, on_complete: Callable[[List[dict]], None]):
+        self._on_complete = on_complete
+        self._completed = False
+        self.assistant_id: Optional[str] = None
+        self.tool_content: Optional[str] = None
+        self._content: List[str] = []
+
+    def observe(self, response: dict):
+        if not response or not response.get("choices"):
+            return
+        for message in response["choices"][0].get("messages", []):
+            if message.get("role") == "assistant":
+                self.assistant_id = response.get("id")
+                if message.get("content"):
+                    self._content.append(message["content"])
+            elif message.get("role") == "tool" and isinstance(message.get("content"), str):
+                self.tool_content = message["content"]
+
+    def messages(self) -> List[dict]:
+        if not self.assistant_id or not self._content:
+            return []
+        messages = []
+        if self.tool_content:
+            messages.append({"id": str(uuid.uuid4()), "role": "tool", "content": self.tool_content})
+        messages.append({"id": self.assistant_id, "role": "assistant", "content": "".join(self._content)})
+        return messages
+
+    def complete(self):
+        """Hand the collected messages to `on_complete`, once, if there is an answer."""
+        if self._completed:
+            return
+        self._completed = True
+        messages = self.messages()
+        if messages:
+            self._on_complete(messages)
+
+    def record(self, stream: AsyncIterator[dict]) -> AsyncIterator[dict]:
+        """Pass `stream` through, completing when it ends, fails or the client disconnects.
+
+        An answer the user stopped part-way is kept as far as it was shown, as the
+        frontend would have saved it.
+        """
+
+        async def recorded():
+            try:
+                async for response in stream:
+                    self.observe(response)
+                    yield response
+            finally:
+                self.complete()
+                await close_stream(stream)
+
+        return recorded()
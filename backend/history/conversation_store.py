@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union
+
+
+class ConversationStore(ABC):
+    """Storage for chat history: conversations and their messages, partitioned by user.
+
+    Documents use the Cosmos DB shape (`id`, `type`, `userId`, `createdAt`, `updatedAt`,
+    plus `title` for conversations and `conversationId`, `role`, `content`, `feedback`
+    for messages) whichever backend stores them.
+    """
+
+    enable_message_feedback: bool = False
+
+    @abstractmethod
+    async def ensure(self) -> Tuple[bool, str]:
+        """Check the store is reachable; returns (ok, message)."""
+
+    async def warm_up(self, measure):
+        """Open connections and load metadata before the first request."""
+
+    async def close(self):
+        """Release connections held by the store."""
+
+    @abstractmethod
+    async def create_conversation(self, user_id, title='') -> Union[dict, bool]:
+        ...
+
+    @abstractmethod
+    async def upsert_conversation(self, conversation) -> Union[dict, bool]:
+        ...
+
+    @abstractmethod
+    async def delete_conversation(self, user_id, conversation_id):
+        ...
+
+    @abstractmethod
+    async def delete_messages(self, conversation_id, user_id) -> Optional[list]:
+        ...
+
+    @abstractmethod
+    async def get_conversations(self, user_id, limit, sort_order='DESC', offset=0) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def get_conversation(self, user_id, conversation_id) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def create_message(self, uuid, conversation_id, user_id, input_message: dict) -> Union[dict, str, bool]:
+        """Store a message and bump its conversation's `updatedAt`.
+
+        Returns "Conversation not found" when the conversation does not exist.
+        """
+
+    @abstractmethod
+    async def update_message_feedback(self, user_id, message_id, feedback) -> Union[dict, bool]:
+        ...
+
+    @abstractmethod
+    async def get_messages(self, user_id, conversation_id) -> List[dict]:
+        ...
+
+    async def get_history_version(self, user_id) -> Optional[str]:
+        """A stamp of the user's chat history that changes after every write to it.
+
+        It is bumped once the writes have completed, so a stamp read before reading the
+        history never belongs to an older state than what is read. None when the
+        store does not keep one.
+        """
+        return None
+
+    async def bump_history_version(self, user_id) -> Optional[str]:
+        """Change the user's history version after a route's writes; returns the new one.
+
+        Called once per request that writes, rather than by every write method, so a
+        request that stores several documents pays for one bump. Stores that bump the
+        version within their own write transactions return None.
+        """
+        return None
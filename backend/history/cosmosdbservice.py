@@ -2,17 +2,23 @@ import uuid
 from datetime import datetime
 from azure.cosmos.aio import CosmosClient
 from azure.cosmos import exceptions
-  
-class CosmosConversationClient():
+
+from backend.history.conversation_store import ConversationStore
+from backend.metrics import record_request_charge
+from backend.timing import timed
+
+HISTORY_VERSION_ID = 'history_version'
+
+class CosmosConversationClient(ConversationStore):
     
-    def __init__(self, cosmosdb_endpoint: str, credential: any, database_name: str, container_name: str, enable_message_feedback: bool = False):
+    def __init__(self, cosmosdb_endpoint: str, credential: any, database_name: str, container_name: str, enable_message_feedback: bool = False, cosmosdb_client: any = None):
         self.cosmosdb_endpoint = cosmosdb_endpoint
         self.credential = credential
         self.database_name = database_name
         self.container_name = container_name
         self.enable_message_feedback = enable_message_feedback
         try:
-            self.cosmosdb_client = CosmosClient(self.cosmosdb_endpoint, credential=credential)
+            self.cosmosdb_client = cosmosdb_client or CosmosClient(self.cosmosdb_endpoint, credential=credential)
         except exceptions.CosmosHttpResponseError as e:
             if e.status_code == 401:
                 raise ValueError("Invalid credentials") from e
@@ -45,6 +51,38 @@ class CosmosConversationClient():
             
         return True, "CosmosDB client initialized successfully"
 
+    async def warm_up(self, measure):
+        ## resolve the account, database and container metadata and open a connection
+        ## so the first user request does not pay for discovery
+        async with measure("cosmos.account"):
+            await self.database_client.read()
+        async with measure("cosmos.container"):
+            await self.container_client.read()
+        async with measure("cosmos.point_read"):
+            try:
+                await self.container_client.read_item(item="warmup", partition_key="warmup")
+            except exceptions.CosmosResourceNotFoundError:
+                pass
+
+    async def close(self):
+        await self.cosmosdb_client.close()
+
+    def _record_charge(self, operation):
+        ## the connection keeps the headers of the last response, which are those of the
+        ## operation that just returned as long as nothing is awaited in between
+        client_connection = getattr(self.container_client, "client_connection", None)
+        headers = getattr(client_connection, "last_response_headers", None) or {}
+        if "x-ms-request-charge" in headers:
+            record_request_charge(operation, float(headers["x-ms-request-charge"]))
+
+    @timed("cosmos.bump_history_version")
+    async def bump_history_version(self, user_id):
+        ## every upsert gives the user's version document a new _etag, which is the version
+        resp = await self.container_client.upsert_item({'id': HISTORY_VERSION_ID, 'type': 'history_version', 'userId': user_id})
+        self._record_charge("upsert_item")
+        return resp.get('_etag') if resp else None
+
+    @timed("cosmos.create_conversation")
     async def create_conversation(self, user_id, title = ''):
         conversation = {
             'id': str(uuid.uuid4()),  
@@ -56,27 +94,34 @@ class CosmosConversationClient():
         }
         ## TODO: add some error handling based on the output of the upsert_item call
         resp = await self.container_client.upsert_item(conversation)  
+        self._record_charge("upsert_item")
         if resp:
             return resp
         else:
             return False
     
+    @timed("cosmos.upsert_conversation")
     async def upsert_conversation(self, conversation):
         resp = await self.container_client.upsert_item(conversation)
+        self._record_charge("upsert_item")
         if resp:
             return resp
         else:
             return False
 
+    @timed("cosmos.delete_conversation")
     async def delete_conversation(self, user_id, conversation_id):
         conversation = await self.container_client.read_item(item=conversation_id, partition_key=user_id)        
+        self._record_charge("read_item")
         if conversation:
             resp = await self.container_client.delete_item(item=conversation_id, partition_key=user_id)
+            self._record_charge("delete_item")
             return resp
         else:
             return True
 
         
+    @timed("cosmos.delete_messages")
     async def delete_messages(self, conversation_id, user_id):
         ## get a list of all the messages in the conversation
         messages = await self.get_messages(user_id, conversation_id)
@@ -84,10 +129,12 @@ class CosmosConversationClient():
         if messages:
             for message in messages:
                 resp = await self.container_client.delete_item(item=message['id'], partition_key=user_id)
+                self._record_charge("delete_item")
                 response_list.append(resp)
             return response_list
 
 
+    @timed("cosmos.get_conversations")
     async def get_conversations(self, user_id, limit, sort_order = 'DESC', offset = 0):
         parameters = [
             {
@@ -102,9 +149,11 @@ class CosmosConversationClient():
         conversations = []
         async for item in self.container_client.query_items(query=query, parameters=parameters):
             conversations.append(item)
+        self._record_charge("query_items")
         
         return conversations
 
+    @timed("cosmos.get_conversation")
     async def get_conversation(self, user_id, conversation_id):
         parameters = [
             {
@@ -120,6 +169,7 @@ class CosmosConversationClient():
         conversations = []
         async for item in self.container_client.query_items(query=query, parameters=parameters):
             conversations.append(item)
+        self._record_charge("query_items")
 
         ## if no conversations are found, return None
         if len(conversations) == 0:
@@ -127,6 +177,7 @@ class CosmosConversationClient():
         else:
             return conversations[0]
  
+    @timed("cosmos.create_message")
     async def create_message(self, uuid, conversation_id, user_id, input_message: dict):
         message = {
             'id': uuid,
@@ -143,6 +194,7 @@ class CosmosConversationClient():
             message['feedback'] = ''
         
         resp = await self.container_client.upsert_item(message)  
+        self._record_charge("upsert_item")
         if resp:
             ## update the parent conversations's updatedAt field with the current message's createdAt datetime value
             conversation = await self.get_conversation(user_id, conversation_id)
@@ -154,15 +206,19 @@ class CosmosConversationClient():
         else:
             return False
     
+    @timed("cosmos.update_message_feedback")
     async def update_message_feedback(self, user_id, message_id, feedback):
         message = await self.container_client.read_item(item=message_id, partition_key=user_id)
+        self._record_charge("read_item")
         if message:
             message['feedback'] = feedback
             resp = await self.container_client.upsert_item(message)
+            self._record_charge("upsert_item")
             return resp
         else:
             return False
 
+    @timed("cosmos.get_messages")
     async def get_messages(self, user_id, conversation_id):
         parameters = [
             {
@@ -178,6 +234,17 @@ class CosmosConversationClient():
         messages = []
         async for item in self.container_client.query_items(query=query, parameters=parameters):
             messages.append(item)
+        self._record_charge("query_items")
 
         return messages
 
+    @timed("cosmos.get_history_version")
+    async def get_history_version(self, user_id):
+        try:
+            version = await self.container_client.read_item(item=HISTORY_VERSION_ID, partition_key=user_id)
+        except exceptions.CosmosResourceNotFoundError:
+            ## nothing was written for the user since versions are kept
+            return '0'
+        finally:
+            self._record_charge("read_item")
+        return version['_etag']
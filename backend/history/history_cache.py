@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from backend.metrics import record_cache_lookup
+
+# users whose history version is remembered, most recently checked first
+MAX_VERSIONS = 4096
+
+
+class HistoryCache:
+    """Per-worker LRU cache of serialized chat history responses.
+
+    Every body is stamped with the user's history version (see
+    `ConversationStore.get_history_version`) it was read at, and is only served while
+    the version still matches, so a write through any worker invalidates it. Keys must
+    include the user. The cache is bounded by the total size of the bodies it holds.
+
+    Checking the version is a point read, where the response itself takes a query, so
+    `version` also remembers each user's version for `version_ttl` seconds: repeated
+    reads are answered from memory, and a write through another worker shows within
+    that time. Writes through this worker are seen at once (see `written`).
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, version_ttl: float = 1.0):
+        self.max_bytes = max_bytes
+        self.version_ttl = version_ttl
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._versions: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+
+    async def version(self, store, user_id: str) -> Optional[str]:
+        """The user's history version, as `store.get_history_version` returned it recently."""
+        entry = self._versions.get(user_id)
+        now = time.monotonic()
+        hit = entry is not None and now - entry[1] < self.version_ttl
+        record_cache_lookup("history_version", hit)
+        if hit:
+            return entry[0]
+        version = await store.get_history_version(user_id)
+        self._remember(user_id, version, now)
+        return version
+
+    def written(self, user_id: str, version: Optional[str]):
+        """Record a write to the user's history through this worker, and the version it left."""
+        if version is None:
+            self._versions.pop(user_id, None)
+        else:
+            self._remember(user_id, version, time.monotonic())
+
+    def _remember(self, user_id: str, version: Optional[str], now: float):
+        if self.version_ttl <= 0:
+            return
+        self._versions[user_id] = (version, now)
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > MAX_VERSIONS:
+            self._versions.popitem(last=False)
+
+    def get(self, key: Hashable, version: Optional[str]) -> Optional[bytes]:
+        if version is None or self.max_bytes <= 0:
+            return None
+        entry = self._entries.get(key)
+        hit = entry is not None and entry[0] == version
+        record_cache_lookup("history", hit)
+        if not hit:
+            if entry is not None:
+                self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, version: Optional[str], body: bytes):
+        if version is None or len(body) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (version, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._entries)
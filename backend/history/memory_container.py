@@ -0,0 +1,249 @@
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from azure.cosmos import exceptions
+
+# Approximate request unit charges, after the Cosmos DB guidance: a point read of a
+# 1 KB item costs 1 RU, writes about 5 RU per KB, queries a fixed cost plus the items read.
+READ_CHARGE_PER_KB = 1.0
+WRITE_CHARGE_PER_KB = 5.0
+QUERY_BASE_CHARGE = 2.5
+QUERY_CHARGE_PER_KB = 1.0
+
+QUERY = re.compile(
+    r"^\s*SELECT\s+(?P<select>\*|DISTINCT\s+VALUE\s+c\.\w+)\s+FROM\s+c"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+c\.(?P<order>\w+)(?:\s+(?P<direction>ASC|DESC))?)?"
+    r"(?:\s+OFFSET\s+(?P<offset>\d+)\s+LIMIT\s+(?P<limit>\d+))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+CONDITION = re.compile(r"^\s*c\.(?P<field>\w+)\s*=\s*(?:@(?P<parameter>\w+)|'(?P<literal>[^']*)')\s*$")
+AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+
+
+def _request_units(size: int, per_kb: float) -> float:
+    return round(max(1.0, size / 1024) * per_kb, 2)
+
+
+class InMemoryContainer:
+    """Async stand-in for an azure.cosmos container client, partitioned on `/userId`.
+
+    Supports the item operations and the query shapes this app issues (equality filters
+    joined with AND, ORDER BY one field, OFFSET/LIMIT and SELECT DISTINCT VALUE), so the
+    chat history and study code can run without a Cosmos DB account. Every request
+    waits `latency` seconds (plus up to `jitter`), is charged approximate request units
+    and is throttled with a 429 at `throttle_rate`; with a `seed` the run is repeatable.
+    """
+
+    def __init__(
+        self,
+        id: str = "conversations",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after_ms: int = 10,
+        seed: Optional[int] = None,
+    ):
+        self.id = id
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after_ms = retry_after_ms
+        self._random = random.Random(seed)
+        self._partitions: Dict[Any, Dict[str, str]] = {}
+        self.requests = Counter()
+        self.request_charge_total = 0.0
+        self.last_request_charge = 0.0
+        self.throttled_total = 0
+        # what the SDK's container exposes of the last response
+        self.client_connection = SimpleNamespace(last_response_headers={})
+
+    async def _request(self, operation: str):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        self.requests[operation] += 1
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            self.throttled_total += 1
+            self.last_request_charge = 0.0
+            error = exceptions.CosmosHttpResponseError(
+                status_code=429, message="Request rate is large. More Request Units may be needed."
+            )
+            error.headers = {"x-ms-retry-after-ms": str(self.retry_after_ms)}
+            raise error
+
+    def _charge(self, request_units: float):
+        self.last_request_charge = request_units
+        self.request_charge_total += request_units
+        self.client_connection.last_response_headers = {"x-ms-request-charge": str(request_units)}
+
+    def _store(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        item = dict(body)
+        item["_etag"] = f'"{uuid.uuid4()}"'
+        item["_ts"] = int(time.time())
+        serialized = json.dumps(item)
+        self._partitions.setdefault(item.get("userId"), {})[item["id"]] = serialized
+        self._charge(_request_units(len(serialized), WRITE_CHARGE_PER_KB))
+        return json.loads(serialized)
+
+    def _get(self, item: str, partition_key: Any) -> str:
+        serialized = self._partitions.get(partition_key, {}).get(item)
+        if serialized is None:
+            self._charge(1.0)
+            raise exceptions.CosmosResourceNotFoundError(
+                status_code=404, message=f"Entity with the specified id {item} does not exist in the system."
+            )
+
+        return serialized
+
+    async def read(self) -> Dict[str, Any]:
+        await self._request("read_container")
+        return {"id": self.id, "partitionKey": {"paths": ["/userId"], "kind": "Hash"}}
+
+    async def read_item(self, item: str, partition_key: Any, **kwargs) -> Dict[str, Any]:
+        await self._request("read_item")
+        serialized = self._get(item, partition_key)
+        self._charge(_request_units(len(serialized), READ_CHARGE_PER_KB))
+        return json.loads(serialized)
+
+    async def create_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._request("create_item")
+        if body["id"] in self._partitions.get(body.get("userId"), {}):
+            self._charge(1.0)
+            raise exceptions.CosmosResourceExistsError(
+                status_code=409, message="Entity with the specified id already exists in the system."
+            )
+
+        return self._store(body)
+
+    async def upsert_item(self, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._request("upsert_item")
+        return self._store(body)
+
+    async def replace_item(self, item: str, body: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._request("replace_item")
+        self._get(item, body.get("userId"))
+        return self._store(body)
+
+    async def delete_item(self, item: str, partition_key: Any, **kwargs) -> None:
+        await self._request("delete_item")
+        serialized = self._get(item, partition_key)
+        del self._partitions[partition_key][item]
+        self._charge(_request_units(len(serialized), WRITE_CHARGE_PER_KB))
+
+    async def patch_item(self, item: str, partition_key: Any, patch_operations: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        await self._request("patch_item")
+        document = json.loads(self._get(item, partition_key))
+        for operation in patch_operations:
+            *parents, leaf = operation["path"].strip("/").split("/")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            if operation["op"] == "remove":
+                target.pop(leaf, None)
+            elif operation["op"] == "incr":
+                target[leaf] = target.get(leaf, 0) + operation["value"]
+            elif operation["op"] in ("add", "set", "replace"):
+                target[leaf] = operation["value"]
+            else:
+                raise exceptions.CosmosHttpResponseError(
+                    status_code=400, message=f"Unsupported patch operation '{operation['op']}'"
+                )
+
+        return self._store(document)
+
+    def query_items(self, query: str, parameters: Optional[List[Dict[str, Any]]] = None, partition_key: Any = None, **kwargs):
+        match = QUERY.match(query)
+        if not match:
+            raise exceptions.CosmosHttpResponseError(status_code=400, message=f"Unsupported query: {query}")
+
+        values = {parameter["name"].lstrip("@"): parameter["value"] for parameter in parameters or []}
+        conditions = []
+        for condition in AND.split(match.group("where")) if match.group("where") else []:
+            parsed = CONDITION.match(condition)
+            if not parsed:
+                raise exceptions.CosmosHttpResponseError(status_code=400, message=f"Unsupported filter: {condition}")
+            value = values[parsed.group("parameter")] if parsed.group("parameter") else parsed.group("literal")
+            conditions.append((parsed.group("field"), value))
+
+        async def results():
+            await self._request("query_items")
+            scanned = 0
+            documents = []
+            # a filter on the partition key reads only that partition, as in Cosmos DB
+            scope = partition_key if partition_key is not None else dict(conditions).get("userId")
+            if scope is not None:
+                partitions = [self._partitions.get(scope, {})]
+            else:
+                partitions = list(self._partitions.values())
+            for serialized in [serialized for partition in partitions for serialized in partition.values()]:
+                document = json.loads(serialized)
+                if all(document.get(field) == value for field, value in conditions):
+                    scanned += len(serialized)
+                    documents.append(document)
+
+            if match.group("order"):
+                field = match.group("order")
+                # documents without the field sort first, as undefined does in Cosmos DB
+                documents.sort(
+                    key=lambda document: (field in document, document.get(field) or ""),
+                    reverse=(match.group("direction") or "ASC").upper() == "DESC",
+                )
+            if match.group("limit") is not None:
+                offset = int(match.group("offset"))
+                documents = documents[offset:offset + int(match.group("limit"))]
+            if match.group("select") != "*":
+                field = match.group("select").split(".")[-1]
+                documents = list(dict.fromkeys(document.get(field) for document in documents))
+
+            self._charge(round(QUERY_BASE_CHARGE + scanned / 1024 * QUERY_CHARGE_PER_KB, 2))
+            for document in documents:
+                yield document
+
+        return results()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "items": sum(len(partition) for partition in self._partitions.values()),
+            "requests": dict(self.requests),
+            "request_charge_total": round(self.request_charge_total, 2),
+            "throttled_total": self.throttled_total,
+        }
+
+
+class InMemoryDatabase:
+    def __init__(self, id: str, **container_options):
+        self.id = id
+        self._container_options = container_options
+        self._containers: Dict[str, InMemoryContainer] = {}
+
+    async def read(self) -> Dict[str, Any]:
+        return {"id": self.id}
+
+    def get_container_client(self, container: str) -> InMemoryContainer:
+        if container not in self._containers:
+            self._containers[container] = InMemoryContainer(container, **self._container_options)
+        return self._containers[container]
+
+
+class InMemoryCosmosClient:
+    """Drop-in for `azure.cosmos.aio.CosmosClient` whose containers are `InMemoryContainer`s."""
+
+    def __init__(self, **container_options):
+        self._container_options = container_options
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def get_database_client(self, database: str) -> InMemoryDatabase:
+        if database not in self._databases:
+            self._databases[database] = InMemoryDatabase(database, **self._container_options)
+        return self._databases[database]
+
+    async def close(self):
+        pass
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from backend.history.conversation_store import ConversationStore
+from backend.timing import timed
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS conversations (
+        user_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (user_id, id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_conversations_updated ON conversations (user_id, updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        user_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        conversation_id TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (user_id, id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_messages_conversation ON messages (user_id, conversation_id, created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS history_versions (
+        user_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+    """,
+]
+# bumped in the transaction of every write to a user's history
+BUMP_HISTORY_VERSION = """
+    INSERT INTO history_versions (user_id, version) VALUES (?, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+"""
+
+
+class SqliteConversationStore(ConversationStore):
+    """Chat history in a local SQLite file, for development and load tests without Cosmos DB.
+
+    Documents are stored as JSON next to the columns the app filters and sorts on, so
+    they round-trip with the same fields Cosmos DB returns. The database runs in WAL
+    mode so readers do not block the writer; aiosqlite keeps the one connection on its
+    own thread, off the event loop. As every coroutine shares that connection, writes
+    run one transaction at a time, so a commit never takes in another write's
+    statements, and a failed write is rolled back.
+    """
+
+    def __init__(self, path: str, enable_message_feedback: bool = False):
+        self.path = path
+        self.enable_message_feedback = enable_message_feedback
+        self._connection = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    async def _db(self):
+        if self._connection is None:
+            async with self._connect_lock:
+                if self._connection is None:
+                    import aiosqlite
+
+                    connection = await aiosqlite.connect(self.path)
+                    await connection.execute("PRAGMA journal_mode=WAL")
+                    await connection.execute("PRAGMA synchronous=NORMAL")
+                    for statement in SCHEMA:
+                        await connection.execute(statement)
+                    await connection.commit()
+                    self._connection = connection
+
+        return self._connection
+
+    @asynccontextmanager
+    async def _transaction(self):
+        db = await self._db()
+        async with self._write_lock:
+            try:
+                yield db
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+
+    async def _fetch(self, query, parameters):
+        db = await self._db()
+        async with db.execute(query, parameters) as cursor:
+            return [json.loads(row[0]) for row in await cursor.fetchall()]
+
+    async def ensure(self):
+        try:
+            db = await self._db()
+            await db.execute("SELECT 1")
+        except Exception:
+            return False, f"SQLite chat history database {self.path} could not be opened"
+
+        return True, "SQLite chat history store initialized successfully"
+
+    async def warm_up(self, measure):
+        async with measure("sqlite.open"):
+            await self._db()
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    @timed("sqlite.create_conversation")
+    async def create_conversation(self, user_id, title=''):
+        conversation = {
+            'id': str(uuid.uuid4()),
+            'type': 'conversation',
+            'createdAt': datetime.utcnow().isoformat(),
+            'updatedAt': datetime.utcnow().isoformat(),
+            'userId': user_id,
+            'title': title
+        }
+        return await self.upsert_conversation(conversation)
+
+    @timed("sqlite.upsert_conversation")
+    async def upsert_conversation(self, conversation):
+        async with self._transaction() as db:
+            await db.execute(
+                """
+                INSERT INTO conversations (user_id, id, updated_at, data) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, id) DO UPDATE SET updated_at = excluded.updated_at, data = excluded.data
+                """,
+                (conversation['userId'], conversation['id'], conversation['updatedAt'], json.dumps(conversation)),
+            )
+            await db.execute(BUMP_HISTORY_VERSION, (conversation['userId'],))
+        return conversation
+
+    @timed("sqlite.delete_conversation")
+    async def delete_conversation(self, user_id, conversation_id):
+        async with self._transaction() as db:
+            await db.execute("DELETE FROM conversations WHERE user_id = ? AND id = ?", (user_id, conversation_id))
+            await db.execute(BUMP_HISTORY_VERSION, (user_id,))
+        return True
+
+    @timed("sqlite.delete_messages")
+    async def delete_messages(self, conversation_id, user_id):
+        messages = await self.get_messages(user_id, conversation_id)
+        if messages:
+            async with self._transaction() as db:
+                await db.execute(
+                    "DELETE FROM messages WHERE user_id = ? AND conversation_id = ?", (user_id, conversation_id)
+                )
+                await db.execute(BUMP_HISTORY_VERSION, (user_id,))
+            ## one entry per deleted message, like the Cosmos DB delete_item responses
+            return [None] * len(messages)
+
+    @timed("sqlite.get_conversations")
+    async def get_conversations(self, user_id, limit, sort_order='DESC', offset=0):
+        order = 'ASC' if str(sort_order).upper() == 'ASC' else 'DESC'
+        query = f"SELECT data FROM conversations WHERE user_id = ? ORDER BY updated_at {order}"
+        parameters = [user_id]
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            parameters += [limit, offset]
+
+        return await self._fetch(query, parameters)
+
+    @timed("sqlite.get_conversation")
+    async def get_conversation(self, user_id, conversation_id):
+        conversations = await self._fetch(
+            "SELECT data FROM conversations WHERE user_id = ? AND id = ?", (user_id, conversation_id)
+        )
+        return conversations[0] if conversations else None
+
+    @timed("sqlite.create_message")
+    async def create_message(self, uuid, conversation_id, user_id, input_message: dict):
+        message = {
+            'id': uuid,
+            'type': 'message',
+            'userId': user_id,
+            'createdAt': datetime.utcnow().isoformat(),
+            'updatedAt': datetime.utcnow().isoformat(),
+            'conversationId': conversation_id,
+            'role': input_message['role'],
+            'content': input_message['content']
+        }
+
+        if self.enable_message_feedback:
+            message['feedback'] = ''
+
+        async with self._transaction() as db:
+            await db.execute(
+                """
+                INSERT INTO messages (user_id, id, conversation_id, created_at, data) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, id) DO UPDATE SET data = excluded.data
+                """,
+                (user_id, uuid, conversation_id, message['createdAt'], json.dumps(message)),
+            )
+            ## update the parent conversations's updatedAt field with the current message's createdAt datetime value
+            cursor = await db.execute(
+                """
+                UPDATE conversations SET updated_at = ?, data = json_set(data, '$.updatedAt', ?)
+                WHERE user_id = ? AND id = ?
+                """,
+                (message['createdAt'], message['createdAt'], user_id, conversation_id),
+            )
+            await db.execute(BUMP_HISTORY_VERSION, (user_id,))
+        if cursor.rowcount == 0:
+            return "Conversation not found"
+
+        return message
+
+    @timed("sqlite.update_message_feedback")
+    async def update_message_feedback(self, user_id, message_id, feedback):
+        async with self._transaction() as db:
+            cursor = await db.execute(
+                "UPDATE messages SET data = json_set(data, '$.feedback', ?) WHERE user_id = ? AND id = ?",
+                (feedback, user_id, message_id),
+            )
+            await db.execute(BUMP_HISTORY_VERSION, (user_id,))
+        if cursor.rowcount == 0:
+            return False
+
+        messages = await self._fetch("SELECT data FROM messages WHERE user_id = ? AND id = ?", (user_id, message_id))
+        return messages[0]
+
+    @timed("sqlite.get_messages")
+    async def get_messages(self, user_id, conversation_id):
+        return await self._fetch(
+            "SELECT data FROM messages WHERE user_id = ? AND conversation_id = ? ORDER BY created_at, rowid",
+            (user_id, conversation_id),
+        )
+
+    @timed("sqlite.get_history_version")
+    async def get_history_version(self, user_id):
+        db = await self._db()
+        async with db.execute("SELECT version FROM history_versions WHERE user_id = ?", (user_id,)) as cursor:
+            row = await cursor.fetchone()
+        return str(row[0]) if row else '0'
@@ -0,0 +1,63 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any
+
+import orjson
+from quart.json.provider import DefaultJSONProvider
+
+
+def _default(o: Any) -> Any:
+    # orjson serializes dataclasses, dates and UUIDs itself; the json module needs this
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """`obj` as compact UTF-8 JSON."""
+    try:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson refuses some of what the json module takes, such as integers beyond 64 bits
+        pass
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider of the app, so `jsonify` and `request.get_json` run on orjson.
+
+    Responses are compact and their keys are not sorted. Calls with arguments for the
+    json module, and pretty-printed responses in debug mode, go through
+    `DefaultJSONProvider` as before.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from backend.metrics import record_loop_blocked, record_loop_lag
+
+
+class LoopMonitor:
+    """Measures how late this worker's event loop runs, and optionally what blocks it.
+
+    A task sleeps `interval` seconds at a time and records by how much each sleep
+    overshoots; lags of `warn_ms` or more are logged. With `blocking_threshold_ms`, a
+    watchdog thread also pings the loop and, when a ping is not answered within the
+    threshold, logs the stack the loop thread is executing, which is the handler or
+    callback that is blocking it.
+    """
+
+    def __init__(self, interval: float = 0.5, warn_ms: float = 100.0, blocking_threshold_ms: Optional[float] = None):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.blocking_threshold_ms = blocking_threshold_ms
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.lagged_total = 0
+        self.blocked_total = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._task = loop.create_task(self._measure(), name="loop-monitor")
+        if self.blocking_threshold_ms:
+            self._watchdog = threading.Thread(
+                target=self._watch, args=(loop, threading.get_ident()), name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - started - self.interval))
+
+    def record(self, lag: float):
+        lag_ms = lag * 1000
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        record_loop_lag(lag)
+        if lag_ms >= self.warn_ms:
+            self.lagged_total += 1
+            logging.warning("Event loop lagged %.0fms behind schedule", lag_ms)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int):
+        threshold = self.blocking_threshold_ms / 1000
+        while not self._stop.wait(threshold):
+            answered = threading.Event()
+            started = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # the loop is closed
+                return
+            if answered.wait(threshold):
+                continue
+
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+            self.blocked_total += 1
+            record_loop_blocked()
+            logging.warning(
+                "Event loop blocked for more than %.0fms, currently executing:\n%s", self.blocking_threshold_ms, stack
+            )
+            while not answered.wait(threshold) and not self._stop.is_set():
+                pass
+            logging.warning("Event loop unblocked after %.0fms", (time.monotonic() - started) * 1000)
+
+    def snapshot(self) -> Dict:
+        return {
+            "lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "lagged_total": self.lagged_total,
+            "blocked_total": self.blocked_total,
+        }
@@ -0,0 +1,121 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from backend.metrics import record_cache_lookup
+
+PriorContext = Literal["keep", "intent", "drop"]
+
+
+def _parse_context(context: Any) -> Any:
+    # the frontend sends back the context of earlier answers as a JSON string
+    return json.loads(context) if isinstance(context, str) else context
+
+
+class ContextCache:
+    """Per-worker LRU cache of parsed answer contexts, keyed by a digest of their JSON.
+
+    Every turn of a conversation sends back the contexts of all earlier answers, which
+    are the same strings each time; a hit costs a hash of the string instead of a
+    `json.loads`. The strings themselves are not kept, and the cache is bounded by the
+    total length of the contexts it holds, as the parsed values take about as much
+    memory. The parsed values are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._contexts: "OrderedDict[bytes, Tuple[Any, int]]" = OrderedDict()
+
+    def parse(self, context: Any) -> Any:
+        if not isinstance(context, str) or len(context) > self.max_bytes:
+            return _parse_context(context)
+        key = hashlib.blake2b(context.encode(), digest_size=16).digest()
+        entry = self._contexts.get(key)
+        record_cache_lookup("context", entry is not None)
+        if entry is not None:
+            self._contexts.move_to_end(key)
+            return entry[0]
+        parsed = json.loads(context)
+        self._contexts[key] = (parsed, len(context))
+        self.size += len(context)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._contexts.popitem(last=False)
+            self.size -= evicted
+        return parsed
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+
+def _reduce_context(context: Any) -> Optional[Dict[str, Any]]:
+    # the search intent of an earlier answer, without its citations
+    if isinstance(context, dict) and context.get("intent") is not None:
+        return {"intent": context["intent"]}
+    return None
+
+
+def to_openai_messages(
+    request_messages: Sequence[Dict[str, Any]],
+    system_message: Optional[str] = None,
+    context_cache: Optional[ContextCache] = None,
+    prior_context: PriorContext = "keep",
+    prior_context_turns: int = 1,
+) -> List[Dict[str, Any]]:
+    """The chat completions messages for a conversation, in one pass.
+
+    Tool messages only carry citations for the frontend and other roles are not the
+    client's to send, so both are dropped. The request's dicts are converted directly:
+    the API needs a dict per message anyway, so an intermediate object would only add
+    an allocation.
+
+    Contexts are parsed through `context_cache` when given. Unless `prior_context` is
+    "keep", only the last `prior_context_turns` contexts are sent in full; older ones
+    are reduced to their intent or dropped, and dropped contexts are never parsed.
+    """
+    messages = [{"role": "system", "content": system_message}] if system_message is not None else []
+    append = messages.append
+    parse = context_cache.parse if context_cache is not None else _parse_context
+    older_contexts = 0
+    if prior_context != "keep":
+        older_contexts = sum(
+            1 for message in request_messages
+            if message and "context" in message and message["role"] in ("assistant", "function")
+        )
+        older_contexts -= prior_context_turns
+    for message in request_messages:
+        if not message:
+            continue
+        role = message["role"]
+        if role == "user":
+            append({"role": "user", "content": message["content"]})
+        elif role == "assistant" or role == "function":
+            converted = {"role": role}
+            if "name" in message:
+                converted["name"] = message["name"]
+            if "function_call" in message:
+                converted["function_call"] = message["function_call"]
+            converted["content"] = message["content"]
+            if "context" in message:
+                if older_contexts <= 0:
+                    converted["context"] = parse(message["context"])
+                else:
+                    older_contexts -= 1
+                    if prior_context == "intent":
+                        reduced = _reduce_context(parse(message["context"]))
+                        if reduced is not None:
+                            converted["context"] = reduced
+            append(converted)
+    return messages
+
+
+def to_frontend_message(document: Dict[str, Any]) -> Dict[str, Any]:
+    """A chat history message document as the history routes return it, converted directly."""
+    return {
+        "id": document["id"],
+        "role": document["role"],
+        "content": document["content"],
+        "createdAt": document["createdAt"],
+        "feedback": document.get("feedback"),
+    }
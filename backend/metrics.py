@@ -0,0 +1,161 @@
+import os
+from typing import Optional, Tuple
+
+# prometheus_client is only imported when metrics are enabled
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CHUNK_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2000, 4000)
+REQUEST_UNIT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+_metrics: Optional["AppMetrics"] = None
+
+
+class AppMetrics:
+    """Prometheus metrics of this worker.
+
+    With PROMETHEUS_MULTIPROC_DIR set, as gunicorn.conf.py does, every worker writes its
+    samples to files in that directory and `render` serves the sum over all workers.
+    """
+
+    def __init__(self, datasource_type: Optional[str] = None):
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.datasource = datasource_type or "none"
+        self.registry = CollectorRegistry()
+        labels = ["route", "datasource"]
+        self.requests = Histogram(
+            "chat_request_duration_seconds", "Time to complete a request, including the streamed body",
+            labels + ["status"], buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.ttft = Histogram(
+            "chat_ttft_seconds", "Time from the start of a request to the first chunk of its streamed answer",
+            labels, buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.stream_duration = Histogram(
+            "chat_stream_duration_seconds", "Time spent streaming an answer",
+            labels, buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.stream_chunks = Histogram(
+            "chat_stream_chunks", "Chunks streamed per answer, about one token each",
+            labels, buckets=CHUNK_BUCKETS, registry=self.registry,
+        )
+        self.streams_in_flight = Gauge(
+            "chat_streams_in_flight", "Answers being streamed",
+            labels, multiprocess_mode="livesum", registry=self.registry,
+        )
+        self.stages = Histogram(
+            "chat_stage_duration_seconds",
+            "Time spent in a stage of a request: admission, graph.groups, title, openai, tool_call, "
+            "promptflow or a chat history store operation",
+            ["stage"] + labels, buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.request_units = Histogram(
+            "chat_cosmos_request_units", "Request units charged per Cosmos DB operation",
+            ["operation"], buckets=REQUEST_UNIT_BUCKETS, registry=self.registry,
+        )
+        self.cache_lookups = Counter(
+            "chat_cache_lookups_total", "Cache lookups by cache and result (hit or miss)",
+            ["cache", "result"], registry=self.registry,
+        )
+        self.admission_in_flight = Gauge(
+            "chat_admission_in_flight", "Chat requests holding an upstream slot",
+            multiprocess_mode="livesum", registry=self.registry,
+        )
+        self.admission_queued = Gauge(
+            "chat_admission_queued", "Chat requests waiting for an upstream slot",
+            multiprocess_mode="livesum", registry=self.registry,
+        )
+        self.admission_rejected = Counter(
+            "chat_admission_rejected_total", "Chat requests rejected by admission control, by reason "
+            "(queue_full, timeout or per_user)",
+            ["reason"], registry=self.registry,
+        )
+        self.loop_lag = Histogram(
+            "chat_event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up",
+            buckets=LOOP_LAG_BUCKETS, registry=self.registry,
+        )
+        self.loop_blocked = Counter(
+            "chat_event_loop_blocked_total", "Times the event loop was blocked longer than the blocking threshold",
+            registry=self.registry,
+        )
+
+    def request(self, route: str) -> "RequestMetrics":
+        return RequestMetrics(self, route)
+
+    def render(self) -> Tuple[bytes, str]:
+        """The metrics of all workers in the Prometheus text format, and its content type."""
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+        registry = self.registry
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class RequestMetrics:
+    """Listener of one request's `backend.timing.RequestTiming`."""
+
+    __slots__ = ("metrics", "route")
+
+    def __init__(self, metrics: AppMetrics, route: str):
+        self.metrics = metrics
+        self.route = route
+
+    def span(self, name: str, duration_ms: float):
+        metrics = self.metrics
+        if name == "ttft":
+            histogram = metrics.ttft.labels(self.route, metrics.datasource)
+        elif name == "stream":
+            histogram = metrics.stream_duration.labels(self.route, metrics.datasource)
+        else:
+            histogram = metrics.stages.labels(name, self.route, metrics.datasource)
+        histogram.observe(duration_ms / 1000)
+
+    def stream_started(self):
+        self.metrics.streams_in_flight.labels(self.route, self.metrics.datasource).inc()
+
+    def stream_finished(self, chunks: int):
+        self.metrics.streams_in_flight.labels(self.route, self.metrics.datasource).dec()
+        self.metrics.stream_chunks.labels(self.route, self.metrics.datasource).observe(chunks)
+
+    def finish(self, status: int, duration_ms: float):
+        self.metrics.requests.labels(self.route, self.metrics.datasource, str(status)).observe(duration_ms / 1000)
+
+
+def init_metrics(datasource_type: Optional[str] = None) -> AppMetrics:
+    global _metrics
+    _metrics = AppMetrics(datasource_type)
+    return _metrics
+
+
+def record_request_charge(operation: str, request_units: float):
+    if _metrics:
+        _metrics.request_units.labels(operation).observe(request_units)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    if _metrics:
+        _metrics.cache_lookups.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_admission(in_flight: int, queued: int):
+    if _metrics:
+        _metrics.admission_in_flight.set(in_flight)
+        _metrics.admission_queued.set(queued)
+
+
+def record_admission_rejected(reason: str):
+    if _metrics:
+        _metrics.admission_rejected.labels(reason).inc()
+
+
+def record_loop_lag(lag: float):
+    if _metrics:
+        _metrics.loop_lag.observe(lag)
+
+
+def record_loop_blocked():
+    if _metrics:
+        _metrics.loop_blocked.inc()
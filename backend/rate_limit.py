@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+# Per-message overhead of the chat format, as counted by the service
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+
+_encoding = None
+
+
+def load_tokenizer():
+    """Load the tiktoken encoding used for cost estimates.
+
+    tiktoken is optional and may download its encoding on first use, so call this off
+    the event loop (e.g. `asyncio.to_thread`); until it succeeds, estimates fall back
+    to ~4 characters per token.
+    """
+    global _encoding
+    try:
+        import tiktoken
+
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logging.info("tiktoken is unavailable, estimating tokens from message length")
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def estimate_request_tokens(messages: List[dict], max_tokens: Optional[int]) -> int:
+    """Estimate the quota a chat completion consumes: prompt tokens plus max_tokens.
+
+    This matches how Azure OpenAI charges a request against the deployment's TPM limit
+    when it is admitted, before the actual completion length is known.
+    """
+    prompt_tokens = _TOKENS_PER_REPLY
+    for message in messages:
+        prompt_tokens += _TOKENS_PER_MESSAGE
+        content = message.get("content")
+        if isinstance(content, str):
+            prompt_tokens += count_tokens(content)
+        elif isinstance(content, list):
+            prompt_tokens += sum(count_tokens(part.get("text", "")) for part in content if isinstance(part, dict))
+    return prompt_tokens + (max_tokens or 0)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to back off according to `retry-after-ms` / `retry-after`, if present."""
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class TokenBucket:
+    """Client-side token bucket for one Azure OpenAI deployment.
+
+    Notes:
+    - Refills continuously at `tokens_per_minute / 60` per second, up to one minute of
+      budget. Without `tokens_per_minute` only server back-off signals are enforced.
+    - Waiters are served in arrival order (asyncio.Lock is FIFO), so a large request is
+      not starved by a stream of small ones.
+    - `observe` adapts to the service: `retry-after` pauses the bucket and
+      `x-ratelimit-remaining-*` caps the local budget when the service reports less.
+    """
+
+    def __init__(self, tokens_per_minute: Optional[int] = None):
+        self.capacity = float(tokens_per_minute) if tokens_per_minute else None
+        self.tokens = self.capacity or 0.0
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self.throttled_total = 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    async def acquire(self, cost: int):
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.blocked_until > now:
+                        await asyncio.sleep(self.blocked_until - now)
+                        continue
+                    if self.capacity is None:
+                        return
+
+                    # Requests larger than the whole budget only wait for a full bucket
+                    cost = min(cost, self.capacity)
+                    if self.tokens >= cost:
+                        self.tokens -= cost
+                        return
+                    await asyncio.sleep((cost - self.tokens) * 60 / self.capacity)
+        finally:
+            self.waiting -= 1
+
+    def observe(self, headers: Mapping[str, str], throttled: bool = False):
+        now = time.monotonic()
+        self._refill(now)
+
+        retry_after = parse_retry_after(headers)
+        if throttled:
+            self.throttled_total += 1
+            # Without a hint, back off for one refill interval of the service's 1s/10s windows
+            retry_after = retry_after if retry_after is not None else 1.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.tokens = 0.0
+
+        try:
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None and self.capacity is not None:
+                self.tokens = min(self.tokens, float(remaining_tokens))
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and float(remaining_requests) <= 0:
+                self.blocked_until = max(self.blocked_until, now + 1.0)
+        except ValueError:
+            pass
+
+
+class RateLimiter:
+    """Token buckets keyed by deployment, and the 429-aware retry loop around them."""
+
+    def __init__(self, tokens_per_minute: Optional[int] = None, max_retries: int = 3):
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, deployment: str, tokens_per_minute: Optional[int] = None) -> TokenBucket:
+        if deployment not in self.buckets:
+            self.buckets[deployment] = TokenBucket(tokens_per_minute or self.tokens_per_minute)
+        return self.buckets[deployment]
+
+    async def call(
+        self,
+        deployment: str,
+        cost: int,
+        request: Callable[[], Awaitable[T]],
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ) -> T:
+        """Run `request` once the deployment's bucket admits `cost` tokens.
+
+        The OpenAI client should be created with `max_retries=0`: 429s are retried here,
+        after the bucket has backed off, and connection errors and 5xx with jittered
+        exponential backoff, so concurrent requests do not retry in lockstep.
+        """
+        bucket = self.bucket(deployment, tokens_per_minute)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            await bucket.acquire(cost)
+            try:
+                response = await request()
+            except openai.RateLimitError as e:
+                bucket.observe(e.response.headers, throttled=True)
+                if attempt == max_retries:
+                    raise
+                logging.warning("Azure OpenAI deployment %s throttled, retrying (attempt %d)", deployment, attempt + 1)
+            except (openai.APIConnectionError, openai.InternalServerError):
+                if attempt == max_retries:
+                    raise
+                await asyncio.sleep(min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            else:
+                headers = getattr(response, "headers", None)
+                if headers is not None:
+                    bucket.observe(headers)
+                return response
@@ -14,12 +14,11 @@ from pydantic import (
     ValidationError,
     ValidationInfo
 )
-from pydantic.alias_generators import to_snake
+from importlib import import_module
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Literal, Optional
 from typing_extensions import Self
-from quart import Request
-from backend.utils import parse_multi_columns, generateFilterString
+from backend.utils import parse_multi_columns
 
 DOTENV_PATH = os.environ.get(
     "DOTENV_PATH",
@@ -60,11 +59,138 @@ class _ChatHistorySettings(BaseSettings):
         env_ignore_empty=True
     )
 
-    database: str
-    account: str
+    store: Literal["cosmosdb", "sqlite", "memory"] = Field(
+        default="cosmosdb",
+        validation_alias="CHAT_HISTORY_STORE"
+    )
+    sqlite_path: str = Field(
+        default="chat_history.db",
+        validation_alias="CHAT_HISTORY_SQLITE_PATH"
+    )
+    memory_latency: confloat(ge=0) = Field(
+        default=0.0,
+        validation_alias="CHAT_HISTORY_MEMORY_LATENCY"
+    )
+    memory_throttle_rate: confloat(ge=0, le=1) = Field(
+        default=0.0,
+        validation_alias="CHAT_HISTORY_MEMORY_THROTTLE_RATE"
+    )
+    cache_mb: confloat(ge=0) = Field(
+        default=32.0,
+        validation_alias="CHAT_HISTORY_CACHE_MB"
+    )
+    version_ttl: confloat(ge=0) = Field(
+        default=1.0,
+        validation_alias="CHAT_HISTORY_VERSION_TTL"
+    )
+    database: Optional[str] = None
+    account: Optional[str] = None
     account_key: Optional[str] = None
-    conversations_container: str
+    conversations_container: Optional[str] = None
     enable_feedback: bool = False
+    persist_answers: bool = False
+
+    @model_validator(mode="after")
+    def ensure_store_settings(self) -> Self:
+        if self.store == "cosmosdb" and not (
+            self.database and self.account and self.conversations_container
+        ):
+            raise ValueError(
+                "AZURE_COSMOSDB_ACCOUNT, AZURE_COSMOSDB_DATABASE and "
+                "AZURE_COSMOSDB_CONVERSATIONS_CONTAINER are required"
+            )
+
+        return self
+
+
+class _AdminSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="ADMIN_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    principal_ids: Optional[str] = None
+    study_bulk_concurrency: conint(ge=1) = 16
+    diagnostics_enabled: bool = False
+    profile_max_seconds: confloat(gt=0) = 60.0
+
+    def is_admin(self, user_principal_id: Optional[str]) -> bool:
+        if not self.principal_ids or not user_principal_id:
+            return False
+
+        return user_principal_id in parse_multi_columns(self.principal_ids.replace(" ", ""))
+
+
+class _AdmissionSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="ADMISSION_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    enabled: bool = True
+    max_concurrent: conint(ge=1) = 64
+    max_per_user: conint(ge=0) = 4
+    max_queue: conint(ge=0) = 128
+    queue_timeout: confloat(ge=0) = 10.0
+    retry_after: confloat(ge=0) = 5.0
+
+
+class _TimingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="TIMING_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    enabled: bool = False
+    log_threshold_ms: confloat(ge=0) = 0.0
+
+
+class _MetricsSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="METRICS_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    enabled: bool = False
+    token: Optional[str] = None
+
+
+class _TracingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="TRACING_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    enabled: bool = False
+    exporter: Literal["otlp", "console", "file"] = "otlp"
+    file_path: str = "traces-{pid}.jsonl"
+    sample_ratio: confloat(ge=0, le=1) = 0.05
+    service_name: str = "aoai-chat"
+
+
+class _LoopMonitorSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="LOOP_MONITOR_",
+        env_file=DOTENV_PATH,
+        extra="ignore",
+        env_ignore_empty=True
+    )
+
+    enabled: bool = True
+    interval: confloat(gt=0) = 0.5
+    warn_ms: confloat(ge=0) = 100.0
+    blocking_detection: bool = False
+    blocking_threshold_ms: confloat(gt=0) = 100.0
 
 
 class _PromptflowSettings(BaseSettings):
@@ -94,6 +220,15 @@ class _AzureOpenAITool(BaseModel):
     function: _AzureOpenAIFunction
     
 
+class _AzureOpenAIDeployment(BaseModel):
+    model: str
+    endpoint: Optional[str] = None
+    resource: Optional[str] = None
+    key: Optional[str] = None
+    weight: conint(ge=1) = 1
+    tokens_per_minute: Optional[conint(ge=1)] = None
+
+
 class _AzureOpenAISettings(BaseSettings):
     model_config = SettingsConfigDict(
         env_prefix="AZURE_OPENAI_",
@@ -129,6 +264,21 @@ class _AzureOpenAISettings(BaseSettings):
     function_call_azure_functions_tools_base_url: Optional[str] = None
     function_call_azure_functions_tool_key: Optional[str] = None
     function_call_azure_functions_tool_base_url: Optional[str] = None
+    tokens_per_minute: Optional[conint(ge=1)] = None
+    rate_limit_max_retries: conint(ge=0) = 3
+    deployments: Optional[conlist(_AzureOpenAIDeployment, min_length=1)] = None
+    circuit_breaker_failures: conint(ge=1) = 5
+    circuit_breaker_cooldown: confloat(gt=0) = 30.0
+    title_model: Optional[str] = None
+    title_timeout: confloat(gt=0) = 3.0
+    title_cache_size: conint(ge=0) = 1024
+    context_cache_mb: confloat(ge=0) = 16.0
+    prior_context: Literal["keep", "intent", "drop"] = "keep"
+    prior_context_turns: conint(ge=0) = 1
+    hedge_enabled: bool = False
+    hedge_percentile: confloat(gt=0, lt=100) = 95.0
+    hedge_min_delay: confloat(ge=0) = 1.0
+    hedge_max_delay: confloat(gt=0) = 5.0
     
     @field_validator('tools', mode='before')
     @classmethod
@@ -145,6 +295,18 @@ class _AzureOpenAISettings(BaseSettings):
             
         return None
     
+    @field_validator('deployments', mode='before')
+    @classmethod
+    def deserialize_deployments(cls, deployments_json_str: str) -> List[_AzureOpenAIDeployment]:
+        if isinstance(deployments_json_str, str):
+            try:
+                return json.loads(deployments_json_str)
+            except json.JSONDecodeError as e:
+                logging.warning(f"An error occurred while deserializing AZURE_OPENAI_DEPLOYMENTS -- {str(e)}")
+                return None
+
+        return deployments_json_str
+
     @field_validator('logit_bias', mode='before')
     @classmethod
     def deserialize_logit_bias(cls, logit_bias_json_str: str) -> dict:
@@ -175,6 +337,26 @@ class _AzureOpenAISettings(BaseSettings):
         
         raise ValidationError("AZURE_OPENAI_ENDPOINT or AZURE_OPENAI_RESOURCE is required")
         
+    def get_deployments(self) -> List[_AzureOpenAIDeployment]:
+        """The chat deployments to balance over; the primary AZURE_OPENAI_MODEL by default.
+
+        Entries of AZURE_OPENAI_DEPLOYMENTS without an endpoint or key use the top-level ones.
+        """
+        deployments = self.deployments or [
+            _AzureOpenAIDeployment(model=self.model, tokens_per_minute=self.tokens_per_minute)
+        ]
+        resolved = []
+        for deployment in deployments:
+            endpoint = deployment.endpoint or (
+                f"https://{deployment.resource}.openai.azure.com" if deployment.resource else self.endpoint
+            )
+            resolved.append(deployment.model_copy(update={
+                "endpoint": endpoint,
+                "key": deployment.key or (self.key if endpoint == self.endpoint else None),
+                "tokens_per_minute": deployment.tokens_per_minute or self.tokens_per_minute,
+            }))
+        return resolved
+
     def extract_embedding_dependency(self) -> Optional[dict]:
         if self.embedding_name:
             return {
@@ -244,513 +426,18 @@ class DatasourcePayloadConstructor(BaseModel, ABC):
         pass
 
 
-class _AzureSearchSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="AZURE_SEARCH_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["azure_search"] = PrivateAttr(default="azure_search")
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    service: str = Field(exclude=True)
-    endpoint_suffix: str = Field(default="search.windows.net", exclude=True)
-    index: str = Field(serialization_alias="index_name")
-    key: Optional[str] = Field(default=None, exclude=True)
-    use_semantic_search: bool = Field(default=False, exclude=True)
-    semantic_search_config: str = Field(default="", serialization_alias="semantic_configuration")
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    query_type: Literal[
-        'simple',
-        'vector',
-        'semantic',
-        'vector_simple_hybrid',
-        'vectorSimpleHybrid',
-        'vector_semantic_hybrid',
-        'vectorSemanticHybrid'
-    ] = "simple"
-    permitted_groups_column: Optional[str] = Field(default=None, exclude=True)
-    
-    # Constructed fields
-    endpoint: Optional[str] = None
-    authentication: Optional[dict] = None
-    embedding_dependency: Optional[dict] = None
-    fields_mapping: Optional[dict] = None
-    filter: Optional[str] = Field(default=None, exclude=True)
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def set_endpoint(self) -> Self:
-        self.endpoint = f"https://{self.service}.{self.endpoint_suffix}"
-        return self
-    
-    @model_validator(mode="after")
-    def set_authentication(self) -> Self:
-        if self.key:
-            self.authentication = {"type": "api_key", "key": self.key}
-        else:
-            self.authentication = {"type": "system_assigned_managed_identity"}
-            
-        return self
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    @model_validator(mode="after")
-    def set_query_type(self) -> Self:
-        self.query_type = to_snake(self.query_type)
-
-    def _set_filter_string(self, request: Request) -> str:
-        if self.permitted_groups_column:
-            user_token = request.headers.get("X-MS-TOKEN-AAD-ACCESS-TOKEN", "")
-            logging.debug(f"USER TOKEN is {'present' if user_token else 'not present'}")
-            if not user_token:
-                raise ValueError(
-                    "Document-level access control is enabled, but user access token could not be fetched."
-                )
-
-            filter_string = generateFilterString(user_token)
-            logging.debug(f"FILTER: {filter_string}")
-            return filter_string
-        
-        return None
-            
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        request = kwargs.pop('request', None)
-        if request and self.permitted_groups_column:
-            self.filter = self._set_filter_string(request)
-            
-        self.embedding_dependency = \
-            self._settings.azure_openai.extract_embedding_dependency()
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-
-
-class _AzureCosmosDbMongoVcoreSettings(
-    BaseSettings,
-    DatasourcePayloadConstructor
-):
-    model_config = SettingsConfigDict(
-        env_prefix="AZURE_COSMOSDB_MONGO_VCORE_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["azure_cosmosdb"] = PrivateAttr(default="azure_cosmosdb")
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    query_type: Literal['vector'] = "vector"
-    connection_string: str = Field(exclude=True)
-    index: str = Field(serialization_alias="index_name")
-    database: str = Field(serialization_alias="database_name")
-    container: str = Field(serialization_alias="container_name")
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    
-    # Constructed fields
-    authentication: Optional[dict] = None
-    embedding_dependency: Optional[dict] = None
-    fields_mapping: Optional[dict] = None
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def construct_authentication(self) -> Self:
-        self.authentication = {
-            "type": "connection_string",
-            "connection_string": self.connection_string
-        }
-        return self
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        self.embedding_dependency = \
-            self._settings.azure_openai.extract_embedding_dependency()
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
+# DATASOURCE_TYPE -> (settings class in backend.datasources, description)
+_DATASOURCE_SETTINGS = {
+    "AzureCognitiveSearch": ("_AzureSearchSettings", "Azure Cognitive Search"),
+    "AzureCosmosDB": ("_AzureCosmosDbMongoVcoreSettings", "Azure CosmosDB Mongo vcore"),
+    "Elasticsearch": ("_ElasticsearchSettings", "Elasticsearch"),
+    "Pinecone": ("_PineconeSettings", "Pinecone"),
+    "AzureMLIndex": ("_AzureMLIndexSettings", "Azure ML Index"),
+    "AzureSqlServer": ("_AzureSqlServerSettings", "SQL Server"),
+    "MongoDB": ("_MongoDbSettings", "Mongo DB"),
+}
 
 
-class _ElasticsearchSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="ELASTICSEARCH_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["elasticsearch"] = PrivateAttr(default="elasticsearch")
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    endpoint: str
-    encoded_api_key: str = Field(exclude=True)
-    index: str = Field(serialization_alias="index_name")
-    query_type: Literal['simple', 'vector'] = "simple"
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    embedding_model_id: Optional[str] = Field(default=None, exclude=True)
-    
-    # Constructed fields
-    authentication: Optional[dict] = None
-    embedding_dependency: Optional[dict] = None
-    fields_mapping: Optional[dict] = None
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def set_authentication(self) -> Self:
-        self.authentication = {
-            "type": "encoded_api_key",
-            "encoded_api_key": self.encoded_api_key
-        }
-        
-        return self
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        self.embedding_dependency = \
-            {"type": "model_id", "model_id": self.embedding_model_id} if self.embedding_model_id else \
-            self._settings.azure_openai.extract_embedding_dependency() 
-            
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-                
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-
-
-class _PineconeSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="PINECONE_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["pinecone"] = PrivateAttr(default="pinecone")
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    environment: str
-    api_key: str = Field(exclude=True)
-    index_name: str
-    query_type: Literal["vector"] = "vector"
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    
-    # Constructed fields
-    authentication: Optional[dict] = None
-    embedding_dependency: Optional[dict] = None
-    fields_mapping: Optional[dict] = None
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def set_authentication(self) -> Self:
-        self.authentication = {
-            "type": "api_key",
-            "api_key": self.api_key
-        }
-        
-        return self
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        self.embedding_dependency = \
-            self._settings.azure_openai.extract_embedding_dependency()
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-
-
-class _AzureMLIndexSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="AZURE_MLINDEX_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["azure_ml_index"] = PrivateAttr(default="azure_ml_index")
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    name: str
-    version: str
-    project_resource_id: str = Field(validation_alias="AZURE_ML_PROJECT_RESOURCE_ID")
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    
-    # Constructed fields
-    fields_mapping: Optional[dict] = None
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-
-
-class _AzureSqlServerSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="AZURE_SQL_SERVER_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["azure_sql_server"] = PrivateAttr(default="azure_sql_server")
-    
-    connection_string: Optional[str] = Field(default=None, exclude=True)
-    table_schema: Optional[str] = None
-    schema_max_row: Optional[int] = None
-    top_n_results: Optional[int] = None
-    database_server: Optional[str] = None
-    database_name: Optional[str] = None
-    port: Optional[int] = None
-    
-    # Constructed fields
-    authentication: Optional[dict] = None
-    
-    @model_validator(mode="after")
-    def construct_authentication(self) -> Self:
-        if self.connection_string:
-            self.authentication = {
-                "type": "connection_string",
-                "connection_string": self.connection_string
-            }
-        elif self.database_server and self.database_name and self.port:
-            self.authentication = {
-                "type": "system_assigned_managed_identity"
-            }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        #parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-    
-
-class _MongoDbSettings(BaseSettings, DatasourcePayloadConstructor):
-    model_config = SettingsConfigDict(
-        env_prefix="MONGODB_",
-        env_file=DOTENV_PATH,
-        extra="ignore",
-        env_ignore_empty=True
-    )
-    _type: Literal["mongo_db"] = PrivateAttr(default="mongo_db")
-    
-    endpoint: str
-    username: str = Field(exclude=True)
-    password: str = Field(exclude=True)
-    database_name: str
-    collection_name: str
-    app_name: str
-    index_name: str
-    query_type: Literal["vector"] = "vector"
-    top_k: int = Field(default=5, serialization_alias="top_n_documents")
-    strictness: int = 3
-    enable_in_domain: bool = Field(default=True, serialization_alias="in_scope")
-    content_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    vector_columns: Optional[List[str]] = Field(default=None, exclude=True)
-    title_column: Optional[str] = Field(default=None, exclude=True)
-    url_column: Optional[str] = Field(default=None, exclude=True)
-    filename_column: Optional[str] = Field(default=None, exclude=True)
-    
-    
-    # Constructed fields
-    authentication: Optional[dict] = None
-    embedding_dependency: Optional[dict] = None
-    fields_mapping: Optional[dict] = None
-    
-    @field_validator('content_columns', 'vector_columns', mode="before")
-    @classmethod
-    def split_columns(cls, comma_separated_string: str) -> List[str]:
-        if isinstance(comma_separated_string, str) and len(comma_separated_string) > 0:
-            return parse_multi_columns(comma_separated_string)
-        
-        return None
-    
-    @model_validator(mode="after")
-    def set_fields_mapping(self) -> Self:
-        self.fields_mapping = {
-            "content_fields": self.content_columns,
-            "title_field": self.title_column,
-            "url_field": self.url_column,
-            "filepath_field": self.filename_column,
-            "vector_fields": self.vector_columns
-        }
-        return self
-    
-    @model_validator(mode="after")
-    def construct_authentication(self) -> Self:
-        self.authentication = {
-            "type": "username_and_password",
-            "username": self.username,
-            "password": self.password
-        }
-        return self
-    
-    def construct_payload_configuration(
-        self,
-        *args,
-        **kwargs
-    ):
-        self.embedding_dependency = \
-            self._settings.azure_openai.extract_embedding_dependency()
-            
-        parameters = self.model_dump(exclude_none=True, by_alias=True)
-        parameters.update(self._settings.search.model_dump(exclude_none=True, by_alias=True))
-        
-        return {
-            "type": self._type,
-            "parameters": parameters
-        }
-        
-        
 class _BaseSettings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=DOTENV_PATH,
@@ -762,6 +449,7 @@ class _BaseSettings(BaseSettings):
     auth_enabled: bool = True
     sanitize_answer: bool = False
     use_promptflow: bool = False
+    startup_warmup_timeout: float = 60.0
 
 
 class _AppSettings(BaseModel):
@@ -769,7 +457,13 @@ class _AppSettings(BaseModel):
     azure_openai: _AzureOpenAISettings = _AzureOpenAISettings()
     search: _SearchCommonSettings = _SearchCommonSettings()
     ui: Optional[_UiSettings] = _UiSettings()
-    
+    admin: _AdminSettings = _AdminSettings()
+    admission: _AdmissionSettings = _AdmissionSettings()
+    timing: _TimingSettings = _TimingSettings()
+    metrics: _MetricsSettings = _MetricsSettings()
+    tracing: _TracingSettings = _TracingSettings()
+    loop_monitor: _LoopMonitorSettings = _LoopMonitorSettings()
+
     # Constructed properties
     chat_history: Optional[_ChatHistorySettings] = None
     datasource: Optional[DatasourcePayloadConstructor] = None
@@ -798,33 +492,13 @@ class _AppSettings(BaseModel):
     @model_validator(mode="after")
     def set_datasource_settings(self) -> Self:
         try:
-            if self.base_settings.datasource_type == "AzureCognitiveSearch":
-                self.datasource = _AzureSearchSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Azure Cognitive Search")
-            
-            elif self.base_settings.datasource_type == "AzureCosmosDB":
-                self.datasource = _AzureCosmosDbMongoVcoreSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Azure CosmosDB Mongo vcore")
-            
-            elif self.base_settings.datasource_type == "Elasticsearch":
-                self.datasource = _ElasticsearchSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Elasticsearch")
-            
-            elif self.base_settings.datasource_type == "Pinecone":
-                self.datasource = _PineconeSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Pinecone")
-            
-            elif self.base_settings.datasource_type == "AzureMLIndex":
-                self.datasource = _AzureMLIndexSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Azure ML Index")
-            
-            elif self.base_settings.datasource_type == "AzureSqlServer":
-                self.datasource = _AzureSqlServerSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using SQL Server")
-            
-            elif self.base_settings.datasource_type == "MongoDB":
-                self.datasource = _MongoDbSettings(settings=self, _env_file=DOTENV_PATH)
-                logging.debug("Using Mongo DB")
+            datasource = _DATASOURCE_SETTINGS.get(self.base_settings.datasource_type)
+            if datasource:
+                # Only the configured datasource's settings class is imported and validated
+                class_name, description = datasource
+                settings_class = getattr(import_module("backend.datasources"), class_name)
+                self.datasource = settings_class(settings=self, _env_file=DOTENV_PATH)
+                logging.debug(f"Using {description}")
                 
             else:
                 self.datasource = None
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.timing import span
+
+
+class StartupPipeline:
+    """Runs the worker warm-up steps concurrently and tracks readiness.
+
+    Notes:
+    - Steps are registered with `add_step` and run once from `before_serving`.
+    - Each step (and any sub-step timed with `measure`) records its duration in ms.
+    - A failing step does not stop the others; it is reported by `status()` and makes
+      the worker not ready, so health probes keep traffic away from it.
+    - The readiness event is created inside the running loop, not at import time.
+    """
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], Awaitable[None]]]] = []
+        self._ready_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.state = "pending"
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def add_step(self, name: str, fn: Callable[[], Awaitable[None]]):
+        self._steps.append((name, fn))
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def _event(self) -> asyncio.Event:
+        if self._ready_event is None:
+            self._ready_event = asyncio.Event()
+        return self._ready_event
+
+    @asynccontextmanager
+    async def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            with span(f"startup.{name}"):
+                yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _run_step(self, name: str, fn: Callable[[], Awaitable[None]]):
+        try:
+            async with self.measure(name):
+                await fn()
+            logging.info("Startup step '%s' completed in %.2fms", name, self.timings[name])
+        except Exception as e:
+            logging.exception("Startup step '%s' failed", name)
+            self.errors[name] = str(e)
+
+    async def _run(self):
+        self.state = "warming"
+        async with self.measure("total"):
+            await asyncio.gather(*(self._run_step(name, fn) for name, fn in self._steps))
+        self.state = "failed" if self.errors else "ready"
+        logging.info("Startup pipeline finished in %.2fms (%s)", self.timings["total"], self.state)
+        self._event().set()
+
+    async def run(self, timeout: Optional[float] = None):
+        """Run all steps, waiting at most `timeout` seconds before serving anyway.
+
+        If the timeout is hit the remaining steps keep running in the background and
+        routes that depend on them wait via `wait()`.
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            logging.warning("Startup pipeline still warming after %ss; serving while it completes", timeout)
+
+    async def wait(self):
+        """Wait until all steps have finished (successfully or not)."""
+        if self._task is None:
+            return
+        await self._event().wait()
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "timings_ms": dict(self.timings),
+            "errors": dict(self.errors),
+        }
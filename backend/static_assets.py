@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+from quart import request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+# Vite puts a hash of their content in the names of the files it writes to assets/
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# (Content-Encoding, suffix) of the variants written by the build, best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class _Asset:
+    __slots__ = ("mimetype", "variants")
+
+    def __init__(self, mimetype: str, variants: Dict[Optional[str], Tuple[str, str]]):
+        self.mimetype = mimetype
+        # Content-Encoding, None for the file itself -> (file path, strong ETag)
+        self.variants = variants
+
+
+def _etag(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+class StaticAssets:
+    """Serves the Vite bundle in `directory` with the precompressed variant the client accepts.
+
+    Every file, with its `.br` and `.gz` variants, is looked up and hashed for a strong
+    ETag on its first request only, so later requests cost a dict lookup and the send.
+    Responses can be cached for a year: a new build writes files with new names.
+    """
+
+    def __init__(self, directory: str, max_age: int = IMMUTABLE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self._assets: Dict[str, _Asset] = {}
+
+    def _load(self, path: str) -> Optional[_Asset]:
+        file_path = safe_join(self.directory, path)
+        if file_path is None or not os.path.isfile(file_path):
+            return None
+        variants = {None: (file_path, _etag(file_path))}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(file_path + suffix):
+                variants[encoding] = (file_path + suffix, f"{_etag(file_path + suffix)}-{encoding}")
+        mimetype = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        return _Asset(mimetype, variants)
+
+    async def send(self, path: str):
+        asset = self._assets.get(path)
+        if asset is None:
+            asset = await asyncio.to_thread(self._load, path)
+            if asset is None:
+                raise NotFound()
+            self._assets[path] = asset
+
+        encoding = None
+        accepted = request.accept_encodings
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and accepted[candidate]:
+                encoding = candidate
+                break
+        file_path, etag = asset.variants[encoding]
+
+        response = await send_file(file_path, mimetype=asset.mimetype, add_etags=False, cache_timeout=self.max_age)
+        response.cache_control.immutable = True
+        if len(asset.variants) > 1:
+            response.vary.add("Accept-Encoding")
+        if encoding:
+            response.content_encoding = encoding
+        response.set_etag(etag)
+        await response.make_conditional(request, accept_ranges=True, complete_length=response.content_length)
+        return response
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict
+
+from backend.utils import close_stream
+
+
+class StreamTracker:
+    """Counts streamed answers by outcome and closes their upstream when they end.
+
+    A client that disconnects mid-stream cancels the request task or closes the response
+    body; either way the tracked stream is closed right away instead of being read to
+    the end, and the abandoned answer is counted as cancelled.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.completed_total = 0
+        self.cancelled_total = 0
+        self.failed_total = 0
+
+    def track(self, stream: AsyncIterator) -> AsyncIterator:
+        async def tracked():
+            self.active += 1
+            chunks = 0
+            try:
+                async for chunk in stream:
+                    chunks += 1
+                    yield chunk
+                self.completed_total += 1
+            except (asyncio.CancelledError, GeneratorExit):
+                self.cancelled_total += 1
+                logging.info("Client disconnected after %d chunks, cancelling the upstream stream", chunks)
+                raise
+            except Exception:
+                self.failed_total += 1
+                raise
+            finally:
+                self.active -= 1
+                await close_stream(stream)
+
+        return tracked()
+
+    def snapshot(self) -> Dict:
+        return {
+            "active": self.active,
+            "completed_total": self.completed_total,
+            "cancelled_total": self.cancelled_total,
+            "failed_total": self.failed_total,
+        }
+
+
+def in_app_context(app, stream: AsyncIterator) -> AsyncIterator:
+    """Iterate `stream` inside an app context of `app`.
+
+    Quart sends a streamed body after the request's app context has been popped, so code
+    that runs mid-stream, such as the follow-up completion after a tool call, would
+    otherwise find no `current_app`.
+    """
+
+    async def contextual():
+        async with app.app_context():
+            try:
+                async for item in stream:
+                    yield item
+            finally:
+                await close_stream(stream)
+
+    return contextual()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from dataclasses import astuple, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from azure.cosmos import exceptions
+
+from backend.study_manager import StudyManager, StudyProfileKeys
+
+
+SUPPORTED_OPERATIONS = ("reset", "set_login_count", "mark_survey")
+# survey keys are path segments of the profile patch, so only the known ones are taken
+SURVEY_KEYS = astuple(StudyProfileKeys())
+
+
+@dataclass(frozen=True)
+class StudyAdminOperation:
+    op: str
+    login_count: Optional[int] = None
+    survey_key: Optional[str] = None
+    completed: bool = True
+
+    def __post_init__(self):
+        if self.op == "mark_survey" and self.survey_key not in SURVEY_KEYS:
+            raise ValueError(f"Unknown survey '{self.survey_key}'. Expected one of {', '.join(SURVEY_KEYS)}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StudyAdminOperation":
+        if not isinstance(data, dict):
+            raise TypeError("Each operation must be an object")
+        op = data.get("op")
+        if op not in SUPPORTED_OPERATIONS:
+            raise ValueError(f"Unsupported operation '{op}'. Expected one of {', '.join(SUPPORTED_OPERATIONS)}")
+
+        if op == "set_login_count":
+            count = data.get("login_count", data.get("count"))
+            if count is None:
+                raise ValueError("set_login_count requires login_count")
+            return cls(op=op, login_count=int(count))
+
+        if op == "mark_survey":
+            survey_key = data.get("survey") or data.get("surveyKey")
+            if not survey_key:
+                raise ValueError("mark_survey requires survey")
+            completed = data.get("completed", True)
+            if not isinstance(completed, bool):
+                raise ValueError("completed must be true or false")
+            return cls(op=op, survey_key=survey_key, completed=completed)
+
+        return cls(op=op)
+
+
+@dataclass
+class StudyAdminReport:
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class StudyCohortAdmin:
+    """Applies the same list of study operations to a cohort of users.
+
+    Notes:
+    - Every user is its own partition (`/userId`), so work is grouped per user.
+    - Operations are folded in memory first: a `reset` needs no read at all, and
+      `set_login_count`/`mark_survey` become a single `patch_item` on the profile.
+    - Legacy `metadata-{user_id}` documents used by StudyService are removed on reset.
+    """
+
+    def __init__(self, study_manager: StudyManager, max_concurrency: int = 16):
+        self.study_manager = study_manager
+        self.container_client = study_manager.container_client
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    async def apply(
+        self,
+        user_ids: Iterable[str],
+        operations: List[StudyAdminOperation],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> StudyAdminReport:
+        if not operations:
+            raise ValueError("At least one operation is required")
+
+        # Preserve order but drop duplicates so a user is never written twice concurrently.
+        unique_user_ids = list(dict.fromkeys(u for u in user_ids if u))
+        report = StudyAdminReport(total=len(unique_user_ids))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        done = 0
+
+        async def run(user_id: str):
+            nonlocal done
+            async with semaphore:
+                try:
+                    await self._apply_user(user_id, operations)
+                    report.succeeded += 1
+                except Exception as e:
+                    logging.exception("Bulk study operation failed for user %s", user_id)
+                    report.failed += 1
+                    report.errors[user_id] = str(e)
+                finally:
+                    done += 1
+                    if on_progress:
+                        on_progress(done, report.total)
+
+        await asyncio.gather(*(run(user_id) for user_id in unique_user_ids))
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    def _fold(self, operations: List[StudyAdminOperation]):
+        reset = False
+        login_count: Optional[int] = None
+        surveys: Dict[str, bool] = {}
+        for operation in operations:
+            if operation.op == "reset":
+                reset = True
+                login_count = None
+                surveys = {}
+            elif operation.op == "set_login_count":
+                login_count = operation.login_count
+            elif operation.op == "mark_survey":
+                surveys[operation.survey_key] = operation.completed
+
+        return reset, login_count, surveys
+
+    def _build_profile(self, user_id: str, login_count: Optional[int], surveys: Dict[str, bool]) -> Dict[str, Any]:
+        profile = self.study_manager._new_profile(user_id=user_id)
+        if login_count is not None:
+            profile["login_count"] = int(login_count)
+        profile["surveys"].update(surveys)
+        return profile
+
+    async def _apply_user(self, user_id: str, operations: List[StudyAdminOperation]):
+        reset, login_count, surveys = self._fold(operations)
+
+        if reset:
+            await self._delete_legacy_metadata(user_id)
+            profile = self._build_profile(user_id, login_count, surveys)
+            await self._execute(user_id, ("upsert", (profile,)))
+            return
+
+        patch_operations = [{"op": "set", "path": "/updated_at", "value": self.study_manager._now_iso()}]
+        if login_count is not None:
+            patch_operations.append({"op": "set", "path": "/login_count", "value": int(login_count)})
+        for survey_key, completed in surveys.items():
+            patch_operations.append({"op": "set", "path": f"/surveys/{survey_key}", "value": completed})
+
+        try:
+            await self._execute(user_id, ("patch", (self.study_manager._profile_id(user_id), patch_operations)))
+        except exceptions.CosmosResourceNotFoundError:
+            # No profile yet: create it with the requested state in one write.
+            profile = self._build_profile(user_id, login_count, surveys)
+            await self._execute(user_id, ("upsert", (profile,)))
+
+    async def _delete_legacy_metadata(self, user_id: str):
+        try:
+            await self.container_client.delete_item(item=f"metadata-{user_id}", partition_key=user_id)
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+
+    async def _execute(self, user_id: str, operation: tuple, attempts: int = 3):
+        for attempt in range(attempts):
+            try:
+                return await self._execute_single(user_id, operation)
+            except exceptions.CosmosHttpResponseError as e:
+                if getattr(e, "status_code", None) != 429 or attempt == attempts - 1:
+                    raise
+                try:
+                    retry_after_ms = int((getattr(e, "headers", {}) or {}).get("x-ms-retry-after-ms"))
+                except Exception:
+                    retry_after_ms = None
+                sleep_s = (retry_after_ms / 1000.0) if retry_after_ms else (0.5 * (attempt + 1))
+                logging.warning("CosmosDB 429 throttled during bulk study update; retrying in %.2fs", sleep_s)
+                await asyncio.sleep(sleep_s)
+
+    async def _execute_single(self, user_id: str, operation: tuple):
+        kind, args = operation
+        if kind == "upsert":
+            return await self.container_client.upsert_item(*args)
+        if kind == "patch":
+            item_id, patch_operations = args
+            return await self.container_client.patch_item(
+                item=item_id, partition_key=user_id, patch_operations=patch_operations
+            )
+        raise ValueError(f"Unsupported operation '{kind}'")
@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional
 
 from azure.cosmos import exceptions
 
+from backend.timing import timed
+
 
 @dataclass(frozen=True)
 class StudyProfileKeys:
@@ -33,6 +35,7 @@ class StudyManager:
     def _now_iso(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
+    @timed("study.read_profile")
     async def _read_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
             return await self.container_client.read_item(
@@ -41,6 +44,7 @@ class StudyManager:
         except exceptions.CosmosResourceNotFoundError:
             return None
 
+    @timed("study.upsert_profile_with_retry")
     async def _upsert_profile_with_retry(self, profile: Dict[str, Any], attempts: int = 3) -> Dict[str, Any]:
         last_exc: Optional[Exception] = None
         for attempt in range(attempts):
@@ -69,6 +73,7 @@ class StudyManager:
 
         raise last_exc or RuntimeError("Failed to upsert study profile")
 
+    @timed("study.delete_profile")
     async def _delete_profile(self, user_id: str) -> bool:
         try:
             await self.container_client.delete_item(
@@ -94,6 +99,7 @@ class StudyManager:
             },
         }
 
+    @timed("study.get_user_state")
     async def get_user_state(self, user_id: str, username: Optional[str] = None) -> Dict[str, Any]:
         """Fetch profile; if absent, create it with login_count=0."""
         profile = await self._read_profile(user_id)
@@ -103,6 +109,7 @@ class StudyManager:
         profile = self._new_profile(user_id=user_id, username=username)
         return await self._upsert_profile_with_retry(profile)
 
+    @timed("study.register_login")
     async def register_login(self, user_id: str, username: Optional[str] = None) -> Dict[str, Any]:
         """Increment login_count if last_login is older than 30 minutes."""
         profile = await self.get_user_state(user_id=user_id, username=username)
@@ -130,6 +137,7 @@ class StudyManager:
 
         return profile
 
+    @timed("study.set_survey_status")
     async def set_survey_status(self, user_id: str, survey_key: str, completed: bool) -> Dict[str, Any]:
         profile = await self.get_user_state(user_id=user_id)
         surveys = profile.get("surveys") or {}
@@ -138,6 +146,7 @@ class StudyManager:
         profile["updated_at"] = self._now_iso()
         return await self._upsert_profile_with_retry(profile)
 
+    @timed("study.debug_reset_user")
     async def debug_reset_user(self, user_id: str, username: Optional[str] = None, hard_delete: bool = True) -> Dict[str, Any]:
         """Reset the profile for development testing.
 
@@ -151,6 +160,7 @@ class StudyManager:
         profile = self._new_profile(user_id=user_id, username=username)
         return await self._upsert_profile_with_retry(profile)
 
+    @timed("study.debug_set_state")
     async def debug_set_state(
         self,
         user_id: str,
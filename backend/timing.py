@@ -0,0 +1,193 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import AsyncIterator, Dict, Optional, Sequence
+
+from backend import tracing
+
+TIMING_FRAME_HEADER = "X-Timing-Frame"
+
+_current: ContextVar[Optional["RequestTiming"]] = ContextVar("request_timing", default=None)
+logger = logging.getLogger("timing")
+
+
+class RequestTiming:
+    """Time spent per stage of one request, summed per span name.
+
+    Requests taking at least `log_threshold_ms` are logged when they finish; with
+    `log_threshold_ms=None` none are. The `listeners` (see `backend.metrics` and
+    `backend.tracing`) are also told about every span, every streamed answer and the
+    end of the request.
+    """
+
+    __slots__ = ("started", "spans", "streaming", "route", "log_threshold_ms", "listeners")
+
+    def __init__(self, route: str = "", log_threshold_ms: Optional[float] = 0.0, listeners: Sequence = ()):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, list] = {}
+        self.streaming = False
+        self.route = route
+        self.log_threshold_ms = log_threshold_ms
+        self.listeners = listeners
+
+    def add(self, name: str, duration_ms: float):
+        entry = self.spans.get(name)
+        if entry:
+            entry[0] += duration_ms
+            entry[1] += 1
+        else:
+            self.spans[name] = [duration_ms, 1]
+        for listener in self.listeners:
+            listener.span(name, duration_ms)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """The spans so far as a `Server-Timing` header value."""
+        metrics = []
+        for name, (duration_ms, count) in self.spans.items():
+            metric = f"{name};dur={duration_ms:.1f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(metrics)
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_ms": round(self.elapsed_ms(), 1),
+            "spans": {
+                name: {"ms": round(duration_ms, 1), "count": count}
+                for name, (duration_ms, count) in self.spans.items()
+            },
+        }
+
+    def finish(self, status: int):
+        elapsed_ms = self.elapsed_ms()
+        if self.log_threshold_ms is not None and elapsed_ms >= self.log_threshold_ms:
+            logger.info(json.dumps({"event": "request_timing", "route": self.route, "status": status, **self.to_dict()}))
+        for listener in self.listeners:
+            listener.finish(status, elapsed_ms)
+
+    def stream(self, stream: AsyncIterator[dict], frame: bool = False) -> AsyncIterator[dict]:
+        """Time a streamed answer, then finish the request once the stream is done.
+
+        Adds `ttft`, the time from the start of the request to the first chunk, and
+        `stream`, the time spent streaming. With `frame`, a last `{"timing": ...}`
+        object follows the answer.
+        """
+        self.streaming = True
+
+        async def timed_stream():
+            started = time.perf_counter()
+            chunks = 0
+            status = 200
+            for listener in self.listeners:
+                listener.stream_started()
+            try:
+                async for chunk in stream:
+                    if not chunks:
+                        self.add("ttft", self.elapsed_ms())
+                    chunks += 1
+                    yield chunk
+                self.add("stream", (time.perf_counter() - started) * 1000)
+                if frame:
+                    yield {"timing": self.to_dict()}
+            except BaseException:
+                status = 499
+                raise
+            finally:
+                for listener in self.listeners:
+                    listener.stream_finished(chunks)
+                self.finish(status)
+
+        return timed_stream()
+
+
+class _Span:
+    __slots__ = ("timing", "name", "started", "trace")
+
+    def __init__(self, timing: Optional[RequestTiming], name: str):
+        self.timing = timing
+        self.name = name
+        self.trace = None
+
+    def __enter__(self):
+        if tracing.tracer:
+            self.trace = tracing.tracer.start_as_current_span(self.name)
+            self.trace.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timing:
+            self.timing.add(self.name, (time.perf_counter() - self.started) * 1000)
+        if self.trace:
+            self.trace.__exit__(*exc_info)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def start(route: str = "", log_threshold_ms: Optional[float] = 0.0, listeners: Sequence = ()) -> RequestTiming:
+    timing = RequestTiming(route, log_threshold_ms, listeners)
+    _current.set(timing)
+    return timing
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def span(name: str):
+    """Time and trace a block (`with` or `async with`).
+
+    A no-op outside a timed request unless tracing is enabled.
+    """
+    timing = _current.get()
+    if timing is None and tracing.tracer is None:
+        return _NULL_SPAN
+    return _Span(timing, name)
+
+
+def timed(name: str):
+    """Time and trace every call of a coroutine function as the span `name`."""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            timing = _current.get()
+            if timing is None and tracing.tracer is None:
+                return await func(*args, **kwargs)
+            with _Span(timing, name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
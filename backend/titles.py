@@ -0,0 +1,49 @@
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+TITLE_PROMPT = {
+    "role": "user",
+    "content": "Summarize the conversation so far into a 4-word or less title. Do not use any quotation marks or punctuation. Do not include any other commentary or description.",
+}
+TITLE_MAX_WORDS = 4
+DEFAULT_TITLE = "New conversation"
+
+_WORD = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+
+
+def fallback_title(conversation_messages: List[dict], max_words: int = TITLE_MAX_WORDS) -> str:
+    """Deterministic title from the first words of the user's first question."""
+    for message in conversation_messages:
+        if message.get("role") == "user" and isinstance(message.get("content"), str):
+            words = _WORD.findall(message["content"])
+            if words:
+                title = " ".join(words[:max_words])
+                return title[0].upper() + title[1:]
+    return DEFAULT_TITLE
+
+
+class TitleCache:
+    """LRU cache of generated titles, keyed by the messages they were generated from."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._titles: "OrderedDict[Tuple, str]" = OrderedDict()
+
+    @staticmethod
+    def key(conversation_messages: List[dict]) -> Tuple:
+        return tuple((msg["role"], str(msg["content"]).strip()) for msg in conversation_messages)
+
+    def get(self, key: Tuple) -> Optional[str]:
+        title = self._titles.get(key)
+        if title is not None:
+            self._titles.move_to_end(key)
+        return title
+
+    def put(self, key: Tuple, title: str):
+        if self.max_size <= 0:
+            return
+        self._titles[key] = title
+        self._titles.move_to_end(key)
+        while len(self._titles) > self.max_size:
+            self._titles.popitem(last=False)
@@ -0,0 +1,105 @@
+import logging
+import os
+from typing import Dict, Mapping
+
+# opentelemetry is only imported when tracing is enabled; `tracer` stays None otherwise
+# and `backend.timing` spans are not traced.
+tracer = None
+_provider = None
+
+
+def _exporter(settings):
+    if settings.exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter()
+    if settings.exporter == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        # one JSON span per line; with {pid} in the path each worker writes its own file
+        out = open(settings.file_path.format(pid=os.getpid()), "a", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+
+    # endpoint, headers and timeout come from the OTEL_EXPORTER_OTLP_* environment variables
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter()
+
+
+def init_tracing(settings):
+    """Trace this worker: sample `settings.sample_ratio` of new traces, follow the
+    sampling decision of incoming `traceparent` headers, and batch the spans to the
+    configured exporter."""
+    global tracer, _provider
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter(settings)))
+    tracer = _provider.get_tracer("backend")
+    logging.info("Tracing %.0f%% of requests to the %s exporter", settings.sample_ratio * 100, settings.exporter)
+    return tracer
+
+
+def shutdown_tracing():
+    global tracer, _provider
+    if _provider:
+        _provider.shutdown()
+    tracer = None
+    _provider = None
+
+
+def start_request_trace(method: str, route: str, headers: Mapping) -> "RequestTrace":
+    """Start the server span of a request and make it the parent of the request's spans."""
+    from opentelemetry import context, propagate, trace
+
+    span = tracer.start_span(
+        f"{method} {route}",
+        context=propagate.extract(headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.request.method": method, "http.route": route},
+    )
+    # the request's task ends with the request, taking the attached context with it
+    context.attach(trace.set_span_in_context(span))
+    return RequestTrace(span)
+
+
+def inject_trace_context(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the `traceparent` of the current span to outgoing request headers."""
+    if tracer:
+        from opentelemetry import propagate
+
+        propagate.inject(headers)
+    return headers
+
+
+class RequestTrace:
+    """Listener of one request's `backend.timing.RequestTiming` that ends its server span."""
+
+    __slots__ = ("server_span",)
+
+    def __init__(self, server_span):
+        self.server_span = server_span
+
+    def span(self, name: str, duration_ms: float):
+        if name == "ttft":
+            self.server_span.add_event("first_chunk")
+
+    def stream_started(self):
+        pass
+
+    def stream_finished(self, chunks: int):
+        self.server_span.set_attribute("chat.stream.chunks", chunks)
+
+    def finish(self, status: int, duration_ms: float):
+        from opentelemetry.trace import Status, StatusCode
+
+        self.server_span.set_attribute("http.response.status_code", status)
+        if status >= 500:
+            self.server_span.set_status(Status(StatusCode.ERROR))
+        self.server_span.end()
@@ -1,11 +1,12 @@
 import os
 import json
 import logging
-import requests
 import dataclasses
 
 from typing import List
 
+from backend.json_provider import dumps_bytes
+
 DEBUG = os.environ.get("DEBUG", "false")
 if DEBUG.lower() == "true":
     logging.basicConfig(level=logging.DEBUG)
@@ -22,13 +23,26 @@ class JSONEncoder(json.JSONEncoder):
         return super().default(o)
 
 
+async def close_stream(stream):
+    """Close an async generator or an OpenAI response stream, releasing its connection."""
+    close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+    if close:
+        try:
+            await close()
+        except Exception:
+            logging.debug("Error while closing stream", exc_info=True)
+
+
 async def format_as_ndjson(r):
     try:
         async for event in r:
-            yield json.dumps(event, cls=JSONEncoder) + "\n"
+            yield dumps_bytes(event) + b"\n"
     except Exception as error:
         logging.exception("Exception while generating response stream: %s", error)
-        yield json.dumps({"error": str(error)})
+        yield dumps_bytes({"error": str(error)})
+    finally:
+        # Also runs when the client disconnects, so the upstream stream is not left open
+        await close_stream(r)
 
 
 def parse_multi_columns(columns: str) -> list:
@@ -45,6 +59,9 @@ def fetchUserGroups(userToken, nextLink=None):
     else:
         endpoint = "https://graph.microsoft.com/v1.0/me/transitiveMemberOf?$select=id"
 
+    # requests is only needed for document-level access control, so import it on first use
+    import requests
+
     headers = {"Authorization": "bearer " + userToken}
     try:
         r = requests.get(endpoint, headers=headers)
@@ -0,0 +1,56 @@
+import os
+import random
+import resource
+import signal
+import sys
+
+from uvicorn.workers import UvicornWorker
+
+
+def get_rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class IoBoundUvicornWorker(UvicornWorker):
+    """Uvicorn worker for the `io-bound` gunicorn profile.
+
+    Notes:
+    - gunicorn's `worker_connections` caps concurrent connections per worker; beyond it
+      uvicorn answers 503 instead of queueing work the worker cannot keep up with.
+    - Workers are recycled when their RSS exceeds GUNICORN_WORKER_MAX_MEMORY_MB rather than
+      after a fixed number of requests. Recycling sends the worker SIGTERM, so in-flight
+      streams finish before it exits and the arbiter forks a replacement.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.limit_concurrency = self.cfg.worker_connections or None
+        # Up to 10% jitter so workers that grow at the same rate are not all recycled at once
+        max_memory_mb = float(os.environ.get("GUNICORN_WORKER_MAX_MEMORY_MB", "1024"))
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024 * random.uniform(1.0, 1.1))
+        self._recycling = False
+
+        # callback_notify doubles as the memory check, so run it at least this often
+        memory_check_interval = float(os.environ.get("GUNICORN_WORKER_MEMORY_CHECK_INTERVAL", "15"))
+        self.config.timeout_notify = min(self.config.timeout_notify, memory_check_interval)
+
+    async def callback_notify(self) -> None:
+        self.notify()
+        if not self.max_memory_bytes or self._recycling:
+            return
+
+        rss = get_rss_bytes()
+        if rss > self.max_memory_bytes:
+            self._recycling = True
+            self.log.info(
+                "Worker %s RSS %.0fMB exceeds %.0fMB; recycling after in-flight requests finish",
+                self.pid, rss / 1024 / 1024, self.max_memory_bytes / 1024 / 1024,
+            )
+            os.kill(self.pid, signal.SIGTERM)
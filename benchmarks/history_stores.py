@@ -0,0 +1,125 @@
+"""Latency of the chat history operations per conversation store.
+
+Replays the operations behind the /history/* routes (create a conversation, append
+messages, list conversations, read a conversation's messages, send feedback) for a
+number of simulated users against each store and reports p50/p95/p99 per operation.
+The SQLite store always runs, on a temporary file unless --sqlite-path is given; Cosmos
+DB runs too when AZURE_COSMOSDB_ACCOUNT, AZURE_COSMOSDB_DATABASE,
+AZURE_COSMOSDB_CONVERSATIONS_CONTAINER (and AZURE_COSMOSDB_ACCOUNT_KEY, or an Entra ID
+identity) are set.
+
+    python benchmarks/history_stores.py --users 20 --conversations 5 --messages 6
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from backend.history.sqlite_store import SqliteConversationStore  # noqa: E402
+
+
+def cosmos_store():
+    account = os.environ.get("AZURE_COSMOSDB_ACCOUNT")
+    database = os.environ.get("AZURE_COSMOSDB_DATABASE")
+    container = os.environ.get("AZURE_COSMOSDB_CONVERSATIONS_CONTAINER")
+    if not (account and database and container):
+        return None
+
+    from backend.history.cosmosdbservice import CosmosConversationClient
+
+    credential = os.environ.get("AZURE_COSMOSDB_ACCOUNT_KEY")
+    if not credential:
+        from azure.identity.aio import DefaultAzureCredential
+
+        credential = DefaultAzureCredential()
+
+    return CosmosConversationClient(
+        cosmosdb_endpoint=f"https://{account}.documents.azure.com:443/",
+        credential=credential,
+        database_name=database,
+        container_name=container,
+        enable_message_feedback=True,
+    )
+
+
+async def run_user(store, user_id, args, timings):
+    async def timed(operation, call):
+        started = time.perf_counter()
+        result = await call
+        timings[operation].append((time.perf_counter() - started) * 1000)
+        return result
+
+    for _ in range(args.conversations):
+        conversation = await timed("create_conversation", store.create_conversation(user_id, "Benchmark"))
+        message_ids = []
+        for turn in range(args.messages):
+            message_id = str(uuid.uuid4())
+            role = "user" if turn % 2 == 0 else "assistant"
+            await timed("create_message", store.create_message(
+                message_id, conversation["id"], user_id, {"role": role, "content": "x" * args.message_size}
+            ))
+            message_ids.append(message_id)
+        await timed("get_conversations", store.get_conversations(user_id, limit=25, offset=0))
+        await timed("get_conversation", store.get_conversation(user_id, conversation["id"]))
+        await timed("get_messages", store.get_messages(user_id, conversation["id"]))
+        await timed("update_message_feedback", store.update_message_feedback(user_id, message_ids[-1], "positive"))
+
+    for conversation in await store.get_conversations(user_id, limit=None):
+        await timed("delete_messages", store.delete_messages(conversation["id"], user_id))
+        await timed("delete_conversation", store.delete_conversation(user_id, conversation["id"]))
+
+
+async def run_store(name, store, args):
+    await store.warm_up(measure_nothing)
+    timings = defaultdict(list)
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        run_user(store, f"benchmark-{uuid.uuid4()}", args, timings) for _ in range(args.users)
+    ])
+    elapsed = time.perf_counter() - started
+    await store.close()
+
+    operations = sum(len(samples) for samples in timings.values())
+    print(f"\n{name}: {operations} operations in {elapsed:.2f}s ({operations / elapsed:.0f} ops/s)")
+    print(f"{'operation':<26}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for operation, samples in timings.items():
+        quantiles = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+        print(f"{operation:<26}{len(samples):>7}{quantiles[49]:>9.2f}{quantiles[94]:>9.2f}{quantiles[98]:>9.2f}")
+
+
+@asynccontextmanager
+async def measure_nothing(name):
+    yield
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--conversations", type=int, default=5, help="conversations per user")
+    parser.add_argument("--messages", type=int, default=6, help="messages per conversation")
+    parser.add_argument("--message-size", type=int, default=400, help="characters per message")
+    parser.add_argument("--sqlite-path", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_path = args.sqlite_path or os.path.join(directory, "chat_history.db")
+        await run_store("sqlite", SqliteConversationStore(sqlite_path, enable_message_feedback=True), args)
+
+    cosmos = cosmos_store()
+    if cosmos:
+        await run_store("cosmosdb", cosmos, args)
+    else:
+        print("\ncosmosdb: skipped, AZURE_COSMOSDB_* is not configured")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
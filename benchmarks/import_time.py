@@ -0,0 +1,93 @@
+"""Import-time profile of the Quart app.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters and reports the
+median cold import time plus the modules that contribute most to it. Exits non-zero
+when the median exceeds --target-ms so it can be used as a regression check.
+
+    python benchmarks/import_time.py --runs 5 --top 20 --target-ms 1000
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Minimal settings so app.py can be imported without a .env file
+DEFAULT_ENV = {
+    "AZURE_OPENAI_MODEL": "benchmark",
+    "AZURE_OPENAI_ENDPOINT": "https://benchmark.openai.azure.com",
+    "AZURE_OPENAI_KEY": "benchmark",
+}
+
+
+def run_once(module, env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return wall_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=2, help="Only list modules up to this nesting depth.")
+    parser.add_argument("--target-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    env = {**DEFAULT_ENV, **os.environ, "PYTHONPATH": ROOT}
+    # The first run warms the filesystem and bytecode caches and is discarded
+    run_once(args.module, env)
+
+    wall_times, import_times = [], []
+    cumulative = defaultdict(list)
+    for _ in range(args.runs):
+        wall_ms, modules = run_once(args.module, env)
+        wall_times.append(wall_ms)
+        for name, depth, _self_us, cumulative_us in modules:
+            if name == args.module and depth == 0:
+                import_times.append(cumulative_us / 1000)
+            if depth <= args.depth:
+                cumulative[(name, depth)].append(cumulative_us / 1000)
+
+    median_import = statistics.median(import_times)
+    print(f"import {args.module}: median {median_import:.1f}ms over {args.runs} runs "
+          f"(process wall clock {statistics.median(wall_times):.1f}ms)")
+    print()
+    print(f"{'cumulative ms':>14}  module")
+    ranked = sorted(cumulative.items(), key=lambda item: -statistics.median(item[1]))
+    for (name, depth), times in ranked[:args.top]:
+        print(f"{statistics.median(times):14.1f}  {'  ' * depth}{name}")
+
+    if args.target_ms is not None:
+        print()
+        if median_import > args.target_ms:
+            print(f"FAIL: median import {median_import:.1f}ms exceeds target {args.target_ms:.0f}ms")
+            sys.exit(1)
+        print(f"OK: median import {median_import:.1f}ms within target {args.target_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
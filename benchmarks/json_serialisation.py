@@ -0,0 +1,126 @@
+"""Serialisation throughput of the JSON payloads the API returns.
+
+Compares the json module with `backend.utils.JSONEncoder`, as the app used before, to
+`backend.json_provider.dumps_bytes` on payloads shaped like the busiest endpoints:
+the NDJSON chunks of a streamed answer, a /history/list page and a /history/read
+conversation with citation contexts. Also times parsing a /conversation request body.
+
+    python benchmarks/json_serialisation.py --messages 30 --citations 5 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import orjson  # noqa: E402
+
+from backend.json_provider import dumps_bytes  # noqa: E402
+from backend.utils import JSONEncoder  # noqa: E402
+
+CREATED_AT = "2024-05-01T12:00:00.000000"
+
+
+def context(citations):
+    return {
+        "citations": [
+            {
+                "content": "Eligible households receive support for the first six months. " * 20,
+                "title": f"Program guide {i}",
+                "url": f"https://contoso.blob.core.windows.net/docs/guide-{i}.pdf",
+                "filepath": f"guide-{i}.pdf",
+                "chunk_id": str(i),
+            }
+            for i in range(citations)
+        ],
+        "intent": "[\"housing support eligibility\"]",
+    }
+
+
+def stream_chunks(tokens):
+    chunk_id = str(uuid.uuid4())
+    return [
+        {
+            "id": chunk_id,
+            "model": "gpt-4o",
+            "created": 1714564800,
+            "object": "extensions.chat.completion.chunk",
+            "choices": [{"messages": [{"role": "assistant", "content": "word "}]}],
+            "history_metadata": {"conversation_id": chunk_id},
+            "apim-request-id": chunk_id,
+        }
+        for _ in range(tokens)
+    ]
+
+
+def history_list(conversations):
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "type": "conversation",
+            "createdAt": CREATED_AT,
+            "updatedAt": CREATED_AT,
+            "userId": "00000000-0000-0000-0000-000000000000",
+            "title": "Housing support eligibility",
+        }
+        for _ in range(conversations)
+    ]
+
+
+def conversation(messages, citations):
+    result = []
+    for i in range(messages):
+        result.append({"id": str(uuid.uuid4()), "role": "user", "content": "Who is eligible?", "createdAt": CREATED_AT})
+        result.append({"id": str(uuid.uuid4()), "role": "tool", "content": json.dumps(context(citations)), "createdAt": CREATED_AT})
+        result.append({
+            "id": str(uuid.uuid4()), "role": "assistant", "content": "Households with children are eligible [doc1]. " * 5,
+            "createdAt": CREATED_AT, "feedback": None,
+        })
+    return {"conversation_id": str(uuid.uuid4()), "messages": result}
+
+
+def throughput(fn, items, repeat):
+    size = sum(len(fn(item)) for item in items)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    elapsed = time.perf_counter() - started
+    return repeat * len(items) / elapsed, repeat * size / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=30, help="Turns of the /history/read conversation")
+    parser.add_argument("--citations", type=int, default=5, help="Citations per answer")
+    parser.add_argument("--tokens", type=int, default=500, help="Chunks of the streamed answer")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = {
+        "stream chunk": stream_chunks(args.tokens),
+        "history/list": [history_list(50)],
+        "history/read": [conversation(args.messages, args.citations)],
+    }
+    stdlib = lambda obj: json.dumps(obj, cls=JSONEncoder).encode()  # noqa: E731
+
+    print(f"{'payload':<16}{'encoder':<10}{'ops/s':>12}{'MB/s':>9}{'speedup':>9}")
+    for name, items in payloads.items():
+        base_ops, base_mb = throughput(stdlib, items, args.repeat)
+        fast_ops, fast_mb = throughput(dumps_bytes, items, args.repeat)
+        print(f"{name:<16}{'json':<10}{base_ops:>12.0f}{base_mb:>9.1f}")
+        print(f"{'':<16}{'orjson':<10}{fast_ops:>12.0f}{fast_mb:>9.1f}{fast_ops / base_ops:>8.1f}x")
+
+    body = json.dumps({"messages": conversation(args.messages, args.citations)["messages"]}).encode()
+    base_ops, base_mb = throughput(lambda _: json.loads(body) and body, [None], args.repeat)
+    fast_ops, fast_mb = throughput(lambda _: orjson.loads(body) and body, [None], args.repeat)
+    print(f"{'request body':<16}{'json':<10}{base_ops:>12.0f}{base_mb:>9.1f}")
+    print(f"{'':<16}{'orjson':<10}{fast_ops:>12.0f}{fast_mb:>9.1f}{fast_ops / base_ops:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""End-to-end load test of the streaming chat paths against a mock Azure OpenAI deployment.
+
+For each scenario, starts gunicorn with gunicorn.conf.py against benchmarks/mock_aoai.py
+(chat history in the in-memory store), drives it with a fixed number of concurrent
+virtual users, each signed in as its own user, and reports throughput, time to first
+token, inter-chunk latency, errors and per-worker RSS.
+
+Scenarios:
+  conversation      POST /conversation, streamed
+  citations         POST /conversation with On Your Data, so every answer carries a context with citations
+  tools             POST /conversation with Azure Functions tools: a streamed tool call, the tool, then the answer
+  history_generate  POST /history/generate, a new conversation per request (answer and title)
+  history_update    POST /history/update, saving an answer to an existing conversation
+
+    python benchmarks/load_test.py --scenarios conversation history_generate --concurrency 32 --duration 30
+    python benchmarks/load_test.py --scenarios conversation --output results.json --ttft-ms 200 --throttle-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from worker_profiles import ROOT, child_pids, free_port, rss_mb, wait_ready
+
+QUESTION = "What programs are available?"
+
+
+def scenario_env(scenario, mock_url):
+    env = {
+        "AZURE_OPENAI_ENDPOINT": mock_url,
+        "AZURE_OPENAI_KEY": "benchmark",
+        "AZURE_OPENAI_MODEL": "benchmark",
+        "AZURE_OPENAI_STREAM": "true",
+        "CHAT_HISTORY_STORE": "memory",
+    }
+    if scenario == "citations":
+        # the app only builds the data source payload; the mock answers with the citations
+        env.update({
+            "DATASOURCE_TYPE": "AzureCognitiveSearch",
+            "AZURE_SEARCH_SERVICE": "benchmark",
+            "AZURE_SEARCH_INDEX": "benchmark",
+            "AZURE_SEARCH_KEY": "benchmark",
+        })
+    if scenario == "tools":
+        env.update({
+            "AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_ENABLED": "true",
+            "AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_TOOLS_BASE_URL": f"{mock_url}/api/tools",
+            "AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_TOOLS_KEY": "benchmark",
+            "AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_TOOL_BASE_URL": f"{mock_url}/api/tool",
+            "AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_TOOL_KEY": "benchmark",
+        })
+    return env
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.ttfts = []
+        self.gaps = []
+        self.chunks = 0
+        self.statuses = Counter()
+
+    def record_stream(self, started, arrivals, status):
+        self.statuses[status] += 1
+        if status != 200:
+            return
+        self.latencies.append(time.perf_counter() - started)
+        if arrivals:
+            self.ttfts.append(arrivals[0] - started)
+            self.gaps.extend(b - a for a, b in zip(arrivals, arrivals[1:]))
+            self.chunks += len(arrivals)
+
+
+async def read_answer(response):
+    """Arrival times of the NDJSON lines carrying answer content."""
+    arrivals = []
+    async for line in response.aiter_lines():
+        if not line.strip():
+            continue
+        arrived = time.perf_counter()
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        choices = payload.get("choices") or [{}]
+        if any(m.get("role") == "assistant" and m.get("content") for m in choices[0].get("messages", [])):
+            arrivals.append(arrived)
+    return arrivals
+
+
+async def virtual_user(client, base_url, scenario, stop_at, results):
+    headers = {"X-Ms-Client-Principal-Id": str(uuid.uuid4()), "X-Ms-Client-Principal-Name": "load-test"}
+    conversation_id = None
+    if scenario == "history_update":
+        conversation_id = await create_conversation(client, base_url, headers)
+
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            if scenario == "history_update":
+                response = await client.post(f"{base_url}/history/update", headers=headers, json={
+                    "conversation_id": conversation_id,
+                    "messages": [
+                        {"id": str(uuid.uuid4()), "role": "user", "content": QUESTION},
+                        {"id": str(uuid.uuid4()), "role": "assistant", "content": "token " * 200},
+                    ],
+                })
+                results.record_stream(started, [time.perf_counter()], response.status_code)
+                continue
+
+            path = "/history/generate" if scenario == "history_generate" else "/conversation"
+            body = {"messages": [{"id": str(uuid.uuid4()), "role": "user", "content": QUESTION}]}
+            async with client.stream("POST", f"{base_url}{path}", headers=headers, json=body) as response:
+                arrivals = await read_answer(response) if response.status_code == 200 else []
+                if response.status_code != 200:
+                    await response.aread()
+                results.record_stream(started, arrivals, response.status_code)
+        except httpx.HTTPError as e:
+            results.statuses[type(e).__name__] += 1
+
+
+async def create_conversation(client, base_url, headers):
+    body = {"messages": [{"id": str(uuid.uuid4()), "role": "user", "content": QUESTION}]}
+    async with client.stream("POST", f"{base_url}/history/generate", headers=headers, json=body) as response:
+        async for line in response.aiter_lines():
+            if line.strip():
+                metadata = json.loads(line).get("history_metadata") or {}
+                if metadata.get("conversation_id"):
+                    return metadata["conversation_id"]
+    raise RuntimeError("/history/generate did not return a conversation id")
+
+
+async def drive(base_url, scenario, concurrency, duration, master_pid=None):
+    results = Results()
+    memory_samples = []
+    stop_at = time.monotonic() + duration
+
+    async def sample_memory():
+        while master_pid and time.monotonic() < stop_at:
+            memory_samples.append([rss_mb(pid) for pid in child_pids(master_pid)])
+            await asyncio.sleep(0.5)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await asyncio.gather(
+            sample_memory(), *(virtual_user(client, base_url, scenario, stop_at, results) for _ in range(concurrency))
+        )
+
+    return summarize(scenario, results, duration, memory_samples)
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def summarize(scenario, results, duration, memory_samples):
+    ms = 1000
+    return {
+        "scenario": scenario,
+        "requests_per_s": round(len(results.latencies) / duration, 2),
+        "chunks_per_s": round(results.chunks / duration, 1),
+        "ttft_p50_ms": round(percentile(results.ttfts, 50) * ms, 1),
+        "ttft_p95_ms": round(percentile(results.ttfts, 95) * ms, 1),
+        "inter_chunk_p50_ms": round(percentile(results.gaps, 50) * ms, 2),
+        "inter_chunk_p95_ms": round(percentile(results.gaps, 95) * ms, 2),
+        "inter_chunk_p99_ms": round(percentile(results.gaps, 99) * ms, 2),
+        "latency_p50_ms": round(statistics.median(results.latencies) * ms, 1) if results.latencies else 0.0,
+        "latency_p95_ms": round(percentile(results.latencies, 95) * ms, 1),
+        "statuses": dict(results.statuses),
+        "workers": max((len(sample) for sample in memory_samples), default=0),
+        "peak_worker_rss_mb": round(max((max(sample, default=0) for sample in memory_samples), default=0.0), 1),
+        "peak_total_rss_mb": round(max((sum(sample) for sample in memory_samples), default=0.0), 1),
+    }
+
+
+async def run_scenario(scenario, args, mock_url):
+    if args.url:
+        return await drive(args.url, scenario, args.concurrency, args.duration)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, **scenario_env(scenario, mock_url), "PYTHONPATH": ROOT}
+    if args.workers:
+        env["GUNICORN_WORKERS"] = str(args.workers)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(base_url)
+        return await drive(base_url, scenario, args.concurrency, args.duration, server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=["conversation", "history_generate", "history_update"],
+                        choices=["conversation", "citations", "tools", "history_generate", "history_update"])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=None, help="GUNICORN_WORKERS for the app")
+    parser.add_argument("--url", default=None,
+                        help="load an already running app instead (its settings must match the scenario; no RSS)")
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--citations", type=int, default=5)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the app's logs")
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "mock_aoai.py"), "--port", str(mock_port),
+         "--ttft-ms", str(args.ttft_ms), "--tokens", str(args.tokens), "--tokens-per-second", str(args.tokens_per_second),
+         "--citations", str(args.citations), "--throttle-rate", str(args.throttle_rate)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        results = [await run_scenario(scenario, args, f"http://127.0.0.1:{mock_port}") for scenario in args.scenarios]
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+    print(f"{'scenario':<17} {'req/s':>7} {'chunk/s':>8} {'TTFT p50':>9} {'TTFT p95':>9} {'gap p50':>8} "
+          f"{'gap p95':>8} {'gap p99':>8} {'p95 ms':>8} {'worker RSS MB':>14}  statuses")
+    for r in results:
+        print(f"{r['scenario']:<17} {r['requests_per_s']:>7.1f} {r['chunks_per_s']:>8.0f} {r['ttft_p50_ms']:>9.0f} "
+              f"{r['ttft_p95_ms']:>9.0f} {r['inter_chunk_p50_ms']:>8.1f} {r['inter_chunk_p95_ms']:>8.1f} "
+              f"{r['inter_chunk_p99_ms']:>8.1f} {r['latency_p95_ms']:>8.0f} {r['peak_worker_rss_mb']:>14.0f}  {r['statuses']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,225 @@
+"""Local stand-in for an Azure OpenAI chat completions deployment.
+
+Answers `POST /openai/deployments/<deployment>/chat/completions` with either a JSON
+completion or an SSE stream, after a configurable time-to-first-token and at a
+configurable token rate, so the app can be load tested without a real deployment.
+Requests with `data_sources` (On Your Data) get a `context` with citations first;
+requests offering `tools` are answered with a streamed tool call, which the app runs
+against the Azure Functions stand-in at `GET /api/tools` and `POST /api/tool`. A
+fraction of requests can be throttled with a 429 and `retry-after-ms`.
+
+    python benchmarks/mock_aoai.py --port 8100 --ttft-ms 300 --tokens 200 --tokens-per-second 80
+
+Point the app at it with AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8100 and any AZURE_OPENAI_KEY.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from aiohttp import web
+
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "search_programs",
+        "description": "Searches the program catalog",
+        "parameters": {
+            "type": "object",
+            "properties": {"query": {"type": "string"}},
+            "required": ["query"],
+        },
+    },
+}]
+
+
+@dataclass
+class MockSettings:
+    ttft_ms: float = 300.0
+    tokens: int = 200
+    tokens_per_second: float = 80.0
+    citations: int = 5
+    citation_chars: int = 1500
+    throttle_rate: float = 0.0
+    retry_after_ms: int = 1000
+    seed: int = 0
+
+
+def _completion_id():
+    return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+
+def _chunk(completion_id, model, delta, finish_reason=None):
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def _context(settings: MockSettings, query: str):
+    return {
+        "citations": [
+            {
+                "content": f"Document {i} about {query}. " + "lorem ipsum " * (settings.citation_chars // 12),
+                "title": f"Document {i}",
+                "url": f"https://contoso.example/docs/{i}",
+                "filepath": f"doc-{i}.md",
+                "chunk_id": "0",
+            }
+            for i in range(settings.citations)
+        ],
+        "intent": json.dumps([query]),
+    }
+
+
+def _throttled(settings: MockSettings):
+    return web.json_response(
+        {"error": {"code": "429", "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit."}},
+        status=429,
+        headers={
+            "retry-after-ms": str(settings.retry_after_ms),
+            "retry-after": str(max(1, settings.retry_after_ms // 1000)),
+            "x-ratelimit-remaining-tokens": "0",
+        },
+    )
+
+
+async def chat_completions(request: web.Request):
+    settings: MockSettings = request.app["settings"]
+    stats = request.app["stats"]
+    body = await request.json()
+    stats["requests"] += 1
+    if settings.throttle_rate and request.app["random"].random() < settings.throttle_rate:
+        stats["throttled"] += 1
+        return _throttled(settings)
+
+    model = request.match_info["deployment"]
+    completion_id = _completion_id()
+    token_interval = 1.0 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0
+    query = next((m.get("content") for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "") or ""
+    context = _context(settings, query[:100]) if body.get("data_sources") else None
+    # offered tools are called once; the follow-up request carrying the result gets the answer
+    tool_call = None
+    if body.get("tools") and body["messages"][-1].get("role") == "user":
+        tool_call = {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "name": body["tools"][0]["function"]["name"],
+            "arguments": json.dumps({"query": query[:100]}),
+        }
+
+    await asyncio.sleep(settings.ttft_ms / 1000)
+
+    if not body.get("stream"):
+        await asyncio.sleep(token_interval * settings.tokens)
+        message = {"role": "assistant", "content": " ".join(["token"] * settings.tokens)}
+        if tool_call:
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["name"], "arguments": tool_call["arguments"]},
+            }]}
+        elif context:
+            message["context"] = context
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": settings.tokens, "total_tokens": settings.tokens},
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "apim-request-id": str(uuid.uuid4())})
+    await response.prepare(request)
+
+    async def send(payload):
+        await response.write(f"data: {json.dumps(payload)}\n\n".encode())
+
+    if tool_call:
+        arguments = tool_call["arguments"]
+        await send(_chunk(completion_id, model, {"role": "assistant", "content": None, "tool_calls": [{
+            "index": 0, "id": tool_call["id"], "type": "function", "function": {"name": tool_call["name"], "arguments": ""},
+        }]}))
+        for start in range(0, len(arguments), 8):
+            await send(_chunk(completion_id, model, {"tool_calls": [{
+                "index": 0, "function": {"arguments": arguments[start:start + 8]},
+            }]}))
+            if token_interval:
+                await asyncio.sleep(token_interval)
+        await send(_chunk(completion_id, model, {}, finish_reason="tool_calls"))
+    else:
+        first = {"role": "assistant", "content": ""}
+        if context:
+            first["context"] = context
+        await send(_chunk(completion_id, model, first))
+        for _ in range(settings.tokens):
+            await send(_chunk(completion_id, model, {"content": "token "}))
+            if token_interval:
+                await asyncio.sleep(token_interval)
+        await send(_chunk(completion_id, model, {}, finish_reason="stop"))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def list_tools(request: web.Request):
+    return web.json_response(TOOLS)
+
+
+async def call_tool(request: web.Request):
+    body = await request.json()
+    request.app["stats"]["tool_calls"] += 1
+    return web.Response(text=json.dumps({"tool": body.get("tool_name"), "results": ["Program A", "Program B"]}))
+
+
+async def stats(request: web.Request):
+    return web.json_response(request.app["stats"])
+
+
+def create_mock_app(settings: MockSettings) -> web.Application:
+    app = web.Application()
+    app["settings"] = settings
+    app["random"] = random.Random(settings.seed)
+    app["stats"] = {"requests": 0, "throttled": 0, "tool_calls": 0}
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    app.router.add_get("/api/tools", list_tools)
+    app.router.add_post("/api/tool", call_tool)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--citations", type=int, default=5, help="citations in the context of On Your Data requests")
+    parser.add_argument("--citation-chars", type=int, default=1500)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--retry-after-ms", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        ttft_ms=args.ttft_ms,
+        tokens=args.tokens,
+        tokens_per_second=args.tokens_per_second,
+        citations=args.citations,
+        citation_chars=args.citation_chars,
+        throttle_rate=args.throttle_rate,
+        retry_after_ms=args.retry_after_ms,
+        seed=args.seed,
+    )
+    web.run_app(create_mock_app(settings), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
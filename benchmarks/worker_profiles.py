@@ -0,0 +1,167 @@
+"""Throughput/memory comparison of the gunicorn worker profiles.
+
+For each profile, starts gunicorn with gunicorn.conf.py against a local mock Azure
+OpenAI deployment (benchmarks/mock_aoai.py), drives /conversation with a fixed number of
+concurrent clients and reports requests/s, latency percentiles and worker memory.
+
+    python benchmarks/worker_profiles.py --profiles default io-bound --concurrency 64 --duration 30
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_pids(parent_pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # the process name may contain spaces, so split after its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == parent_pid:
+                children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+async def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"{base_url}/healthz/ready")
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{base_url} did not become ready within {timeout}s")
+
+
+async def drive_load(base_url, concurrency, duration, master_pid):
+    latencies, errors = [], 0
+    memory_samples = []
+    stop_at = time.monotonic() + duration
+    body = {"messages": [{"role": "user", "content": "What programs are available?"}]}
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                async with client.stream("POST", f"{base_url}/conversation", json=body) as response:
+                    async for _ in response.aiter_bytes():
+                        pass
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+
+    async def sample_memory():
+        while time.monotonic() < stop_at:
+            workers = child_pids(master_pid)
+            memory_samples.append((len(workers), sum(rss_mb(pid) for pid in workers)))
+            await asyncio.sleep(0.5)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await asyncio.gather(sample_memory(), *(client_loop(client) for _ in range(concurrency)))
+
+    return latencies, errors, memory_samples
+
+
+async def run_profile(profile, args, mock_url):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "GUNICORN_WORKER_PROFILE": profile,
+        "AZURE_OPENAI_ENDPOINT": mock_url,
+        "AZURE_OPENAI_KEY": "benchmark",
+        "AZURE_OPENAI_MODEL": "benchmark",
+        "AZURE_OPENAI_STREAM": "true",
+        "PYTHONPATH": ROOT,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(base_url)
+        latencies, errors, memory_samples = await drive_load(base_url, args.concurrency, args.duration, server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies.sort()
+    workers = max(count for count, _ in memory_samples) if memory_samples else 0
+    return {
+        "profile": profile,
+        "workers": workers,
+        "requests_per_s": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "errors": errors,
+        "peak_rss_mb": max(total for _, total in memory_samples) if memory_samples else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["default", "io-bound"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "mock_aoai.py"), "--port", str(mock_port),
+         "--ttft-ms", str(args.ttft_ms), "--tokens", str(args.tokens), "--tokens-per-second", str(args.tokens_per_second)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        results = [await run_profile(profile, args, f"http://127.0.0.1:{mock_port}") for profile in args.profiles]
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+    print(f"{'profile':<10} {'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6} {'peak RSS MB':>12} {'req/s per GB':>13}")
+    for r in results:
+        per_gb = r["requests_per_s"] / (r["peak_rss_mb"] / 1024) if r["peak_rss_mb"] else 0.0
+        print(f"{r['profile']:<10} {r['workers']:>7} {r['requests_per_s']:>8.1f} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} "
+              f"{r['errors']:>6} {r['peak_rss_mb']:>12.0f} {per_gb:>13.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
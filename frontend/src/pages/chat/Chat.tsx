@@ -669,7 +669,11 @@ const Chat = () => {
     }
 
     if (appStateContext && appStateContext.state.currentChat && processMessages === messageStatus.Done) {
-      if (appStateContext.state.isCosmosDBAvailable.cosmosDB) {
+      // With persist_answers the server saves the answer when it finishes streaming it
+      if (
+        appStateContext.state.isCosmosDBAvailable.cosmosDB &&
+        !appStateContext.state.frontendSettings?.persist_answers
+      ) {
         if (!appStateContext?.state.currentChat?.messages) {
           console.error('Failure fetching current chat state.')
           return
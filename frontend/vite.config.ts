@@ -1,9 +1,37 @@
 import react from '@vitejs/plugin-react'
-import { defineConfig } from 'vite'
+import { readFileSync, writeFileSync } from 'fs'
+import { join } from 'path'
+import { defineConfig, Plugin } from 'vite'
+import { brotliCompressSync, constants, gzipSync } from 'zlib'
+
+// Writes .br and .gz variants of the bundle next to it, served by the /assets route
+const precompress = (): Plugin => {
+  let outDir = ''
+  return {
+    name: 'precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = config.build.outDir
+    },
+    writeBundle(_options, bundle) {
+      for (const fileName of Object.keys(bundle)) {
+        if (!/\.(js|css|svg|json|map)$/.test(fileName)) continue
+        const file = join(outDir, fileName)
+        const content = readFileSync(file)
+        if (content.length < 1024) continue
+        writeFileSync(
+          `${file}.br`,
+          brotliCompressSync(content, { params: { [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY } })
+        )
+        writeFileSync(`${file}.gz`, gzipSync(content, { level: 9 }))
+      }
+    }
+  }
+}
 
 // https://vitejs.dev/config/
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
   build: {
     outDir: '../static',
     emptyOutDir: false, // Prevents clearing the folder
@@ -1,13 +1,78 @@
+import glob
 import multiprocessing
+import os
+import shutil
+import tempfile
 
-max_requests = 1000
-max_requests_jitter = 50
 log_file = "-"
 bind = "0.0.0.0"
 
+# Import the app once in the master and fork workers from it, so workers recycled by
+# max_requests start without re-importing the SDKs. Clients are created per worker in
+# before_serving, after the fork.
+preload_app = True
+
 timeout = 230
 # https://learn.microsoft.com/en-us/troubleshoot/azure/app-service/web-apps-performance-faqs#why-does-my-request-time-out-after-230-seconds
 
 num_cpus = multiprocessing.cpu_count()
-workers = (num_cpus * 2) + 1
-worker_class = "uvicorn.workers.UvicornWorker"
+
+# GUNICORN_WORKER_PROFILE selects how workers are sized and recycled:
+#   default  - 2 * cpu + 1 workers, recycled every ~1000 requests
+#   io-bound - one async worker per cpu (at least 2 so recycling never leaves the app
+#              without a worker), a per-worker connection cap, and recycling by memory
+#              (GUNICORN_WORKER_MAX_MEMORY_MB) instead of request count
+worker_profile = os.environ.get("GUNICORN_WORKER_PROFILE", "default").lower()
+
+if worker_profile == "io-bound":
+    workers = max(2, num_cpus)
+    worker_class = "backend.uvicorn_worker.IoBoundUvicornWorker"
+    worker_connections = 256
+    max_requests = 0
+    max_requests_jitter = 0
+else:
+    workers = (num_cpus * 2) + 1
+    worker_class = "uvicorn.workers.UvicornWorker"
+    max_requests = 1000
+    max_requests_jitter = 50
+
+workers = int(os.environ.get("GUNICORN_WORKERS", workers))
+if "GUNICORN_WORKER_CONNECTIONS" in os.environ:
+    worker_connections = int(os.environ["GUNICORN_WORKER_CONNECTIONS"])
+
+# Prometheus multiprocess mode: every worker writes its metrics to files in this
+# directory and /metrics serves their sum. It has to be set before the app, and with it
+# prometheus_client, is imported. The app is imported right after this file anyway, so
+# reading its settings here costs nothing.
+from backend.settings import app_settings  # noqa: E402
+
+metrics_enabled = app_settings.metrics.enabled
+created_multiproc_dir = None
+if metrics_enabled and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    created_multiproc_dir = tempfile.mkdtemp(prefix="prometheus-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = created_multiproc_dir
+
+
+def on_starting(server):
+    if not metrics_enabled:
+        return
+    # samples of a previous run would be summed with this one's; only the metric files
+    # are removed, as a directory set by the operator may hold other files
+    multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(multiproc_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+        os.remove(path)
+
+
+def on_exit(server):
+    if created_multiproc_dir:
+        shutil.rmtree(created_multiproc_dir, ignore_errors=True)
+
+
+def child_exit(server, worker):
+    if not metrics_enabled:
+        return
+    # drop the in-flight gauges of recycled and crashed workers
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
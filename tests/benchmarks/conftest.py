@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import uuid
+from importlib import import_module, reload
+
+import pytest
+
+from backend.history.cosmosdbservice import CosmosConversationClient
+from backend.history.memory_container import InMemoryCosmosClient
+from backend.study_manager import StudyManager
+from backend.study_service import StudyService
+
+# Simulated Cosmos DB round trip; 0 measures the app's own overhead only
+COSMOS_LATENCY = float(os.environ.get("BENCHMARK_COSMOS_LATENCY_MS", "0")) / 1000
+
+
+class RouteBench:
+    """Runs requests against the app on one event loop and tracks their Cosmos DB cost."""
+
+    def __init__(self, loop, client, container):
+        self.loop = loop
+        self.client = client
+        self.container = container
+
+    def headers(self, user_id):
+        return {"X-Ms-Client-Principal-Id": user_id, "X-Ms-Client-Principal-Name": user_id}
+
+    def request(self, method, path, user_id, **kwargs):
+        response = self.loop.run_until_complete(
+            self.client.open(path, method=method, headers=self.headers(user_id), **kwargs)
+        )
+        assert response.status_code == 200, self.loop.run_until_complete(response.get_data(as_text=True))
+        return self.loop.run_until_complete(response.get_json())
+
+    def run(self, benchmark, method, path, user_id, **kwargs):
+        """Benchmark one route, recording the request units it costs per call."""
+        charge, calls = self.container.request_charge_total, 0
+
+        def call():
+            nonlocal calls
+            calls += 1
+            return self.request(method, path, user_id, **kwargs)
+
+        result = benchmark(call)
+        benchmark.extra_info["request_units"] = round((self.container.request_charge_total - charge) / calls, 2)
+        return result
+
+    def seed_conversations(self, user_id, conversations=20, messages=6):
+        store = self.client.app.conversation_store
+        ids = []
+        for _ in range(conversations):
+            conversation = self.loop.run_until_complete(store.create_conversation(user_id, "Benchmark"))
+            for turn in range(messages):
+                self.loop.run_until_complete(store.create_message(
+                    str(uuid.uuid4()),
+                    conversation["id"],
+                    user_id,
+                    {"role": "user" if turn % 2 == 0 else "assistant", "content": "x" * 400},
+                ))
+            ids.append(conversation["id"])
+        return ids
+
+
+@pytest.fixture(scope="session")
+def create_app():
+    # Minimal settings so app.py can be imported without a .env file. They are only
+    # set while the settings are loaded, so tests collected alongside do not see them.
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DOTENV_PATH", os.path.join(os.path.dirname(__file__), "missing.env"))
+        monkeypatch.setenv("AZURE_OPENAI_MODEL", "benchmark")
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://benchmark.openai.azure.com")
+        monkeypatch.setenv("AZURE_OPENAI_KEY", "benchmark")
+        reload(import_module("backend.settings"))
+        app_module = reload(sys.modules["app"]) if "app" in sys.modules else import_module("app")
+    return app_module.create_app
+
+
+@pytest.fixture(scope="module")
+def routes(create_app):
+    loop = asyncio.new_event_loop()
+    app = create_app()
+    test_app = app.test_app()
+    loop.run_until_complete(test_app.__aenter__())
+
+    store = CosmosConversationClient(
+        cosmosdb_endpoint="memory",
+        credential=None,
+        database_name="benchmark",
+        container_name="conversations",
+        enable_message_feedback=True,
+        cosmosdb_client=InMemoryCosmosClient(latency=COSMOS_LATENCY, seed=0),
+    )
+    app.conversation_store = store
+    app.study_service = StudyService(store.container_client)
+    app.study_manager = StudyManager(store.container_client)
+
+    yield RouteBench(loop, test_app.test_client(), store.container_client)
+
+    loop.run_until_complete(test_app.__aexit__(None, None, None))
+    loop.close()
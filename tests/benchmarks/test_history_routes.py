@@ -0,0 +1,63 @@
+import uuid
+
+
+def test_history_list(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    routes.seed_conversations(user_id)
+    conversations = routes.run(benchmark, "GET", "/history/list?offset=0", user_id)
+    assert len(conversations) == 20
+
+
+def test_history_read(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    conversation_id = routes.seed_conversations(user_id, conversations=1)[0]
+    conversation = routes.run(benchmark, "POST", "/history/read", user_id, json={"conversation_id": conversation_id})
+    assert len(conversation["messages"]) == 6
+
+
+def test_history_update(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    conversation_id = routes.seed_conversations(user_id, conversations=1, messages=0)[0]
+
+    def messages():
+        return [
+            {"id": str(uuid.uuid4()), "role": "user", "content": "What is Contoso?"},
+            {"id": str(uuid.uuid4()), "role": "tool", "content": '{"citations": []}'},
+            {"id": str(uuid.uuid4()), "role": "assistant", "content": "x" * 400},
+        ]
+
+    # new message ids per call, as the frontend sends after each answer
+    benchmark.pedantic(
+        lambda body: routes.request("POST", "/history/update", user_id, json=body),
+        setup=lambda: ((), {"body": {"conversation_id": conversation_id, "messages": messages()}}),
+        rounds=200,
+    )
+
+
+def test_history_rename(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    conversation_id = routes.seed_conversations(user_id, conversations=1, messages=0)[0]
+    routes.run(benchmark, "POST", "/history/rename", user_id, json={"conversation_id": conversation_id, "title": "Renamed"})
+
+
+def test_history_message_feedback(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    conversation_id = routes.seed_conversations(user_id, conversations=1)[0]
+    message = routes.request("POST", "/history/read", user_id, json={"conversation_id": conversation_id})["messages"][-1]
+    routes.run(
+        benchmark,
+        "POST",
+        "/history/message_feedback",
+        user_id,
+        json={"message_id": message["id"], "message_feedback": "positive"},
+    )
+
+
+def test_history_delete(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    conversation_ids = iter(routes.seed_conversations(user_id, conversations=100))
+    benchmark.pedantic(
+        lambda body: routes.request("DELETE", "/history/delete", user_id, json=body),
+        setup=lambda: ((), {"body": {"conversation_id": next(conversation_ids)}}),
+        rounds=100,
+    )
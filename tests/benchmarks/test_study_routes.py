@@ -0,0 +1,22 @@
+import uuid
+
+
+def test_study_status(benchmark, routes):
+    status = routes.run(benchmark, "GET", "/api/study/status", "aifast001")
+    assert status["loginCount"] >= 1
+
+
+def test_study_state(benchmark, routes):
+    state = routes.run(benchmark, "GET", "/api/study/state", str(uuid.uuid4()))
+    assert state["login_count"] == 0
+
+
+def test_study_login(benchmark, routes):
+    state = routes.run(benchmark, "POST", "/api/study/login", str(uuid.uuid4()))
+    assert state["last_login"]
+
+
+def test_study_survey(benchmark, routes):
+    user_id = str(uuid.uuid4())
+    state = routes.run(benchmark, "POST", "/api/study/survey", user_id, json={"survey": "pre_test", "completed": True})
+    assert state["surveys"]["pre_test"] is True
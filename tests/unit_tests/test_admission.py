@@ -0,0 +1,109 @@
+import asyncio
+import gc
+import pytest
+from backend import metrics
+from backend.admission import AdmissionController, AdmissionRejected, release_after
+
+
+def make_controller(**overrides):
+    settings = dict(max_concurrent=1, max_per_user=2, max_queue=1, queue_timeout=0.05, retry_after=2.5)
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+@pytest.mark.asyncio
+async def test_admission_queues_then_rejects_with_retry_after():
+    admission = make_controller()
+    first = await admission.acquire()
+
+    queued = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0)
+    assert admission.queued == 1
+
+    # queue is full
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.status_code == 503
+    assert rejected.value.retry_after_header == "3"
+
+    first.release()
+    second = await queued
+    assert admission.in_flight == 1
+
+    # queued but never admitted within the wait timeout
+    with pytest.raises(AdmissionRejected):
+        await admission.acquire()
+
+    second.release()
+    second.release()
+    assert admission.snapshot() == {
+        "in_flight": 0,
+        "queued": 0,
+        "max_queue_depth": 1,
+        "admitted_total": 2,
+        "rejected_total": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_admission_per_user_cap():
+    admission = make_controller(max_concurrent=5, max_per_user=1)
+    ticket = await admission.acquire("user-a")
+    await admission.acquire("user-b")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire("user-a")
+    assert rejected.value.status_code == 429
+
+    ticket.release()
+    await admission.acquire("user-a")
+
+
+@pytest.mark.asyncio
+async def test_admission_exports_queue_depth_and_rejections(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.setattr(metrics, "_metrics", None)
+    app_metrics = metrics.init_metrics()
+
+    def sample(name, **labels):
+        return app_metrics.registry.get_sample_value(name, labels)
+
+    admission = make_controller(max_per_user=1)
+    first = await admission.acquire("user-a")
+    queued = asyncio.create_task(admission.acquire("user-b"))
+    await asyncio.sleep(0)
+    assert sample("chat_admission_in_flight") == 1
+    assert sample("chat_admission_queued") == 1
+
+    with pytest.raises(AdmissionRejected):
+        await admission.acquire("user-a")
+    with pytest.raises(AdmissionRejected):
+        await admission.acquire("user-c")
+    with pytest.raises(AdmissionRejected):
+        await queued
+    assert sample("chat_admission_queued") == 0
+
+    first.release()
+    assert sample("chat_admission_in_flight") == 0
+    for reason in ("per_user", "queue_full", "timeout"):
+        assert sample("chat_admission_rejected_total", reason=reason) == 1
+
+
+@pytest.mark.asyncio
+async def test_release_after_holds_ticket_until_stream_finishes():
+    admission = make_controller()
+
+    async def stream():
+        yield b"a"
+        yield b"b"
+
+    wrapped = release_after(stream(), await admission.acquire())
+    assert [chunk async for chunk in wrapped] == [b"a", b"b"]
+    assert admission.in_flight == 0
+
+    # a stream that is dropped before it is iterated still gives its slot back
+    wrapped = release_after(stream(), await admission.acquire())
+    assert admission.in_flight == 1
+    del wrapped
+    gc.collect()
+    assert admission.in_flight == 0
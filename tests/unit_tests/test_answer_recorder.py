@@ -0,0 +1,49 @@
+import pytest
+from backend.history.answer_recorder import AnswerRecorder
+
+
+def chunk(message, completion_id="chatcmpl-1"):
+    return {"id": completion_id, "choices": [{"messages": [message]}]}
+
+
+@pytest.mark.asyncio
+async def test_record_collects_streamed_answer_once():
+    completed = []
+    recorder = AnswerRecorder(completed.append)
+
+    async def stream():
+        yield chunk({"role": "tool", "content": '{"citations": []}'})
+        yield chunk({"role": "assistant", "content": "Hello"})
+        yield {}
+        yield chunk({"role": "assistant", "content": " world"})
+
+    assert len([response async for response in recorder.record(stream())]) == 4
+    recorder.complete()
+
+    assert len(completed) == 1
+    tool, assistant = completed[0]
+    assert tool["role"] == "tool" and tool["content"] == '{"citations": []}'
+    assert assistant == {"id": "chatcmpl-1", "role": "assistant", "content": "Hello world"}
+
+
+@pytest.mark.asyncio
+async def test_record_keeps_partial_answer_when_stopped():
+    completed = []
+    recorder = AnswerRecorder(completed.append)
+
+    async def stream():
+        yield chunk({"role": "assistant", "content": "Partial"})
+        yield chunk({"role": "assistant", "content": " answer"})
+
+    recorded = recorder.record(stream())
+    await recorded.__anext__()
+    await recorded.aclose()
+    assert completed == [[{"id": "chatcmpl-1", "role": "assistant", "content": "Partial"}]]
+
+
+def test_no_answer_is_not_persisted():
+    completed = []
+    recorder = AnswerRecorder(completed.append)
+    recorder.observe({})
+    recorder.complete()
+    assert completed == []
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+from importlib import import_module, reload
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from backend.deployment_pool import Deployment, DeploymentPool
+
+
+def chunk(delta, finish_reason=None):
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-1",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    })
+
+
+TOOL_CALL = [
+    chunk({"role": "assistant", "tool_calls": [
+        {"index": 0, "id": "call_1", "type": "function", "function": {"name": "get_weather", "arguments": ""}},
+    ]}),
+    chunk({"tool_calls": [{"index": 0, "function": {"arguments": "{\"city\": \"Paris\"}"}}]}),
+    chunk({}, finish_reason="tool_calls"),
+]
+ANSWER = [chunk({"role": "assistant", "content": "Sunny"}), chunk({}, finish_reason="stop")]
+
+
+class FakeCompletions:
+    """Streams the given completions, one per call, as the SDK's raw response API does."""
+
+    def __init__(self, *completions):
+        self.completions = list(completions)
+        self.requests = []
+        self.with_raw_response = self
+
+    async def create(self, **model_args):
+        self.requests.append(model_args)
+        chunks = self.completions.pop(0)
+
+        async def stream():
+            for item in chunks:
+                yield item
+
+        class RawResponse:
+            headers = {"apim-request-id": "apim-1"}
+
+            def parse(self):
+                return stream()
+
+        return RawResponse()
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    # Minimal settings so app.py can be imported, whatever .env or earlier test is around
+    monkeypatch.setenv("DOTENV_PATH", os.path.join(os.path.dirname(__file__), "dotenv_data", "missing"))
+    monkeypatch.setenv("AZURE_OPENAI_MODEL", "gpt-4o")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://dummy.openai.azure.com/")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", "dummy")
+    monkeypatch.setenv("AZURE_OPENAI_STREAM", "true")
+    monkeypatch.setenv("AZURE_OPENAI_FUNCTION_CALL_AZURE_FUNCTIONS_ENABLED", "true")
+    reload(import_module("backend.settings"))
+    return reload(sys.modules["app"]) if "app" in sys.modules else import_module("app")
+
+
+@pytest.mark.asyncio
+async def test_tool_call_follow_up_streams_after_the_app_context_is_gone(app_module, monkeypatch):
+    tool_calls = []
+
+    async def call_tool(name, arguments):
+        tool_calls.append((name, arguments))
+        return "Sunny, 21 degrees"
+
+    monkeypatch.setattr(app_module, "openai_remote_azure_function_call", call_tool)
+    completions = FakeCompletions(TOOL_CALL, ANSWER)
+    app = app_module.create_app()
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})()
+    app.openai_pool = DeploymentPool([Deployment(client, "https://dummy.openai.azure.com/", "gpt-4o")], app.rate_limiter)
+
+    async with app.app_context():
+        response = await app_module.conversation_internal(
+            {"messages": [{"role": "user", "content": "Weather in Paris?"}]}, {}
+        )
+
+    # Quart sends the body after popping the app context; the follow-up completion runs then
+    body = await response.get_data(as_text=True)
+
+    assert tool_calls == [("get_weather", "{\"city\": \"Paris\"}")]
+    assert len(completions.requests) == 2
+    assert completions.requests[1]["messages"][-1] == {
+        "role": "function", "name": "get_weather", "content": "Sunny, 21 degrees",
+    }
+    chunks = [json.loads(line) for line in body.splitlines()]
+    assert chunks[0]["choices"][0]["messages"] == [{"role": "assistant", "content": "Sunny"}]
+    assert not any("error" in chunk for chunk in chunks)
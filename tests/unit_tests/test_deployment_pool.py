@@ -0,0 +1,92 @@
+import httpx
+import openai
+import pytest
+from backend.deployment_pool import CLOSED, HALF_OPEN, OPEN, Deployment, DeploymentPool
+from backend.rate_limit import RateLimiter
+
+
+def make_pool(*weights, **kwargs):
+    deployments = [
+        Deployment(client=None, endpoint="https://example.openai.azure.com", model=f"gpt-{i}", weight=weight)
+        for i, weight in enumerate(weights)
+    ]
+    return DeploymentPool(deployments, RateLimiter(max_retries=0), **kwargs)
+
+
+def server_error():
+    request = httpx.Request("POST", "https://example.openai.azure.com")
+    return openai.InternalServerError("boom", response=httpx.Response(500, request=request), body=None)
+
+
+def test_select_follows_weights_when_idle():
+    pool = make_pool(3, 1)
+    picks = [pool.select().model for _ in range(8)]
+    assert picks.count("gpt-0") == 6
+    assert picks.count("gpt-1") == 2
+    # smooth round-robin interleaves instead of sending bursts to one deployment
+    assert picks[:4] == ["gpt-0", "gpt-0", "gpt-1", "gpt-0"]
+
+
+def test_select_prefers_least_outstanding():
+    pool = make_pool(1, 1)
+    pool.deployments[0].outstanding = 2
+    assert pool.select().model == "gpt-1"
+
+
+@pytest.mark.asyncio
+async def test_call_fails_over_and_opens_circuit():
+    pool = make_pool(1, 1, failure_threshold=1, cooldown=60)
+    calls = []
+
+    async def request(deployment):
+        calls.append(deployment.model)
+        if deployment.model == "gpt-0":
+            raise server_error()
+        return "ok"
+
+    result, deployment = await pool.call(10, request)
+    assert result == "ok"
+    assert calls == ["gpt-0", "gpt-1"]
+    assert pool.deployments[0].state == OPEN
+    assert deployment.state == CLOSED
+    assert all(d.outstanding == 0 for d in pool.deployments)
+
+    # the open deployment is skipped
+    calls.clear()
+    await pool.call(10, request)
+    assert calls == ["gpt-1"]
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_circuit():
+    pool = make_pool(1, 1, failure_threshold=1, cooldown=0.01)
+    broken = pool.deployments[0]
+    broken.record_failure(failure_threshold=1, min_samples=10, max_error_rate=0.5)
+    broken.opened_at -= 1
+
+    async def request(deployment):
+        return deployment.model
+
+    pool.deployments[1].outstanding = 1
+    assert pool.select() is broken
+    assert broken.state == HALF_OPEN
+    assert broken.probe_in_flight
+
+    broken.probe_in_flight = False
+    result, _ = await pool.call(10, request)
+    assert result == "gpt-0"
+    assert broken.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_track_stream_counts_outstanding_until_consumed():
+    pool = make_pool(1)
+    deployment = pool.deployments[0]
+
+    async def stream():
+        yield 1
+
+    tracked = pool.track_stream(stream(), deployment)
+    assert deployment.outstanding == 1
+    assert [chunk async for chunk in tracked] == [1]
+    assert deployment.outstanding == 0
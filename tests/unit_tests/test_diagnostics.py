@@ -0,0 +1,61 @@
+import asyncio
+import json
+import pytest
+from backend.diagnostics import ProfilerBusy, WorkerProfiler, dump_tasks, install_task_clock
+
+
+def busy_json_work():
+    return json.dumps([{"choices": [{"messages": [{"content": "token " * 50}]}]}] * 200)
+
+
+@pytest.mark.asyncio
+async def test_profile_samples_other_tasks_on_the_loop():
+    stop = asyncio.Event()
+
+    async def busy_request():
+        while not stop.is_set():
+            busy_json_work()
+            await asyncio.sleep(0)
+
+    request_task = asyncio.create_task(busy_request())
+    profiler = WorkerProfiler(max_seconds=0.3)
+    try:
+        profile, content_type = await profiler.profile(10, fmt="speedscope")
+    finally:
+        stop.set()
+        await request_task
+
+    assert content_type == "application/json"
+    frames = json.loads(profile)["shared"]["frames"]
+    assert any(frame["name"] == "busy_json_work" for frame in frames)
+
+
+@pytest.mark.asyncio
+async def test_only_one_profile_at_a_time():
+    profiler = WorkerProfiler(max_seconds=0.2)
+    first = asyncio.create_task(profiler.profile(1, fmt="text"))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ProfilerBusy):
+        await profiler.profile(1)
+    assert (await first)[1] == "text/plain"
+
+
+@pytest.mark.asyncio
+async def test_dump_tasks_shows_where_long_running_tasks_wait():
+    install_task_clock()
+
+    async def wait_for_upstream():
+        await asyncio.sleep(10)
+
+    task = asyncio.create_task(wait_for_upstream(), name="slow-request")
+    await asyncio.sleep(0.05)
+    try:
+        [slow] = [t for t in dump_tasks(min_age=0.01) if t["name"] == "slow-request"]
+    finally:
+        task.cancel()
+
+    assert slow["coroutine"].endswith("wait_for_upstream")
+    assert slow["age_seconds"] >= 0.04
+    assert any("wait_for_upstream" in frame for frame in slow["stack"])
+    assert any("in sleep" in frame for frame in slow["stack"])
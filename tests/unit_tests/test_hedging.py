@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from backend.hedging import Hedger
+
+
+def make_open_stream(delays, closed):
+    calls = []
+
+    async def open_stream(avoid):
+        attempt = len(calls)
+        calls.append(list(avoid))
+        avoid.append(f"deployment-{attempt}")
+
+        async def stream():
+            try:
+                await asyncio.sleep(delays[attempt])
+                yield f"first-{attempt}"
+                yield f"second-{attempt}"
+            finally:
+                closed.append(attempt)
+
+        return stream(), f"request-{attempt}"
+
+    return open_stream, calls
+
+
+@pytest.mark.asyncio
+async def test_fast_first_chunk_is_not_hedged():
+    hedger = Hedger(max_delay=0.5)
+    open_stream, calls = make_open_stream([0.0], [])
+
+    stream, meta = await hedger.first_chunk(open_stream)
+    assert meta == "request-0"
+    assert [chunk async for chunk in stream] == ["first-0", "second-0"]
+    assert len(calls) == 1
+    assert hedger.snapshot()["hedged_total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_first_chunk_is_hedged_and_loser_closed():
+    hedger = Hedger(max_delay=0.05)
+    closed = []
+    open_stream, calls = make_open_stream([1.0, 0.0], closed)
+
+    stream, meta = await hedger.first_chunk(open_stream)
+    assert meta == "request-1"
+    # the hedge is told which deployment the first attempt went to
+    assert calls == [[], ["deployment-0"]]
+    assert [chunk async for chunk in stream] == ["first-1", "second-1"]
+
+    await asyncio.sleep(0.01)
+    assert sorted(closed) == [0, 1]
+    assert hedger.snapshot()["hedged_total"] == 1
+    assert hedger.snapshot()["hedge_wins_total"] == 1
+
+
+def test_deadline_tracks_percentile_within_bounds():
+    hedger = Hedger(percentile=90, min_delay=0.1, max_delay=2.0, min_samples=10)
+    assert hedger.deadline() == 2.0
+
+    hedger._ttfts.extend([0.2] * 9 + [1.0])
+    assert hedger.deadline() == 1.0
+    hedger._ttfts.extend([0.01] * 100)
+    assert hedger.deadline() == 0.1
@@ -0,0 +1,127 @@
+import os
+from importlib import import_module
+
+import pytest
+
+from backend.history.cosmosdbservice import CosmosConversationClient
+from backend.history.history_cache import HistoryCache
+from backend.history.memory_container import InMemoryCosmosClient
+
+
+def test_entries_are_served_only_at_their_version():
+    cache = HistoryCache(max_bytes=1024)
+    cache.put(("user-1", "list", "0"), "v1", b"[]")
+
+    assert cache.get(("user-1", "list", "0"), "v1") == b"[]"
+    assert cache.get(("user-2", "list", "0"), "v1") is None
+    assert cache.get(("user-1", "list", "0"), "v2") is None
+    # a stale entry is dropped when it is found
+    assert len(cache) == 0 and cache.size == 0
+    assert cache.get(("user-1", "list", "0"), None) is None
+
+
+def test_evicts_least_recently_used_bodies_over_the_byte_budget():
+    cache = HistoryCache(max_bytes=10)
+    cache.put("a", "v", b"1234")
+    cache.put("b", "v", b"1234")
+    cache.get("a", "v")
+    cache.put("c", "v", b"1234")
+    cache.put("too big", "v", b"12345678901")
+
+    assert cache.get("a", "v") == b"1234"
+    assert cache.get("b", "v") is None
+    assert cache.get("c", "v") == b"1234"
+    assert cache.get("too big", "v") is None
+    assert cache.size == 8
+
+    cache.put("a", "v2", b"12")
+    assert cache.size == 6
+    assert HistoryCache(max_bytes=0).get("a", "v") is None
+
+
+class VersionStore:
+    def __init__(self):
+        self.reads = 0
+
+    async def get_history_version(self, user_id):
+        self.reads += 1
+        return f"v{self.reads}"
+
+
+@pytest.mark.asyncio
+async def test_versions_are_remembered_for_their_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("backend.history.history_cache.time.monotonic", lambda: now[0])
+    cache = HistoryCache(max_bytes=1024, version_ttl=1.0)
+    store = VersionStore()
+
+    assert await cache.version(store, "user-1") == "v1"
+    assert await cache.version(store, "user-1") == "v1"
+    now[0] += 1.5
+    assert await cache.version(store, "user-1") == "v2"
+
+    # a write through this worker is seen at once
+    cache.written("user-1", "v9")
+    assert await cache.version(store, "user-1") == "v9"
+    cache.written("user-1", None)
+    assert await cache.version(store, "user-1") == "v3"
+    assert store.reads == 3
+
+    uncached = HistoryCache(max_bytes=1024, version_ttl=0)
+    await uncached.version(store, "user-1")
+    await uncached.version(store, "user-1")
+    assert store.reads == 5
+
+
+@pytest.fixture
+def history_app(monkeypatch):
+    # Minimal settings in case app.py is not imported yet
+    monkeypatch.setenv("AZURE_OPENAI_MODEL", os.environ.get("AZURE_OPENAI_MODEL") or "gpt-4o")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", os.environ.get("AZURE_OPENAI_ENDPOINT") or "https://dummy.openai.azure.com/")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", os.environ.get("AZURE_OPENAI_KEY") or "dummy")
+    app = import_module("app").create_app()
+    app.conversation_store = CosmosConversationClient(
+        cosmosdb_endpoint="memory",
+        credential=None,
+        database_name="db",
+        container_name="conversations",
+        cosmosdb_client=InMemoryCosmosClient(),
+    )
+    app.history_cache = HistoryCache(max_bytes=1024 * 1024, version_ttl=60)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_history_update_bumps_the_version_once_and_reads_are_served_from_memory(history_app):
+    store = history_app.conversation_store
+    container = store.container_client
+    client = history_app.test_client()
+    headers = {"X-Ms-Client-Principal-Id": "user-1"}
+    conversation = await store.create_conversation("user-1", "First")
+
+    def calls_since(before):
+        after = container.snapshot()["requests"]
+        return {operation: count - before.get(operation, 0) for operation, count in after.items() if count != before.get(operation, 0)}
+
+    before = container.snapshot()["requests"]
+    response = await client.post("/history/update", headers=headers, json={
+        "conversation_id": conversation["id"],
+        "messages": [
+            {"id": "m-1", "role": "tool", "content": "{}"},
+            {"id": "m-2", "role": "assistant", "content": "Hello"},
+        ],
+    })
+    assert response.status_code == 200
+    # per message: its upsert, the conversation query and upsert; then one version bump
+    assert calls_since(before) == {"upsert_item": 5, "query_items": 2}
+
+    before = container.snapshot()["requests"]
+    read = {"conversation_id": conversation["id"]}
+    first = await (await client.post("/history/read", headers=headers, json=read)).get_json()
+    assert [message["content"] for message in first["messages"]] == ["{}", "Hello"]
+    # the version this worker just wrote is known, so only the conversation is read
+    assert calls_since(before) == {"query_items": 2}
+
+    before = container.snapshot()["requests"]
+    assert await (await client.post("/history/read", headers=headers, json=read)).get_json() == first
+    assert calls_since(before) == {}
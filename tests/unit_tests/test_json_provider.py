@@ -0,0 +1,41 @@
+import dataclasses
+import json
+import pytest
+from quart import Quart, jsonify, request
+
+from backend.json_provider import FastJSONProvider, dumps, dumps_bytes
+
+
+@dataclasses.dataclass
+class Citation:
+    title: str
+    chunk_id: int
+
+
+def test_dumps_matches_the_json_module():
+    payload = {"title": "Überblick", "citations": [Citation("Doc", 1)], "count": 2**70, "none": None}
+
+    assert json.loads(dumps(payload)) == {
+        "title": "Überblick", "citations": [{"title": "Doc", "chunk_id": 1}], "count": 2**70, "none": None,
+    }
+    assert dumps_bytes({"a": [1, 2]}) == b'{"a":[1,2]}'
+    with pytest.raises(TypeError):
+        dumps(object())
+
+
+@pytest.mark.asyncio
+async def test_app_serializes_responses_and_parses_requests():
+    app = Quart(__name__)
+    app.json = FastJSONProvider(app)
+
+    @app.route("/echo", methods=["POST"])
+    async def echo():
+        body = await request.get_json()
+        return jsonify({"received": body, "citation": Citation("Doc", 1)})
+
+    response = await app.test_client().post("/echo", json={"messages": [{"role": "user", "content": "Hi"}]})
+
+    assert response.mimetype == "application/json"
+    assert await response.get_data() == (
+        b'{"received":{"messages":[{"role":"user","content":"Hi"}]},"citation":{"title":"Doc","chunk_id":1}}\n'
+    )
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import time
+import pytest
+from backend.loop_monitor import LoopMonitor
+
+
+def blocking_graph_lookup():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_measured_and_reported_with_its_stack(caplog):
+    monitor = LoopMonitor(interval=0.02, warn_ms=100, blocking_threshold_ms=100)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING):
+            blocking_graph_lookup()
+            await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["max_lag_ms"] >= 200
+    assert snapshot["lagged_total"] == 1
+    assert snapshot["blocked_total"] == 1
+    assert "blocking_graph_lookup" in caplog.text
+    assert "Event loop unblocked" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_is_not_reported(caplog):
+    monitor = LoopMonitor(interval=0.01, warn_ms=100, blocking_threshold_ms=100)
+    monitor.start()
+    with caplog.at_level(logging.WARNING):
+        await asyncio.sleep(0.15)
+    await monitor.stop()
+
+    assert monitor.snapshot()["lagged_total"] == 0
+    assert monitor.snapshot()["blocked_total"] == 0
+    assert not caplog.records
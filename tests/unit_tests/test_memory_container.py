@@ -0,0 +1,106 @@
+import pytest
+from azure.cosmos import exceptions
+
+from backend.history.cosmosdbservice import CosmosConversationClient
+from backend.history.memory_container import InMemoryContainer, InMemoryCosmosClient
+from backend.study_manager import StudyManager
+
+
+def memory_client(**container_options):
+    return CosmosConversationClient(
+        cosmosdb_endpoint="memory",
+        credential=None,
+        database_name="db",
+        container_name="conversations",
+        enable_message_feedback=True,
+        cosmosdb_client=InMemoryCosmosClient(**container_options),
+    )
+
+
+@pytest.mark.asyncio
+async def test_conversation_client_queries():
+    client = memory_client()
+    assert (await client.ensure())[0]
+
+    first = await client.create_conversation("user-1", "First")
+    second = await client.create_conversation("user-1", "Second")
+    await client.create_conversation("user-2", "Other user")
+    await client.create_message("m-1", first["id"], "user-1", {"role": "user", "content": "Hi"})
+    await client.create_message("m-2", first["id"], "user-1", {"role": "assistant", "content": "Hello"})
+
+    conversations = await client.get_conversations("user-1", limit=25)
+    assert [c["id"] for c in conversations] == [first["id"], second["id"]]
+    assert [c["id"] for c in await client.get_conversations("user-1", limit=1, offset=1)] == [second["id"]]
+    assert (await client.get_conversation("user-1", second["id"]))["title"] == "Second"
+    assert [m["id"] for m in await client.get_messages("user-1", first["id"])] == ["m-1", "m-2"]
+    assert (await client.update_message_feedback("user-1", "m-2", "positive"))["feedback"] == "positive"
+
+    users = client.container_client.query_items(
+        "SELECT DISTINCT VALUE c.userId FROM c WHERE c.type = 'conversation'", enable_cross_partition_query=True
+    )
+    assert [user async for user in users] == ["user-1", "user-2"]
+
+    assert len(await client.delete_messages(first["id"], "user-1")) == 2
+    await client.delete_conversation("user-1", first["id"])
+    with pytest.raises(exceptions.CosmosResourceNotFoundError):
+        await client.container_client.read_item(item=first["id"], partition_key="user-1")
+
+    snapshot = client.container_client.snapshot()
+    # the two remaining conversations; writes alone do not bump the history versions
+    assert snapshot["items"] == 2
+    assert snapshot["requests"]["query_items"] >= 5
+    assert snapshot["request_charge_total"] > 0
+
+
+@pytest.mark.asyncio
+async def test_history_version_changes_with_every_bump():
+    client = memory_client()
+    assert await client.get_history_version("user-1") == "0"
+
+    conversation = await client.create_conversation("user-1", "First")
+    assert await client.get_history_version("user-1") == "0"
+    created = await client.bump_history_version("user-1")
+    assert await client.get_history_version("user-1") == created
+    await client.create_message("m-1", conversation["id"], "user-1", {"role": "user", "content": "Hi"})
+    messaged = await client.bump_history_version("user-1")
+
+    assert len({"0", created, messaged}) == 3
+    assert await client.get_history_version("user-1") == messaged
+    assert await client.get_history_version("user-2") == "0"
+
+
+@pytest.mark.asyncio
+async def test_patch_and_conflicts():
+    container = InMemoryContainer()
+    await container.create_item({"id": "profile-u1", "userId": "u1", "login_count": 0, "surveys": {}})
+    with pytest.raises(exceptions.CosmosResourceExistsError):
+        await container.create_item({"id": "profile-u1", "userId": "u1"})
+
+    patched = await container.patch_item(
+        item="profile-u1",
+        partition_key="u1",
+        patch_operations=[
+            {"op": "incr", "path": "/login_count", "value": 2},
+            {"op": "set", "path": "/surveys/pre_test", "value": True},
+        ],
+    )
+    assert patched["login_count"] == 2 and patched["surveys"] == {"pre_test": True}
+    assert container.last_request_charge == 5.0
+
+
+@pytest.mark.asyncio
+async def test_injected_throttling_is_retried_by_study_manager():
+    container = InMemoryContainer(throttle_rate=0.5, retry_after_ms=1, seed=7)
+    manager = StudyManager(container)
+
+    for user in range(10):
+        try:
+            profile = await manager.register_login(f"u{user}")
+        except exceptions.CosmosHttpResponseError as e:
+            # reads are not retried by the manager
+            assert e.status_code == 429 and e.headers["x-ms-retry-after-ms"] == "1"
+        else:
+            assert profile["userId"] == f"u{user}"
+
+    assert container.throttled_total > 0
+    assert container.snapshot()["items"] > 0
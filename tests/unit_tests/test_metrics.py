@@ -0,0 +1,48 @@
+import pytest
+from backend import metrics, timing
+
+
+async def answer():
+    for token in ["Hello", " world"]:
+        yield {"choices": [{"messages": [{"role": "assistant", "content": token}]}]}
+
+
+def sample(app_metrics, name, **labels):
+    return app_metrics.registry.get_sample_value(name, labels)
+
+
+@pytest.mark.asyncio
+async def test_spans_and_streams_are_observed_per_route(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    app_metrics = metrics.AppMetrics("AzureCognitiveSearch")
+    labels = {"route": "/conversation", "datasource": "AzureCognitiveSearch"}
+    request_timing = timing.start("/conversation", log_threshold_ms=None, listeners=[app_metrics.request("/conversation")])
+
+    with timing.span("graph.groups"):
+        pass
+    chunks = [chunk async for chunk in request_timing.stream(answer())]
+
+    assert len(chunks) == 2
+    assert sample(app_metrics, "chat_stage_duration_seconds_count", stage="graph.groups", **labels) == 1
+    assert sample(app_metrics, "chat_ttft_seconds_count", **labels) == 1
+    assert sample(app_metrics, "chat_stream_chunks_sum", **labels) == 2
+    assert sample(app_metrics, "chat_streams_in_flight", **labels) == 0
+    assert sample(app_metrics, "chat_request_duration_seconds_count", status="200", **labels) == 1
+    body, content_type = app_metrics.render()
+    assert content_type.startswith("text/plain")
+    assert b"chat_stream_duration_seconds_bucket" in body
+
+
+def test_module_recorders_are_noops_until_metrics_are_initialized(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", None)
+    metrics.record_cache_lookup("title", True)
+    metrics.record_request_charge("read_item", 1.0)
+
+    app_metrics = metrics.init_metrics()
+    metrics.record_cache_lookup("title", True)
+    metrics.record_cache_lookup("title", False)
+    metrics.record_request_charge("read_item", 2.5)
+
+    assert sample(app_metrics, "chat_cache_lookups_total", cache="title", result="hit") == 1
+    assert sample(app_metrics, "chat_cache_lookups_total", cache="title", result="miss") == 1
+    assert sample(app_metrics, "chat_cosmos_request_units_sum", operation="read_item") == 2.5
@@ -0,0 +1,68 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from backend.rate_limit import RateLimiter, TokenBucket, estimate_request_tokens, parse_retry_after
+
+
+def rate_limit_error(headers):
+    request = httpx.Request("POST", "https://example.openai.azure.com/openai/deployments/gpt/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+
+def test_estimate_request_tokens_includes_max_tokens():
+    messages = [{"role": "system", "content": "x" * 40}, {"role": "user", "content": None}]
+    estimate = estimate_request_tokens(messages, 100)
+    assert 100 + 2 * 4 + 3 < estimate < 100 + 2 * 4 + 3 + 40
+
+
+def test_parse_retry_after_prefers_milliseconds():
+    assert parse_retry_after({"retry-after-ms": "250", "retry-after": "3"}) == 0.25
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_serves_waiters_in_order():
+    bucket = TokenBucket(tokens_per_minute=6000)  # 100 tokens/s
+    order = []
+
+    async def request(name, cost):
+        await bucket.acquire(cost)
+        order.append(name)
+
+    await bucket.acquire(6000)
+    await asyncio.gather(request("large", 5), request("small", 1))
+    assert order == ["large", "small"]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_adapts_to_response_headers():
+    bucket = TokenBucket(tokens_per_minute=60000)
+    bucket.observe({"x-ratelimit-remaining-tokens": "10"})
+    assert bucket.tokens <= 10
+
+    bucket.observe({"retry-after-ms": "50"}, throttled=True)
+    assert bucket.throttled_total == 1
+    assert bucket.tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_retries_throttled_requests():
+    limiter = RateLimiter(max_retries=1)
+    attempts = []
+
+    async def request():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise rate_limit_error({"retry-after-ms": "50"})
+        return "ok"
+
+    assert await limiter.call("gpt", 10, request) == "ok"
+    assert attempts[1] - attempts[0] >= 0.04
+
+    attempts.clear()
+    limiter.max_retries = 0
+    with pytest.raises(openai.RateLimitError):
+        await limiter.call("gpt", 10, request)
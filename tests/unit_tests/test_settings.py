@@ -70,3 +70,17 @@ def test_dotenv_with_elasticsearch_success(app_settings):
     
     
 
+
+
+def test_dotenv_with_openai_deployments(app_settings):
+    deployments = app_settings.azure_openai.get_deployments()
+    assert [d.model for d in deployments] == ["my_model", "my_model_eu"]
+
+    # Entries inherit the primary endpoint, key and quota unless they set their own
+    assert deployments[0].endpoint == "https://dummy.openai.azure.com/"
+    assert deployments[0].key == "dummy"
+    assert deployments[0].weight == 2
+    assert deployments[0].tokens_per_minute == 30000
+    assert deployments[1].endpoint == "https://dummy-eu.openai.azure.com"
+    assert deployments[1].key is None
+    assert deployments[1].tokens_per_minute == 10000
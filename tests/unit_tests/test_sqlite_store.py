@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+import pytest
+import pytest_asyncio
+from backend.history.sqlite_store import SqliteConversationStore
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    store = SqliteConversationStore(str(tmp_path / "chat_history.db"), enable_message_feedback=True)
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_conversation_round_trip(store):
+    assert await store.ensure() == (True, "SQLite chat history store initialized successfully")
+    first = await store.create_conversation("user-1", "First")
+    second = await store.create_conversation("user-1", "Second")
+    await store.create_conversation("user-2", "Other user")
+
+    user_message = await store.create_message(str(uuid.uuid4()), first["id"], "user-1", {"role": "user", "content": "Hi"})
+    answer = await store.create_message("chatcmpl-1", first["id"], "user-1", {"role": "assistant", "content": "Hello"})
+    assert answer["feedback"] == ""
+
+    # the conversation with the latest message comes first
+    conversations = await store.get_conversations("user-1", limit=25)
+    assert [c["id"] for c in conversations] == [first["id"], second["id"]]
+    assert conversations[0]["updatedAt"] == answer["createdAt"]
+    assert [c["id"] for c in await store.get_conversations("user-1", limit=1, offset=1)] == [second["id"]]
+    assert (await store.get_conversation("user-1", first["id"]))["title"] == "First"
+    assert await store.get_conversation("user-2", first["id"]) is None
+
+    messages = await store.get_messages("user-1", first["id"])
+    assert [m["id"] for m in messages] == [user_message["id"], "chatcmpl-1"]
+    assert (await store.update_message_feedback("user-1", "chatcmpl-1", "positive"))["feedback"] == "positive"
+    assert await store.update_message_feedback("user-2", "chatcmpl-1", "negative") is False
+
+    assert len(await store.delete_messages(first["id"], "user-1")) == 2
+    assert await store.delete_conversation("user-1", first["id"])
+    assert await store.get_messages("user-1", first["id"]) == []
+    assert [c["id"] for c in await store.get_conversations("user-1", limit=None)] == [second["id"]]
+
+
+@pytest.mark.asyncio
+async def test_history_version_changes_with_every_write(store):
+    assert await store.get_history_version("user-1") == "0"
+    conversation = await store.create_conversation("user-1", "First")
+    versions = [await store.get_history_version("user-1")]
+    await store.create_message("m-1", conversation["id"], "user-1", {"role": "user", "content": "Hi"})
+    versions.append(await store.get_history_version("user-1"))
+    conversation["title"] = "Renamed"
+    await store.upsert_conversation(conversation)
+    versions.append(await store.get_history_version("user-1"))
+    await store.delete_conversation("user-1", conversation["id"])
+    versions.append(await store.get_history_version("user-1"))
+
+    assert versions == ["1", "2", "3", "4"]
+    assert await store.get_history_version("user-2") == "0"
+
+
+@pytest.mark.asyncio
+async def test_message_for_missing_conversation(store):
+    response = await store.create_message("m-1", "missing", "user-1", {"role": "user", "content": "Hi"})
+    assert response == "Conversation not found"
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_rolled_back_while_others_commit(store, monkeypatch):
+    conversation = await store.create_conversation("user-1", "First")
+    db = await store._db()
+    real_execute = db.execute
+    failures = [RuntimeError("disk I/O error")]
+
+    def execute(query, parameters=None):
+        # the version bump, the last statement of a write, fails once
+        if "history_versions" in query and failures:
+            raise failures.pop()
+        return real_execute(query, parameters)
+
+    monkeypatch.setattr(db, "execute", execute)
+    message_ids = ["m-1", "m-2", "m-3"]
+    results = await asyncio.gather(
+        *(store.create_message(m, conversation["id"], "user-1", {"role": "user", "content": m}) for m in message_ids),
+        return_exceptions=True,
+    )
+
+    failed = [m for m, result in zip(message_ids, results) if isinstance(result, RuntimeError)]
+    assert len(failed) == 1
+    # the failed message is not committed by the writes that ran alongside it
+    stored = [message["id"] for message in await store.get_messages("user-1", conversation["id"])]
+    assert sorted(stored) == sorted(set(message_ids) - set(failed))
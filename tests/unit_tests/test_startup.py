@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from backend.startup import StartupPipeline
+
+
+@pytest.mark.asyncio
+async def test_startup_pipeline_runs_steps_concurrently():
+    pipeline = StartupPipeline()
+    order = []
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        order.append("slow")
+
+    async def fast():
+        async with pipeline.measure("fast.sub"):
+            order.append("fast")
+
+    pipeline.add_step("slow", slow)
+    pipeline.add_step("fast", fast)
+    await pipeline.run()
+
+    assert order == ["fast", "slow"]
+    status = pipeline.status()
+    assert status["ready"] is True
+    assert set(status["timings_ms"]) == {"slow", "fast", "fast.sub", "total"}
+
+
+@pytest.mark.asyncio
+async def test_startup_pipeline_reports_failures_and_timeout():
+    pipeline = StartupPipeline()
+    release = asyncio.Event()
+
+    async def broken():
+        raise ValueError("boom")
+
+    async def blocked():
+        await release.wait()
+
+    pipeline.add_step("broken", broken)
+    pipeline.add_step("blocked", blocked)
+    await pipeline.run(timeout=0.01)
+    assert pipeline.state == "warming"
+
+    release.set()
+    await pipeline.wait()
+    assert pipeline.ready is False
+    assert pipeline.status()["errors"] == {"broken": "boom"}
@@ -0,0 +1,53 @@
+import gzip
+import pytest
+from quart import Quart
+
+from backend.static_assets import StaticAssets
+
+
+@pytest.fixture
+def client(tmp_path):
+    script = b"console.log('hello');" * 100
+    (tmp_path / "index-abc123.js").write_bytes(script)
+    (tmp_path / "index-abc123.js.gz").write_bytes(gzip.compress(script))
+    (tmp_path / "logo-def456.svg").write_bytes(b"<svg/>")
+
+    app = Quart(__name__)
+    app.static_assets = StaticAssets(str(tmp_path))
+
+    @app.route("/assets/<path:path>")
+    async def assets(path):
+        return await app.static_assets.send(path)
+
+    return app.test_client()
+
+
+@pytest.mark.asyncio
+async def test_serves_the_precompressed_variant_the_client_accepts(client):
+    compressed = await client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "br, gzip"})
+    plain = await client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(await compressed.get_data()) == await plain.get_data()
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert not compressed.headers["ETag"].startswith("W/")
+    assert "immutable" in compressed.headers["Cache-Control"]
+    assert "max-age=31536000" in compressed.headers["Cache-Control"]
+
+    svg = await client.get("/assets/logo-def456.svg", headers={"Accept-Encoding": "gzip"})
+    assert svg.mimetype == "image/svg+xml"
+    assert "Vary" not in svg.headers
+
+
+@pytest.mark.asyncio
+async def test_revalidation_and_missing_files(client):
+    first = await client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+    again = await client.get(
+        "/assets/index-abc123.js", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]}
+    )
+
+    assert again.status_code == 304
+    assert (await client.get("/assets/missing.js")).status_code == 404
+    assert (await client.get("/assets/../secret.js")).status_code == 404
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from quart import Quart, current_app
+from backend.streaming import StreamTracker, in_app_context
+
+
+class UpstreamStream:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_tracker_counts_completed_streams():
+    tracker = StreamTracker()
+    upstream = UpstreamStream([1, 2])
+
+    assert [chunk async for chunk in tracker.track(upstream)] == [1, 2]
+    assert upstream.closed
+    assert tracker.snapshot() == {"active": 0, "completed_total": 1, "cancelled_total": 0, "failed_total": 0}
+
+
+@pytest.mark.asyncio
+async def test_tracker_closes_upstream_when_client_goes_away():
+    tracker = StreamTracker()
+
+    # response body closed by the server after a disconnect
+    upstream = UpstreamStream([1, 2, 3])
+    tracked = tracker.track(upstream)
+    assert await tracked.__anext__() == 1
+    await tracked.aclose()
+    assert upstream.closed
+
+    # request task cancelled while waiting on the upstream
+    upstream = UpstreamStream([1, 2, 3], delay=10)
+
+    async def consume():
+        async for _ in tracker.track(upstream):
+            pass
+
+    task = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert upstream.closed
+    assert tracker.snapshot()["cancelled_total"] == 2
+    assert tracker.snapshot()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_in_app_context_serves_current_app_mid_stream():
+    app = Quart(__name__)
+    closed = []
+
+    async def follow_up():
+        try:
+            for chunk in [1, 2]:
+                # e.g. the follow-up completion after a tool call
+                yield current_app.name, chunk
+        finally:
+            closed.append(True)
+
+    stream = in_app_context(app, follow_up())
+    assert await stream.__anext__() == (app.name, 1)
+    await stream.aclose()
+    assert closed == [True]
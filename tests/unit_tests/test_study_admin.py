@@ -0,0 +1,158 @@
+import os
+from importlib import import_module
+
+import pytest
+from azure.cosmos import exceptions
+
+from backend.study_manager import StudyManager
+from backend.study_admin import StudyAdminOperation, StudyCohortAdmin
+
+
+class DummyContainer:
+    def __init__(self, items=None):
+        self.items = dict(items or {})
+        self.calls = []
+
+    async def upsert_item(self, body):
+        self.calls.append(("upsert", body["id"]))
+        self.items[body["id"]] = body
+        return body
+
+    async def patch_item(self, item, partition_key, patch_operations):
+        self.calls.append(("patch", item))
+        if item not in self.items:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="not found")
+        doc = self.items[item]
+        for operation in patch_operations:
+            target = doc
+            *parents, leaf = operation["path"].strip("/").split("/")
+            for parent in parents:
+                target = target[parent]
+            target[leaf] = operation["value"]
+        return doc
+
+    async def delete_item(self, item, partition_key):
+        self.calls.append(("delete", item))
+        if item not in self.items:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="not found")
+        del self.items[item]
+
+
+def test_operation_from_dict_validation():
+    assert StudyAdminOperation.from_dict({"op": "set_login_count", "count": "3"}).login_count == 3
+    assert StudyAdminOperation.from_dict({"op": "mark_survey", "survey": "pre_test"}).completed is True
+    with pytest.raises(ValueError):
+        StudyAdminOperation.from_dict({"op": "drop_table"})
+    with pytest.raises(ValueError):
+        StudyAdminOperation.from_dict({"op": "mark_survey"})
+    assert StudyAdminOperation.from_dict({"op": "mark_survey", "survey": "pre_test", "completed": False}).completed is False
+    with pytest.raises(ValueError):
+        StudyAdminOperation.from_dict({"op": "mark_survey", "survey": "pre_test", "completed": "false"})
+    with pytest.raises(TypeError):
+        StudyAdminOperation.from_dict("reset")
+    # survey keys become patch paths: no nesting and no new flags from typos
+    for survey in ("surveys/pre_test", "pre_tset", ["pre_test"]):
+        with pytest.raises(ValueError):
+            StudyAdminOperation.from_dict({"op": "mark_survey", "survey": survey})
+
+
+@pytest.mark.asyncio
+async def test_bulk_reset_writes_once_without_reading():
+    container = DummyContainer({"metadata-u1": {"id": "metadata-u1"}})
+    cohort_admin = StudyCohortAdmin(StudyManager(container), max_concurrency=4)
+
+    progress = []
+    report = await cohort_admin.apply(
+        ["u1", "u2", "u1"],
+        [StudyAdminOperation(op="reset"), StudyAdminOperation(op="set_login_count", login_count=2)],
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert report.total == 2 and report.succeeded == 2 and report.failed == 0
+    assert progress[-1] == (2, 2)
+    assert "metadata-u1" not in container.items
+    assert container.items["profile-u1"]["login_count"] == 2
+    assert [c for c in container.calls if c[0] == "upsert"] == [("upsert", "profile-u1"), ("upsert", "profile-u2")]
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_falls_back_to_create():
+    manager = StudyManager(DummyContainer())
+    manager.container_client.items["profile-u1"] = manager._new_profile("u1")
+    cohort_admin = StudyCohortAdmin(manager)
+
+    report = await cohort_admin.apply(
+        ["u1", "u2"],
+        [StudyAdminOperation(op="mark_survey", survey_key="pre_test", completed=True)],
+    )
+
+    assert report.succeeded == 2
+    items = manager.container_client.items
+    assert items["profile-u1"]["surveys"]["pre_test"] is True
+    assert items["profile-u2"]["surveys"]["pre_test"] is True
+    assert items["profile-u2"]["login_count"] == 0
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    # Minimal settings in case app.py is not imported yet; the admin settings are
+    # patched in place, so later tests keep the settings they were loaded with
+    monkeypatch.setenv("AZURE_OPENAI_MODEL", os.environ.get("AZURE_OPENAI_MODEL") or "gpt-4o")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", os.environ.get("AZURE_OPENAI_ENDPOINT") or "https://dummy.openai.azure.com/")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", os.environ.get("AZURE_OPENAI_KEY") or "dummy")
+    app_module = import_module("app")
+    monkeypatch.setattr(app_module.app_settings.admin, "principal_ids", "admin")
+    monkeypatch.setattr(app_module.app_settings.admin, "study_bulk_concurrency", 8)
+
+    concurrency = []
+
+    class RecordingCohortAdmin(StudyCohortAdmin):
+        def __init__(self, study_manager, max_concurrency=16):
+            super().__init__(study_manager, max_concurrency)
+            concurrency.append(self.max_concurrency)
+
+    monkeypatch.setattr("backend.study_admin.StudyCohortAdmin", RecordingCohortAdmin)
+    app = app_module.create_app()
+    app.study_manager = StudyManager(DummyContainer())
+    client = app.test_client()
+    client.concurrency = concurrency
+    return client
+
+
+async def bulk(client, body):
+    response = await client.post(
+        "/api/study/admin/bulk", json=body, headers={"X-Ms-Client-Principal-Id": "admin"}
+    )
+    return response.status_code, await response.get_json()
+
+
+@pytest.mark.asyncio
+async def test_bulk_route_clamps_concurrency_to_the_setting(admin_client):
+    body = {"user_ids": ["u1"], "operations": [{"op": "reset"}]}
+
+    assert (await bulk(admin_client, body))[0] == 200
+    assert (await bulk(admin_client, {**body, "concurrency": 2}))[0] == 200
+    assert (await bulk(admin_client, {**body, "concurrency": 1000}))[0] == 200
+    assert admin_client.concurrency == [8, 2, 8]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [
+    {"concurrency": 0},
+    {"concurrency": -4},
+    {"concurrency": "4"},
+    {"concurrency": 2.5},
+    {"concurrency": True},
+    {"operations": ["reset"]},
+    {"operations": {"op": "reset"}},
+    {"operations": [{"op": "mark_survey", "survey": "pre_test", "completed": "false"}]},
+    {"operations": [{"op": "mark_survey", "survey": "a/b"}]},
+    {"user_ids": [{"id": "u1"}]},
+    {"user_ids": ["u1", ""]},
+])
+async def test_bulk_route_rejects_invalid_bodies(admin_client, body):
+    status, response = await bulk(admin_client, {"user_ids": ["u1"], "operations": [{"op": "reset"}], **body})
+
+    assert status == 400
+    assert "error" in response
+    assert admin_client.concurrency == []
@@ -0,0 +1,65 @@
+import json
+import logging
+import pytest
+from backend import timing
+
+
+async def answer():
+    yield {"choices": [{"messages": [{"role": "assistant", "content": "Hi"}]}]}
+
+
+@pytest.mark.asyncio
+async def test_spans_are_noops_outside_a_timed_request():
+    @timing.timed("store")
+    async def store():
+        return "stored"
+
+    assert timing.current() is None
+    with timing.span("graph.groups"):
+        pass
+    assert await store() == "stored"
+
+
+@pytest.mark.asyncio
+async def test_spans_add_up_per_name():
+    @timing.timed("cosmos.create_message")
+    async def create_message():
+        pass
+
+    request_timing = timing.start()
+    await create_message()
+    await create_message()
+    async with timing.span("openai"):
+        pass
+
+    assert request_timing.spans["cosmos.create_message"][1] == 2
+    header = request_timing.server_timing()
+    assert header.startswith('cosmos.create_message;dur=')
+    assert 'desc="2 calls"' in header
+    assert "openai;dur=" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+@pytest.mark.asyncio
+async def test_stream_appends_the_timing_frame_and_logs(caplog):
+    request_timing = timing.start("/conversation")
+
+    with caplog.at_level(logging.INFO, logger="timing"):
+        chunks = [chunk async for chunk in request_timing.stream(answer(), frame=True)]
+
+    assert chunks[0]["choices"]
+    assert set(chunks[-1]["timing"]["spans"]) == {"ttft", "stream"}
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["route"] == "/conversation"
+    assert record["status"] == 200
+
+
+@pytest.mark.asyncio
+async def test_stream_without_frame_only_yields_the_answer(caplog):
+    request_timing = timing.start("/conversation", log_threshold_ms=60_000)
+
+    with caplog.at_level(logging.INFO, logger="timing"):
+        chunks = [chunk async for chunk in request_timing.stream(answer())]
+
+    assert len(chunks) == 1
+    assert not caplog.records
@@ -0,0 +1,24 @@
+from backend.titles import DEFAULT_TITLE, TitleCache, fallback_title
+
+
+def test_fallback_title_uses_first_words_of_first_question():
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "what's the best   way to apply for a co-op, please?"},
+        {"role": "user", "content": "second question"},
+    ]
+    assert fallback_title(messages) == "What's the best way"
+    assert fallback_title([{"role": "user", "content": "?!"}]) == DEFAULT_TITLE
+
+
+def test_title_cache_evicts_least_recently_used():
+    cache = TitleCache(max_size=2)
+    keys = [cache.key([{"role": "user", "content": f"question {i}"}]) for i in range(3)]
+    cache.put(keys[0], "zero")
+    cache.put(keys[1], "one")
+    assert cache.get(keys[0]) == "zero"
+
+    cache.put(keys[2], "two")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "zero"
+    assert cache.key([{"role": "user", "content": " question 0 "}]) == keys[0]
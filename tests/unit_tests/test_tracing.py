@@ -0,0 +1,48 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from backend import timing, tracing
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+@pytest.mark.asyncio
+async def test_request_spans_nest_under_the_incoming_trace(exporter):
+    @timing.timed("cosmos.create_message")
+    async def create_message():
+        async with timing.span("cosmos.get_conversation"):
+            return tracing.inject_trace_context({})
+
+    incoming = {"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+    request_trace = tracing.start_request_trace("POST", "/history/generate", incoming)
+    request_timing = timing.start("/history/generate", log_threshold_ms=None, listeners=[request_trace])
+    outgoing = await create_message()
+    request_timing.finish(200)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    server = spans["POST /history/generate"]
+    assert format(server.context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert server.attributes["http.response.status_code"] == 200
+    assert spans["cosmos.create_message"].parent.span_id == server.context.span_id
+    assert spans["cosmos.get_conversation"].parent.span_id == spans["cosmos.create_message"].context.span_id
+    assert format(spans["cosmos.get_conversation"].context.span_id, "016x") in outgoing["traceparent"]
+
+
+@pytest.mark.asyncio
+async def test_spans_are_traced_outside_requests(exporter):
+    with pytest.raises(ValueError):
+        with timing.span("startup.history"):
+            raise ValueError("unreachable")
+
+    [span] = exporter.get_finished_spans()
+    assert span.name == "startup.history"
+    assert not span.status.is_ok
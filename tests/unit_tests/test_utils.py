@@ -8,7 +8,7 @@ async def test_format_as_ndjson():
         yield {"message": "test message\n"}
 
     async for event in format_as_ndjson(dummy_generator()):
-        assert event == '{"message": "test message\\n"}\n'
+        assert event == b'{"message":"test message\\n"}\n'
 
 
 @pytest.mark.asyncio
@@ -18,7 +18,7 @@ async def test_format_as_ndjson_exception():
         yield {"message": "test message\n"}
     
     async for event in format_as_ndjson(dummy_generator()):
-        assert event == '{"error": "test exception"}'
+        assert event == b'{"error":"test exception"}'
 
 def test_parse_multi_columns():
     test_pipes = "col1|col2|col3"
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import sys
+from azure.identity.aio import DefaultAzureCredential
+
+# Add project root to sys.path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.settings import app_settings
+from backend.history.cosmosdbservice import CosmosConversationClient
+from backend.study_manager import StudyManager
+from backend.study_admin import SURVEY_KEYS, StudyAdminOperation, StudyCohortAdmin
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Reset or seed study state for a cohort of users in one run.",
+    )
+    parser.add_argument("--users", nargs="*", default=[], help="User principal ids to update.")
+    parser.add_argument("--users-file", help="File with one user principal id per line.")
+    parser.add_argument("--reset", action="store_true", help="Reset each user's study profile first.")
+    parser.add_argument("--login-count", type=int, help="Set login_count to this value.")
+    parser.add_argument("--survey", action="append", default=[], choices=SURVEY_KEYS, help="Mark a survey complete (repeatable).")
+    parser.add_argument("--survey-incomplete", action="append", default=[], choices=SURVEY_KEYS, help="Mark a survey incomplete (repeatable).")
+    parser.add_argument("--concurrency", type=int, default=app_settings.admin.study_bulk_concurrency)
+    return parser.parse_args()
+
+
+def build_operations(args):
+    operations = []
+    if args.reset:
+        operations.append(StudyAdminOperation(op="reset"))
+    if args.login_count is not None:
+        operations.append(StudyAdminOperation(op="set_login_count", login_count=args.login_count))
+    for survey_key in args.survey:
+        operations.append(StudyAdminOperation(op="mark_survey", survey_key=survey_key, completed=True))
+    for survey_key in args.survey_incomplete:
+        operations.append(StudyAdminOperation(op="mark_survey", survey_key=survey_key, completed=False))
+    return operations
+
+
+def load_user_ids(args):
+    user_ids = list(args.users)
+    if args.users_file:
+        with open(args.users_file, "r") as f:
+            user_ids.extend(line.strip() for line in f if line.strip())
+    return user_ids
+
+
+def print_progress(done, total):
+    print(f"\r  {done}/{total} users processed", end="", flush=True)
+    if done == total:
+        print()
+
+
+async def run(args):
+    if not app_settings.chat_history:
+        print("Chat history is not configured in settings.")
+        return
+
+    user_ids = load_user_ids(args)
+    operations = build_operations(args)
+    if not user_ids or not operations:
+        print("Nothing to do: provide users (--users/--users-file) and at least one operation.")
+        return
+
+    if app_settings.chat_history.account_key:
+        credential = app_settings.chat_history.account_key
+    else:
+        credential = DefaultAzureCredential()
+
+    cosmos_endpoint = f"https://{app_settings.chat_history.account}.documents.azure.com:443/"
+    client = CosmosConversationClient(
+        cosmosdb_endpoint=cosmos_endpoint,
+        credential=credential,
+        database_name=app_settings.chat_history.database,
+        container_name=app_settings.chat_history.conversations_container
+    )
+
+    try:
+        cohort_admin = StudyCohortAdmin(StudyManager(client.container_client), max_concurrency=args.concurrency)
+        print(f"Applying {', '.join(op.op for op in operations)} to {len(set(user_ids))} users...")
+        report = await cohort_admin.apply(user_ids, operations, on_progress=print_progress)
+
+        print(f"Done in {report.elapsed_seconds:.2f}s: {report.succeeded} succeeded, {report.failed} failed.")
+        for user_id, error in report.errors.items():
+            print(f"  {user_id}: {error}")
+    finally:
+        await client.cosmosdb_client.close()
+        if not app_settings.chat_history.account_key and hasattr(credential, 'close'):
+            await credential.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run(parse_args()))
+    except KeyboardInterrupt:
+        pass